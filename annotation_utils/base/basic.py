@@ -11,6 +11,8 @@ from common_utils.check_utils import check_required_keys, check_type_from_list,
     check_type, check_file_exists
 from common_utils.file_utils import file_exists
 
+from .index import IdIndexMixin, note_attr_write, TRACKED_ATTR_NAMES
+
 T = TypeVar('T')
 H = TypeVar('H')
 
@@ -116,11 +118,23 @@ class BasicLoadableIdObject(BasicLoadableObject[T]):
         3. Non-trivial classmethods must be defined in child class
         4. Must implement __str__
     """
+    __slots__ = ['_index_watchers'] # Kept out of __dict__, so that __dict__ still matches the constructor parameters.
+
     def __init__(self, id: int):
         super().__init__()
+        self._index_watchers = None
         self.id = id
 
-class BasicHandler(Generic[H, T]):
+    def __setattr__(self, name: str, value):
+        object.__setattr__(self, name, value)
+        if name in TRACKED_ATTR_NAMES:
+            note_attr_write(self, name)
+
+    def __getstate__(self) -> tuple:
+        # The handlers that watch this object don't travel with it (refer to IndexWatcher).
+        return (self.__dict__, {'_index_watchers': None})
+
+class BasicHandler(IdIndexMixin, Generic[H, T]):
     """
     Assumptions:
         1. Handler has only one class parameter: the object list.
@@ -131,6 +145,7 @@ class BasicHandler(Generic[H, T]):
         if obj_list is not None:
             check_type_from_list(obj_list, valid_type_list=[obj_type])
         self.obj_list = obj_list if obj_list is not None else []
+        self._reset_id_index()
 
     def __str__(self: H):
         print_str = ""
@@ -165,8 +180,10 @@ class BasicHandler(Generic[H, T]):
         check_type(value, valid_type_list=[self.obj_type])
         if type(idx) is int:
             self.obj_list[idx] = value
+            self._reset_id_index()
         elif type(idx) is slice:
             self.obj_list[idx.start:idx.stop:idx.step] = value
+            self._reset_id_index()
         else:
             logger.error(f'Expected int or slice. Got type(idx)={type(idx)}')
             raise TypeError
@@ -181,8 +198,10 @@ class BasicHandler(Generic[H, T]):
                 raise IndexError
             else:
                 del self.obj_list[idx]
+                self._reset_id_index()
         elif type(idx) is slice:
             del self.obj_list[idx.start:idx.stop:idx.step]
+            self._reset_id_index()
         else:
             logger.error(f'Expected int or slice. Got type(idx)={type(idx)}')
             raise TypeError
@@ -205,6 +224,7 @@ class BasicHandler(Generic[H, T]):
     def append(self: H, item: T):
         check_type(item, valid_type_list=[self.obj_type])
         self.obj_list.append(item)
+        self._index_obj(item, len(self.obj_list) - 1)
 
     def sort(self: H, attr_name: str, reverse: bool=False):
         if len(self) > 0:
@@ -217,12 +237,14 @@ class BasicHandler(Generic[H, T]):
                 raise Exception
 
             self.obj_list.sort(key=operator.attrgetter(attr_name), reverse=reverse)
+            self._reset_id_index()
         else:
             logger.error(f"Cannot sort. {type(self).__name__} is empty.")
             raise Exception
 
     def shuffle(self: H):
         random.shuffle(self.obj_list)
+        self._reset_id_index()
 
 class BasicLoadableHandler(BasicHandler[H, T]):
     """
@@ -270,12 +292,14 @@ class BasicLoadableIdHandler(BasicLoadableHandler[H, T], BasicHandler[H, T]):
         super().__init__(obj_type=obj_type, obj_list=obj_list)
     
     def get_obj_from_id(self: H, id: int) -> T:
-        id_list = []
-        for obj in self:
-            if id == obj.id:
-                return obj
-            else:
-                id_list.append(obj.id)
+        """
+        Returns the first object in the handler whose id matches the given id.
+        Lookups go through the id -> position hash index of IdIndexMixin.
+        """
+        obj = self._lookup_id_index(id)
+        if obj is not None:
+            return obj
+        id_list = [obj.id for obj in self.obj_list]
         id_list.sort()
         logger.error(f"Couldn't find {self.obj_type.__name__} with id={id}")
         logger.error(f"Possible ids: {id_list}")
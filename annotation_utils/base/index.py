@@ -0,0 +1,165 @@
+from __future__ import annotations
+from typing import TypeVar, List
+import weakref
+from logger import logger
+
+T = TypeVar('T')
+
+# The attributes that handlers keep indexes over. Objects report writes to these to the handlers that indexed them.
+TRACKED_ATTR_NAMES = ['id', 'image_id', 'category_id', 'license_id']
+
+class IndexWatcher:
+    """
+    Counts the writes to the tracked attributes of the objects that one handler has indexed.
+
+    Every watched object holds a tuple of weak references to the watchers that it has to report to
+    in its _index_watchers attribute. Objects that no handler has indexed yet (e.g. while they are being
+    constructed or copied) have None there, so writing to them doesn't invalidate any index.
+    """
+    __slots__ = ['versions', 'ref', '__weakref__']
+
+    def __init__(self):
+        self.versions = dict.fromkeys(TRACKED_ATTR_NAMES, 0)
+        self.ref = weakref.ref(self)
+
+    def watch(self, objs: List[T]):
+        """
+        Makes every object in objs report the writes to its tracked attributes to this watcher.
+        Objects that don't have an _index_watchers attribute can't report anything and are skipped.
+        """
+        ref = self.ref
+        # Most objects share the same watchers tuple, so each tuple is only extended once.
+        transitions = {} # id(old watchers) -> (old watchers, new watchers)
+        supported_types = {} # type -> whether it has _index_watchers
+        for obj in objs:
+            obj_type = type(obj)
+            if obj_type not in supported_types:
+                supported_types[obj_type] = hasattr(obj_type, '_index_watchers')
+            if not supported_types[obj_type]:
+                continue
+            watchers = getattr(obj, '_index_watchers', None)
+            key = id(watchers)
+            if key in transitions:
+                new_watchers = transitions[key][1]
+            else:
+                if watchers is None:
+                    new_watchers = (ref,)
+                elif any([watcher_ref is ref for watcher_ref in watchers]):
+                    new_watchers = watchers
+                else:
+                    # Drop the watchers of handlers that don't exist anymore.
+                    new_watchers = tuple([watcher_ref for watcher_ref in watchers if watcher_ref() is not None]) + (ref,)
+                transitions[key] = (watchers, new_watchers)
+            if new_watchers is not watchers:
+                obj._index_watchers = new_watchers
+
+def _count_write(watchers: tuple, attr_name: str):
+    for watcher_ref in watchers:
+        watcher = watcher_ref()
+        if watcher is not None:
+            watcher.versions[attr_name] += 1
+
+def note_attr_write(obj, attr_name: str):
+    """
+    Reports a write to attr_name of obj to the handlers that indexed obj.
+    Objects that store an indexed attribute outside of a tracked slot (refer to track_slot_writes) have to
+    call this from their setter.
+    """
+    watchers = getattr(obj, '_index_watchers', None)
+    if watchers is not None:
+        _count_write(watchers, attr_name)
+
+def _tracked_slot(attr_name: str, member, watchers_member) -> property:
+    set_slot = member.__set__
+    get_watchers = watchers_member.__get__
+    def set_value(self, value):
+        set_slot(self, value)
+        try:
+            watchers = get_watchers(self)
+        except AttributeError:
+            # _index_watchers hasn't been assigned yet, so no handler can have indexed this object.
+            return
+        if watchers is not None:
+            _count_write(watchers, attr_name)
+    return property(member.__get__, set_value, member.__delete__)
+
+def track_slot_writes(cls: type):
+    """
+    Replaces the slots of cls that hold an indexed attribute by properties that report every write.
+    Reads still go straight to the slot, so only writes pay for the tracking.
+    A class with such slots also has to declare an _index_watchers slot, and should assign None to it
+    at the start of __init__.
+    """
+    slots = cls.__dict__.get('__slots__', [])
+    tracked_names = [name for name in ([slots] if type(slots) is str else slots) if name in TRACKED_ATTR_NAMES]
+    if len(tracked_names) == 0:
+        return
+    if not hasattr(cls, '_index_watchers'):
+        logger.error(f'{cls.__name__} has to declare an _index_watchers slot in order to track writes to {tracked_names}.')
+        raise Exception
+    for name in tracked_names:
+        setattr(cls, name, _tracked_slot(name, cls.__dict__[name], getattr(cls, '_index_watchers')))
+
+class IdIndexMixin:
+    """
+    id -> position index over self.obj_list, shared by the handler classes.
+
+    The index is built on first use and extended by append.
+    Handlers have to call _reset_id_index whenever they reorder or replace the contents of obj_list.
+    Writing the id of an object in the handler also marks the index as stale.
+    """
+    def _get_index_watcher(self) -> IndexWatcher:
+        watcher = self.__dict__.get('_index_watcher', None)
+        if watcher is None:
+            watcher = self._index_watcher = IndexWatcher()
+        return watcher
+
+    def _reset_id_index(self):
+        self._id_index = None
+        self._id_index_len = None
+        self._id_index_version = None
+
+    def _build_id_index(self) -> dict:
+        watcher = self._get_index_watcher()
+        watcher.watch(self.obj_list)
+        id_index = {}
+        for idx, obj in enumerate(self.obj_list):
+            if hasattr(obj, 'id'):
+                id_index.setdefault(obj.id, idx)
+        self._id_index = id_index
+        self._id_index_len = len(self.obj_list)
+        self._id_index_version = watcher.versions['id']
+        return id_index
+
+    def _index_obj(self, obj: T, idx: int):
+        if self._id_index is not None and self._id_index_len == idx:
+            self._get_index_watcher().watch([obj])
+            if hasattr(obj, 'id'):
+                self._id_index.setdefault(obj.id, idx)
+            self._id_index_len += 1
+
+    def _lookup_id_index(self, id: int) -> T:
+        """
+        Returns the first object with the given id, or None.
+        A hit is checked against obj_list. A miss only triggers a rebuild if the id of an object in this
+        handler was written since the index was built, so repeated misses cost O(1).
+        """
+        id_index = self._id_index
+        if id_index is None or self._id_index_len != len(self.obj_list):
+            id_index = self._build_id_index()
+        idx = id_index.get(id, None)
+        if idx is not None:
+            obj = self.obj_list[idx]
+            if obj.id == id:
+                return obj
+        elif self._id_index_version == self._get_index_watcher().versions['id']:
+            return None
+        idx = self._build_id_index().get(id, None)
+        return self.obj_list[idx] if idx is not None else None
+
+    def __getstate__(self) -> dict:
+        # The objects of a copy (e.g. in a worker process) aren't watched by it, so its indexes start out empty.
+        state = self.__dict__.copy()
+        state.pop('_index_watcher', None)
+        state.update({'_id_index': None, '_id_index_len': None, '_id_index_version': None})
+        return state
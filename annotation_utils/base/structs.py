@@ -3,17 +3,36 @@ from abc import ABCMeta, abstractmethod
 from typing import TypeVar, Type, Generic, List
 import json
 import operator
+import types
 import random
+import numpy as np
 
 from logger import logger
 from common_utils.check_utils import check_required_keys, check_type_from_list, \
     check_type
 from common_utils.file_utils import file_exists
 
+from .index import IdIndexMixin, track_slot_writes, TRACKED_ATTR_NAMES
+
 T = TypeVar('T')
 H = TypeVar('H')
 
+_slot_descriptors = {} # class -> [(slot name, member descriptor), ...]
+
+def _get_slot_descriptors(cls: type) -> list:
+    if cls not in _slot_descriptors:
+        descriptors = []
+        for klass in reversed(cls.__mro__):
+            slots = klass.__dict__.get('__slots__', [])
+            for name in [slots] if type(slots) is str else slots:
+                if name not in ['__dict__', '__weakref__', '_index_watchers']:
+                    descriptors.append((name, klass.__dict__[name]))
+        _slot_descriptors[cls] = descriptors
+    return _slot_descriptors[cls]
+
 class BaseStructObject(Generic[T]):
+    __slots__ = []
+
     def __init__(self):
         pass
 
@@ -25,8 +44,50 @@ class BaseStructObject(Generic[T]):
     def __repr__(self):
         return self.__str__()
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        track_slot_writes(cls)
+
+    def _get_attr_dict(self) -> dict:
+        """
+        Returns the instance variables of this object in the order that they are declared/assigned.
+        Works for objects that keep their variables in __slots__, in __dict__, or both.
+        Slots are read directly, so properties that shadow them in subclasses are not triggered.
+        Slots that were never assigned are skipped.
+        """
+        descriptors = _get_slot_descriptors(type(self))
+        if len(descriptors) == 0:
+            return self.__dict__
+        attr_dict = {}
+        for name, descriptor in descriptors:
+            try:
+                attr_dict[name] = descriptor.__get__(self)
+            except AttributeError:
+                pass
+        if hasattr(self, '__dict__'):
+            attr_dict.update(self.__dict__)
+        return attr_dict
+
+    def __getstate__(self) -> tuple:
+        # The handlers that watch this object don't travel with it (refer to IndexWatcher).
+        is_slot = isinstance(getattr(type(self), '_index_watchers', None), types.MemberDescriptorType)
+        slot_state = {'_index_watchers': None} if is_slot else {}
+        for name, descriptor in _get_slot_descriptors(type(self)):
+            try:
+                slot_state[name] = descriptor.__get__(self)
+            except AttributeError:
+                pass
+        return (self.__dict__ if hasattr(self, '__dict__') else None, slot_state)
+
+    def _get_key_values(self) -> list:
+        """
+        The values that are compared by __eq__ and hashed by __hash__.
+        Override this if some instance variables don't compare by value (e.g. placeholders).
+        """
+        return list(self._get_attr_dict().values())
+
     def __key(self) -> tuple:
-        return tuple([self.__class__] + list(self.__dict__.values()))
+        return tuple([self.__class__] + self._get_key_values())
 
     def __hash__(self):
         return hash(self.__key())
@@ -42,11 +103,11 @@ class BaseStructObject(Generic[T]):
 
     def copy(self: T) -> T:
         """Note: All class variables must be part of the constructor."""
-        return type(self)(*self.__dict__.values())
+        return type(self)(*self._get_attr_dict().values())
 
     def to_dict(self: T) -> dict:
         """Note: All class variables will be put into the dict."""
-        return self.__dict__
+        return self._get_attr_dict()
 
     def save_to_path(self: T, save_path: str, overwrite: bool=False):
         if file_exists(save_path) and not overwrite:
@@ -55,13 +116,22 @@ class BaseStructObject(Generic[T]):
         json_dict = self.to_dict()
         json.dump(json_dict, open(save_path, 'w'), indent=2, ensure_ascii=False)
 
-class BaseStructHandler(Generic[H, T]):
+class BaseStructHandler(IdIndexMixin, Generic[H, T]):
     def __init__(self: H, obj_type: type, obj_list: List[T]=None):
         check_type(obj_type, valid_type_list=[type])
         self.obj_type = obj_type
         if obj_list is not None:
-            check_type_from_list(obj_list, valid_type_list=[obj_type])
+            check_type_from_list(obj_list, valid_type_list=self._valid_obj_types())
         self.obj_list = obj_list if obj_list is not None else []
+        self._reset_id_index()
+        self._group_indexes = {}
+
+    def _valid_obj_types(self) -> list:
+        """
+        The object types that this handler accepts.
+        Override this if the handler can also hold alternative representations of obj_type.
+        """
+        return [self.obj_type]
 
     def __str__(self):
         print_str = ""
@@ -93,11 +163,14 @@ class BaseStructHandler(Generic[H, T]):
             raise TypeError
 
     def __setitem__(self, idx: int, value: T):
-        check_type(value, valid_type_list=[self.obj_type])
+        check_type(value, valid_type_list=self._valid_obj_types())
         if type(idx) is int:
             self.obj_list[idx] = value
+            self._reset_id_index()
+            self._reset_group_indexes()
         elif type(idx) is slice:
             self.obj_list[idx.start:idx.stop:idx.step] = value
+            self.reset_indexes()
         else:
             logger.error(f'Expected int or slice. Got type(idx)={type(idx)}')
             raise TypeError
@@ -112,8 +185,11 @@ class BaseStructHandler(Generic[H, T]):
                 raise IndexError
             else:
                 del self.obj_list[idx]
+                self._reset_id_index()
+                self._reset_group_indexes()
         elif type(idx) is slice:
             del self.obj_list[idx.start:idx.stop:idx.step]
+            self.reset_indexes()
         else:
             logger.error(f'Expected int or slice. Got type(idx)={type(idx)}')
             raise TypeError
@@ -134,13 +210,18 @@ class BaseStructHandler(Generic[H, T]):
         return type(self)(self.obj_list.copy())
 
     def append(self, item: T):
-        check_type(item, valid_type_list=[self.obj_type])
+        check_type(item, valid_type_list=self._valid_obj_types())
         self.obj_list.append(item)
+        self._index_obj(item, len(self.obj_list) - 1)
+        self._group_obj(item, len(self.obj_list) - 1)
 
     def sort(self, attr_name: str, reverse: bool=False):
         if len(self) > 0:
-            attr_list = list(self.obj_list[0].__dict__.keys())    
-            if attr_name not in attr_list:
+            if not hasattr(self.obj_list[0], attr_name):
+                attr_list = [
+                    name for name in dir(self.obj_list[0])
+                    if not name.startswith('_') and not callable(getattr(self.obj_list[0], name))
+                ]
                 logger.error(f"{self.obj_type.__name__} class has not attribute: '{attr_name}'")
                 logger.error(f'Possible attribute names:')
                 for name in attr_list:
@@ -148,20 +229,179 @@ class BaseStructHandler(Generic[H, T]):
                 raise Exception
 
             self.obj_list.sort(key=operator.attrgetter(attr_name), reverse=reverse)
+            self.reset_indexes()
         else:
             logger.error(f"Cannot sort. {type(self).__name__} is empty.")
             raise Exception
 
     def shuffle(self):
         random.shuffle(self.obj_list)
+        self.reset_indexes()
 
-    def get_obj_from_id(self, id: int) -> T: # Need to move this to a different base class
-        id_list = []
-        for obj in self:
-            if id == obj.id:
-                return obj
+    def reset_indexes(self):
+        """
+        Discards all of the lookup indexes of this handler. They are rebuilt the next time they are needed.
+        Call this after modifying obj_list directly.
+        Changing an attribute of an object in the handler (e.g. coco_ann.image_id = 1) does not require this.
+        """
+        self._reset_id_index()
+        self._reset_group_indexes()
+
+    def _reset_group_indexes(self):
+        self._group_indexes = {}
+
+    def __getstate__(self) -> dict:
+        state = super().__getstate__()
+        state['_group_indexes'] = {}
+        return state
+
+    def _build_group_index(self, attr_name: str) -> dict:
+        watcher = self._get_index_watcher()
+        watcher.watch(self.obj_list)
+        group_index = {}
+        for idx, obj in enumerate(self.obj_list):
+            value = getattr(obj, attr_name)
+            if value in group_index:
+                group_index[value].append(idx)
+            else:
+                group_index[value] = [idx]
+        self._group_indexes[attr_name] = (group_index, len(self.obj_list), watcher.versions[attr_name])
+        return group_index
+
+    def _group_obj(self, obj: T, idx: int):
+        if len(self._group_indexes) > 0:
+            self._get_index_watcher().watch([obj])
+        for attr_name, (group_index, indexed_len, version) in list(self._group_indexes.items()):
+            if indexed_len != idx:
+                del self._group_indexes[attr_name]
+                continue
+            value = getattr(obj, attr_name)
+            if value in group_index:
+                group_index[value].append(idx)
             else:
-                id_list.append(obj.id)
+                group_index[value] = [idx]
+            self._group_indexes[attr_name] = (group_index, indexed_len + 1, version)
+
+    def _get_group_index(self, attr_name: str) -> dict:
+        if attr_name in self._group_indexes:
+            group_index, indexed_len, version = self._group_indexes[attr_name]
+            if indexed_len == len(self.obj_list) and version == self._get_index_watcher().versions[attr_name]:
+                return group_index
+        return self._build_group_index(attr_name)
+
+    def get_idx_list_from_attr_values(self, attr_name: str, values: list) -> List[int]:
+        """
+        Returns the indices (in handler order) of all objects whose attr_name attribute is in values.
+        For the attributes whose writes are tracked (id, image_id, category_id, license_id), this goes through
+        an attr_name -> indices index that is built lazily and rebuilt after the handler is changed or the
+        attribute is written on one of its objects, so a query costs O(len(values) + number of matches) while nothing
+        is being modified. Any other attribute is found with a full scan.
+        """
+        values = list(dict.fromkeys(values))
+        value_set = set(values)
+        if attr_name not in TRACKED_ATTR_NAMES:
+            return [idx for idx, obj in enumerate(self.obj_list) if getattr(obj, attr_name) in value_set]
+        for rebuild in [False, True]:
+            group_index = self._build_group_index(attr_name) if rebuild else self._get_group_index(attr_name)
+            if len(values) == 1:
+                idx_list = list(group_index.get(values[0], []))
+            else:
+                idx_list = [idx for value in values for idx in group_index.get(value, [])]
+                idx_list.sort()
+            # Only an obj_list that was modified directly can get past the version check.
+            if all([getattr(self.obj_list[idx], attr_name) in value_set for idx in idx_list]):
+                break
+        return idx_list
+
+    def get_objs_from_attr_values(self, attr_name: str, values: list) -> List[T]:
+        """
+        Returns all objects (in handler order) whose attr_name attribute is in values.
+        Refer to get_idx_list_from_attr_values.
+        """
+        return [self.obj_list[idx] for idx in self.get_idx_list_from_attr_values(attr_name, values)]
+
+    def get_attr_values(self, attr_name: str) -> list:
+        """
+        Returns the attr_name attribute of every object, in handler order.
+        """
+        return [getattr(obj, attr_name) for obj in self.obj_list]
+
+    def get_attr_array(self, attr_name: str) -> np.ndarray:
+        """
+        Same as get_attr_values, but returns a numpy array.
+        """
+        return np.array(self.get_attr_values(attr_name))
+
+    def get_idx_array_from_attr_values(self, attr_name: str, values) -> np.ndarray:
+        """
+        Returns the indices (in handler order) of all objects whose attr_name attribute is in values, as an int64 array.
+        values can be any iterable (list, set, numpy array, generator, etc.). It is converted once,
+        and the attribute values are then compared with numpy (or a set), so the cost is O(len(self) + len(values))
+        no matter how many values there are.
+        Use take to get the matching objects as a handler.
+        """
+        value_arr = values.reshape(-1) if isinstance(values, np.ndarray) else np.array(list(values))
+        attr_arr = self.get_attr_array(attr_name)
+        if len(value_arr) == 0 or len(attr_arr) == 0:
+            return np.zeros(0, dtype=np.int64)
+        kinds = [attr_arr.dtype.kind, value_arr.dtype.kind]
+        if all([kind in 'iu' for kind in kinds]) or all([kind == 'U' for kind in kinds]):
+            mask = np.isin(attr_arr, value_arr)
+        else:
+            value_set = set(value_arr.tolist())
+            mask = np.fromiter((value in value_set for value in attr_arr.tolist()), dtype=bool, count=len(attr_arr))
+        return np.nonzero(mask)[0].astype(np.int64)
+
+    def take(self, idx) -> H:
+        """
+        Returns a new handler that contains the objects at the given indices (in the given order).
+        The objects themselves are shared with this handler, not copied.
+
+        idx: An index array/list or a boolean mask with one value per object.
+        """
+        idx = np.asarray(idx)
+        if idx.dtype == bool:
+            idx = np.nonzero(idx)[0]
+        return type(self)([self.obj_list[i] for i in idx.tolist()])
+
+    def remove_ids(self, id_set: set, verbose: bool=False, label: str=None) -> List[T]:
+        """
+        Removes every object whose id is in id_set and returns the removed objects.
+        The object list is rebuilt once (in place, so that aliases like image_list stay valid),
+        instead of deleting the objects one at a time.
+
+        label: The name used for the removed objects in the log when verbose is True.
+               Defaults to the name of obj_type.
+        """
+        id_set = set(id_set)
+        if len(id_set) == 0:
+            return []
+        keep_list, removed_list = [], []
+        for obj, id in zip(self.obj_list, self.get_attr_values('id')):
+            if id in id_set:
+                removed_list.append(obj)
+            else:
+                keep_list.append(obj)
+        if len(removed_list) > 0:
+            self.obj_list[:] = keep_list
+            self.reset_indexes()
+            if verbose:
+                label = label if label is not None else self.obj_type.__name__
+                for obj in removed_list:
+                    logger.info(f'Deleted {label} Id: {obj.id}')
+        return removed_list
+
+    def get_obj_from_id(self, id: int) -> T: # Need to move this to a different base class
+        """
+        Returns the first object in the handler whose id matches the given id.
+        Lookups go through the id -> position hash index of IdIndexMixin, which is rebuilt
+        whenever the handler is reordered or modified, or an object's id is changed in place.
+        Call reset_indexes after modifying obj_list directly.
+        """
+        obj = self._lookup_id_index(id)
+        if obj is not None:
+            return obj
+        id_list = [obj.id for obj in self.obj_list]
         id_list.sort()
         logger.error(f"Couldn't find {self.obj_type.__name__} with id={id}")
         logger.error(f"Possible ids: {id_list}")
@@ -1,5 +1,10 @@
 from .objects import COCO_Info, COCO_License, COCO_Image, \
-    COCO_Annotation, COCO_Category
+    COCO_Annotation_Base, COCO_Annotation, COCO_Category
+from .columns import COCO_Annotation_Columns, COCO_Annotation_View
+from .load_cache import COCO_Load_Cache
+from .image_cache import COCO_Image_Cache
 from .handlers import COCO_License_Handler, COCO_Image_Handler, \
     COCO_Annotation_Handler, COCO_Category_Handler
+from .merger import COCO_Merger
+from .query import COCO_Query
 from .dataset import COCO_Dataset
\ No newline at end of file
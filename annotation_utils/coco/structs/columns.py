@@ -0,0 +1,556 @@
+from __future__ import annotations
+from typing import List
+import numpy as np
+
+from logger import logger
+from common_utils.check_utils import check_required_keys
+from common_utils.common_types.keypoint import Keypoint2D_List, Keypoint3D_List
+from common_utils.common_types.bbox import BBox
+from common_utils.common_types.segmentation import Polygon, Segmentation
+
+from ..camera import Camera
+from ...base.index import note_attr_write
+from .objects import COCO_Annotation_Base, COCO_Annotation
+
+def _ragged_take(offsets: np.ndarray, idx: np.ndarray) -> (np.ndarray, np.ndarray):
+    """
+    Given the offsets of a ragged array and the indices of the rows that should be kept,
+    returns the offsets of the new ragged array and the positions (in the old value buffer)
+    of every value that belongs to the new ragged array.
+    """
+    starts = offsets[idx]
+    lengths = offsets[idx + 1] - starts
+    new_offsets = np.zeros(len(idx) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_offsets[1:])
+    positions = np.arange(new_offsets[-1], dtype=np.int64) + np.repeat(starts - new_offsets[:-1], lengths)
+    return new_offsets, positions
+
+class COCO_Annotation_Columns:
+    """
+    Struct-of-arrays storage for COCO annotations.
+    Instead of one COCO_Annotation object (with its BBox, Segmentation and Keypoint2D_List objects)
+    per annotation, every field is stored in a contiguous numpy array.
+
+    id, image_id, category_id, iscrowd, num_keypoints: int64 arrays of shape (N,)
+                                                       (iscrowd is -1 where it was not specified)
+    area: float64 array of shape (N,). NaN where area was not specified.
+    bbox: float64 array of shape (N, 4) in [xmin, ymin, width, height] format.
+    keypoints: float64 array of shape (N, K, 3), where K is the largest number of keypoints of any annotation.
+               Rows with less keypoints are zero padded. The actual number of keypoints is stored in kpt_count.
+    seg_offsets, poly_offsets, coords: Ragged storage of segmentations.
+                                       The polygons of annotation i are polygons seg_offsets[i]:seg_offsets[i+1],
+                                       and the flat [x0, y0, x1, y1, ...] coordinates of polygon j are
+                                       coords[poly_offsets[j]:poly_offsets[j+1]].
+    keypoints_3d, camera: Object arrays for the custom optional fields. None where not specified.
+
+    Use COCO_Annotation_Handler.from_columns to get a handler that can be used just like any other
+    COCO_Annotation_Handler. Its objects are COCO_Annotation_View objects that read and write directly
+    from/to these arrays.
+    Note: All coordinates are stored as float64.
+    """
+    def __init__(
+        self, id: np.ndarray, image_id: np.ndarray, category_id: np.ndarray,
+        bbox: np.ndarray, area: np.ndarray, iscrowd: np.ndarray,
+        num_keypoints: np.ndarray, keypoints: np.ndarray, kpt_count: np.ndarray,
+        seg_offsets: np.ndarray, poly_offsets: np.ndarray, coords: np.ndarray,
+        keypoints_3d: np.ndarray=None, camera: np.ndarray=None
+    ):
+        self.id = id
+        self.image_id = image_id
+        self.category_id = category_id
+        self.bbox = bbox
+        self.area = area
+        self.iscrowd = iscrowd
+        self.num_keypoints = num_keypoints
+        self.keypoints = keypoints
+        self.kpt_count = kpt_count
+        self.seg_offsets = seg_offsets
+        self.poly_offsets = poly_offsets
+        self.coords = coords
+        self.keypoints_3d = keypoints_3d if keypoints_3d is not None else np.full(len(id), None, dtype=object)
+        self.camera = camera if camera is not None else np.full(len(id), None, dtype=object)
+        self._seg_overrides = {} # row -> Segmentation assigned after construction
+        self._index_watchers = None # Shared by the COCO_Annotation_View objects of these columns. Refer to IndexWatcher.
+
+    def __getstate__(self) -> dict:
+        # The handlers that watch these columns don't travel with them.
+        state = self.__dict__.copy()
+        state['_index_watchers'] = None
+        return state
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def __str__(self) -> str:
+        return f'{type(self).__name__}(len={len(self)}, max_num_kpts={self.keypoints.shape[1]}, num_polygons={len(self.poly_offsets)-1})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    def __getitem__(self, idx) -> COCO_Annotation_View:
+        if type(idx) is int or isinstance(idx, np.integer):
+            if idx < 0 or idx >= len(self):
+                logger.error(f"Index out of range: {idx}")
+                raise IndexError
+            return COCO_Annotation_View(columns=self, row=int(idx))
+        else:
+            return self.take(np.arange(len(self))[idx])
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield COCO_Annotation_View(columns=self, row=row)
+
+    @classmethod
+    def empty(cls) -> COCO_Annotation_Columns:
+        return cls.from_dict_list([])
+
+    @classmethod
+    def _from_buffers(
+        cls, id: list, image_id: list, category_id: list, bbox: list, area: list, iscrowd: list,
+        num_keypoints: list, kpt_list: List[np.ndarray], seg_lengths: list, poly_lengths: list, coords: list,
+        keypoints_3d: list, camera: list
+    ) -> COCO_Annotation_Columns:
+        n = len(id)
+        max_num_kpts = max([len(kpts) for kpts in kpt_list]) if n > 0 else 0
+        keypoints = np.zeros((n, max_num_kpts, 3), dtype=np.float64)
+        kpt_count = np.zeros(n, dtype=np.int64)
+        for row, kpts in enumerate(kpt_list):
+            if len(kpts) > 0:
+                keypoints[row, :len(kpts)] = kpts
+                kpt_count[row] = len(kpts)
+        seg_offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.array(seg_lengths, dtype=np.int64), out=seg_offsets[1:])
+        poly_offsets = np.zeros(len(poly_lengths) + 1, dtype=np.int64)
+        np.cumsum(np.array(poly_lengths, dtype=np.int64), out=poly_offsets[1:])
+        extras_3d = np.empty(n, dtype=object)
+        extras_3d[:] = keypoints_3d
+        extras_camera = np.empty(n, dtype=object)
+        extras_camera[:] = camera
+        return COCO_Annotation_Columns(
+            id=np.array(id, dtype=np.int64),
+            image_id=np.array(image_id, dtype=np.int64),
+            category_id=np.array(category_id, dtype=np.int64),
+            bbox=np.array(bbox, dtype=np.float64).reshape(-1, 4),
+            area=np.array([val if val is not None else np.nan for val in area], dtype=np.float64),
+            iscrowd=np.array([val if val is not None else -1 for val in iscrowd], dtype=np.int64),
+            num_keypoints=np.array(num_keypoints, dtype=np.int64),
+            keypoints=keypoints, kpt_count=kpt_count,
+            seg_offsets=seg_offsets, poly_offsets=poly_offsets,
+            coords=np.array(coords, dtype=np.float64),
+            keypoints_3d=extras_3d, camera=extras_camera
+        )
+
+    @classmethod
+    def from_dict_list(cls, dict_list: List[dict], strict: bool=True) -> COCO_Annotation_Columns:
+        """
+        Builds the columns directly from a list of annotation dictionaries (the standard COCO format)
+        without creating any intermediate COCO_Annotation objects.
+        The required keys are the same as in COCO_Annotation.from_dict.
+        """
+        id, image_id, category_id, bbox, area, iscrowd, num_keypoints = [], [], [], [], [], [], []
+        kpt_list, seg_lengths, poly_lengths, coords = [], [], [], []
+        keypoints_3d, camera = [], []
+        required_keys = [
+            'segmentation', 'num_keypoints', 'area',
+            'iscrowd', 'keypoints', 'image_id',
+            'bbox', 'category_id', 'id'
+        ] if strict else ['id', 'category_id', 'image_id']
+        for ann_dict in dict_list:
+            check_required_keys(ann_dict, required_keys=required_keys)
+            id.append(ann_dict['id'])
+            image_id.append(ann_dict['image_id'])
+            category_id.append(ann_dict['category_id'])
+            segmentation = ann_dict['segmentation'] if 'segmentation' in ann_dict else []
+            seg_lengths.append(len(segmentation))
+            for polygon in segmentation:
+                poly_lengths.append(len(polygon))
+                coords.extend(polygon)
+            if 'bbox' in ann_dict:
+                bbox.append(ann_dict['bbox'])
+            elif len(segmentation) > 0:
+                seg_bbox = Segmentation.from_list(segmentation, demarcation=False).to_bbox()
+                bbox.append(seg_bbox.to_list(output_format='pminsize'))
+            else:
+                logger.error(f'A COCO_Annotation needs to be given either a bbox or a non-empty segmentation at the very least to make a valid annotation.')
+                logger.error(f"id: {ann_dict['id']}, category_id: {ann_dict['category_id']}, image_id: {ann_dict['image_id']}")
+                raise Exception
+            area.append(ann_dict['area'] if 'area' in ann_dict else None)
+            iscrowd.append(ann_dict['iscrowd'] if 'iscrowd' in ann_dict else None)
+            kpts = np.array(ann_dict['keypoints'] if 'keypoints' in ann_dict else [], dtype=np.float64).reshape(-1, 3)
+            kpt_list.append(kpts)
+            num_keypoints.append(
+                ann_dict['num_keypoints'] if 'num_keypoints' in ann_dict and ann_dict['num_keypoints'] is not None \
+                    else len(kpts)
+            )
+            keypoints_3d.append(
+                Keypoint3D_List.from_list(ann_dict['keypoints_3d'], demarcation=False) if 'keypoints_3d' in ann_dict else None
+            )
+            camera.append(Camera.from_dict(ann_dict['camera_params']) if 'camera_params' in ann_dict else None)
+        return cls._from_buffers(
+            id=id, image_id=image_id, category_id=category_id, bbox=bbox, area=area, iscrowd=iscrowd,
+            num_keypoints=num_keypoints, kpt_list=kpt_list,
+            seg_lengths=seg_lengths, poly_lengths=poly_lengths, coords=coords,
+            keypoints_3d=keypoints_3d, camera=camera
+        )
+
+    @staticmethod
+    def get_shared_rows(ann_list: List[COCO_Annotation]) -> (COCO_Annotation_Columns, np.ndarray):
+        """
+        If all of the annotations in ann_list are views of the same columns, returns (columns, rows),
+        where rows is the row of each annotation. Otherwise returns None.
+        This allows whole handlers to be processed with numpy when they are backed by columns.
+        """
+        if len(ann_list) == 0 or type(ann_list[0]) is not COCO_Annotation_View:
+            return None
+        columns = ann_list[0]._columns
+        if not all([type(ann) is COCO_Annotation_View and ann._columns is columns for ann in ann_list]):
+            return None
+        return columns, np.array([ann._row for ann in ann_list], dtype=np.int64)
+
+    @classmethod
+    def from_annotations(cls, ann_list: List[COCO_Annotation]) -> COCO_Annotation_Columns:
+        """
+        Builds the columns from a list of COCO_Annotation objects.
+        If all of the annotations are views of the same columns, the rows are gathered with numpy.
+        """
+        shared_rows = cls.get_shared_rows(ann_list)
+        if shared_rows is not None:
+            columns, rows = shared_rows
+            return columns.take(rows)
+        id, image_id, category_id, bbox, area, iscrowd, num_keypoints = [], [], [], [], [], [], []
+        kpt_list, seg_lengths, poly_lengths, coords = [], [], [], []
+        keypoints_3d, camera = [], []
+        for ann in ann_list:
+            id.append(ann.id)
+            image_id.append(ann.image_id)
+            category_id.append(ann.category_id)
+            bbox.append(ann.bbox.to_list(output_format='pminsize'))
+            area.append(ann.area)
+            iscrowd.append(ann.iscrowd)
+            num_keypoints.append(ann.num_keypoints)
+            kpt_list.append(
+                ann.keypoints.to_numpy(demarcation=True).reshape(-1, 3) if len(ann.keypoints) > 0 \
+                    else np.zeros((0, 3), dtype=np.float64)
+            )
+            segmentation = ann.segmentation.to_list(demarcation=False)
+            seg_lengths.append(len(segmentation))
+            for polygon in segmentation:
+                poly_lengths.append(len(polygon))
+                coords.extend(polygon)
+            keypoints_3d.append(ann.keypoints_3d)
+            camera.append(ann.camera)
+        return cls._from_buffers(
+            id=id, image_id=image_id, category_id=category_id, bbox=bbox, area=area, iscrowd=iscrowd,
+            num_keypoints=num_keypoints, kpt_list=kpt_list,
+            seg_lengths=seg_lengths, poly_lengths=poly_lengths, coords=coords,
+            keypoints_3d=keypoints_3d, camera=camera
+        )
+
+    @classmethod
+    def concatenate(cls, columns_list: List[COCO_Annotation_Columns]) -> COCO_Annotation_Columns:
+        """
+        Joins the rows of several columns into new columns, in the given order.
+        Keypoint arrays are zero padded to the largest number of keypoints.
+        """
+        if len(columns_list) == 0:
+            return cls.empty()
+        max_num_kpts = max([columns.keypoints.shape[1] for columns in columns_list])
+        keypoints_list, seg_offsets_list, poly_offsets_list = [], [np.zeros(1, dtype=np.int64)], [np.zeros(1, dtype=np.int64)]
+        num_rows, num_polygons, num_coords = 0, 0, 0
+        seg_overrides = {}
+        for columns in columns_list:
+            keypoints = np.zeros((len(columns), max_num_kpts, 3), dtype=np.float64)
+            keypoints[:, :columns.keypoints.shape[1]] = columns.keypoints
+            keypoints_list.append(keypoints)
+            seg_offsets_list.append(columns.seg_offsets[1:] + num_polygons)
+            poly_offsets_list.append(columns.poly_offsets[1:] + num_coords)
+            for row, segmentation in columns._seg_overrides.items():
+                seg_overrides[row + num_rows] = segmentation
+            num_rows += len(columns)
+            num_polygons += len(columns.poly_offsets) - 1
+            num_coords += len(columns.coords)
+        result = COCO_Annotation_Columns(
+            id=np.concatenate([columns.id for columns in columns_list]),
+            image_id=np.concatenate([columns.image_id for columns in columns_list]),
+            category_id=np.concatenate([columns.category_id for columns in columns_list]),
+            bbox=np.concatenate([columns.bbox for columns in columns_list]),
+            area=np.concatenate([columns.area for columns in columns_list]),
+            iscrowd=np.concatenate([columns.iscrowd for columns in columns_list]),
+            num_keypoints=np.concatenate([columns.num_keypoints for columns in columns_list]),
+            keypoints=np.concatenate(keypoints_list),
+            kpt_count=np.concatenate([columns.kpt_count for columns in columns_list]),
+            seg_offsets=np.concatenate(seg_offsets_list),
+            poly_offsets=np.concatenate(poly_offsets_list),
+            coords=np.concatenate([columns.coords for columns in columns_list]),
+            keypoints_3d=np.concatenate([columns.keypoints_3d for columns in columns_list]),
+            camera=np.concatenate([columns.camera for columns in columns_list])
+        )
+        result._seg_overrides = seg_overrides
+        return result
+
+    def take(self, idx: np.ndarray) -> COCO_Annotation_Columns:
+        """
+        Returns new columns that only contain the given rows (in the given order).
+        idx can be an index array or a boolean mask.
+        """
+        idx = np.asarray(idx)
+        if idx.dtype == bool:
+            idx = np.nonzero(idx)[0]
+        idx = idx.astype(np.int64)
+        seg_offsets, poly_idx = _ragged_take(self.seg_offsets, idx)
+        poly_offsets, coord_idx = _ragged_take(self.poly_offsets, poly_idx)
+        result = COCO_Annotation_Columns(
+            id=self.id[idx], image_id=self.image_id[idx], category_id=self.category_id[idx],
+            bbox=self.bbox[idx], area=self.area[idx], iscrowd=self.iscrowd[idx],
+            num_keypoints=self.num_keypoints[idx], keypoints=self.keypoints[idx], kpt_count=self.kpt_count[idx],
+            seg_offsets=seg_offsets, poly_offsets=poly_offsets, coords=self.coords[coord_idx],
+            keypoints_3d=self.keypoints_3d[idx], camera=self.camera[idx]
+        )
+        if len(self._seg_overrides) > 0:
+            for new_row in np.nonzero(np.isin(idx, list(self._seg_overrides.keys())))[0].tolist():
+                result._seg_overrides[new_row] = self._seg_overrides[int(idx[new_row])]
+        return result
+
+    def get_polygon_coords(self, row: int) -> List[np.ndarray]:
+        """
+        Returns the flat coordinate array of each polygon in the segmentation of the given row.
+        """
+        if row in self._seg_overrides:
+            return [np.array(polygon, dtype=np.float64) for polygon in self._seg_overrides[row].to_list(demarcation=False)]
+        return [
+            self.coords[self.poly_offsets[j]:self.poly_offsets[j+1]]
+            for j in range(self.seg_offsets[row], self.seg_offsets[row+1])
+        ]
+
+    def get_segmentation(self, row: int) -> Segmentation:
+        if row in self._seg_overrides:
+            return self._seg_overrides[row]
+        return Segmentation(
+            polygon_list=[
+                Polygon(points=coords.tolist(), dimensionality=2)
+                for coords in self.get_polygon_coords(row)
+            ]
+        )
+
+    def set_segmentation(self, row: int, segmentation: Segmentation):
+        self._seg_overrides[row] = segmentation
+
+    def num_polygons(self, row: int) -> int:
+        if row in self._seg_overrides:
+            return len(self._seg_overrides[row])
+        return int(self.seg_offsets[row+1] - self.seg_offsets[row])
+
+    def get_bbox(self, row: int) -> BBox:
+        return BBox.from_list(self.bbox[row].tolist(), input_format='pminsize')
+
+    def set_bbox(self, row: int, bbox: BBox):
+        self.bbox[row] = bbox.to_list(output_format='pminsize')
+
+    def get_keypoints_arr(self, row: int) -> np.ndarray:
+        """
+        Returns the (num_kpts, 3) keypoint array of the given row.
+        """
+        return self.keypoints[row, :self.kpt_count[row]]
+
+    def get_keypoints(self, row: int) -> Keypoint2D_List:
+        return Keypoint2D_List.from_numpy(self.get_keypoints_arr(row), demarcation=True)
+
+    def set_keypoints(self, row: int, keypoints: Keypoint2D_List):
+        kpts = keypoints.to_numpy(demarcation=True).reshape(-1, 3) if len(keypoints) > 0 \
+            else np.zeros((0, 3), dtype=np.float64)
+        if len(kpts) > self.keypoints.shape[1]:
+            padded = np.zeros((len(self), len(kpts), 3), dtype=np.float64)
+            padded[:, :self.keypoints.shape[1]] = self.keypoints
+            self.keypoints = padded
+        self.keypoints[row] = 0
+        self.keypoints[row, :len(kpts)] = kpts
+        self.kpt_count[row] = len(kpts)
+
+    def get_annotation(self, row: int) -> COCO_Annotation:
+        """
+        Materializes the given row as a regular COCO_Annotation object.
+        """
+        area = self.area[row]
+        iscrowd = self.iscrowd[row]
+        return COCO_Annotation(
+            id=int(self.id[row]), category_id=int(self.category_id[row]), image_id=int(self.image_id[row]),
+            segmentation=self.get_segmentation(row),
+            bbox=self.get_bbox(row),
+            area=float(area) if not np.isnan(area) else None,
+            keypoints=self.get_keypoints(row),
+            num_keypoints=int(self.num_keypoints[row]),
+            iscrowd=int(iscrowd) if iscrowd != -1 else None,
+            keypoints_3d=self.keypoints_3d[row],
+            camera=self.camera[row]
+        )
+
+    def to_dict(self, row: int, strict: bool=True) -> dict:
+        """
+        Equivalent to self.get_annotation(row).to_dict(strict=strict), but without creating any objects.
+        """
+        area = self.area[row]
+        area = float(area) if not np.isnan(area) else None
+        iscrowd = int(self.iscrowd[row])
+        iscrowd = iscrowd if iscrowd != -1 else None
+        segmentation = [coords.tolist() for coords in self.get_polygon_coords(row)]
+        keypoints = self.get_keypoints_arr(row).reshape(-1).tolist()
+        bbox = self.bbox[row].tolist()
+        if strict:
+            data_dict = {
+                'segmentation': segmentation,
+                'num_keypoints': int(self.num_keypoints[row]),
+                'area': area,
+                'iscrowd': iscrowd,
+                'keypoints': keypoints,
+                'image_id': int(self.image_id[row]),
+                'bbox': bbox,
+                'category_id': int(self.category_id[row]),
+                'id': int(self.id[row])
+            }
+        else:
+            data_dict = {
+                'bbox': bbox,
+                'area': area,
+                'iscrowd': iscrowd,
+                'image_id': int(self.image_id[row]),
+                'category_id': int(self.category_id[row]),
+                'id': int(self.id[row])
+            }
+            if len(segmentation) > 0:
+                data_dict['segmentation'] = segmentation
+            if len(keypoints) > 0:
+                data_dict['keypoints'] = keypoints
+                data_dict['num_keypoints'] = int(self.num_keypoints[row])
+        if self.keypoints_3d[row] is not None:
+            data_dict['keypoints_3d'] = self.keypoints_3d[row].to_list(demarcation=False)
+        if self.camera[row] is not None:
+            data_dict['camera_params'] = self.camera[row].to_dict()
+        return data_dict
+
+    def to_dict_list(self, strict: bool=True) -> List[dict]:
+        return [self.to_dict(row, strict=strict) for row in range(len(self))]
+
+class COCO_Annotation_View(COCO_Annotation_Base):
+    """
+    A lightweight stand-in for a COCO_Annotation that is stored in COCO_Annotation_Columns.
+    Only a reference to the columns and a row number are kept in the object.
+    Every attribute is read from (and written to) the columns when it is accessed.
+
+    Note: Geometry objects (bbox, segmentation, keypoints, etc.) are built on each access.
+          Modifying the returned object in place will not change the columns.
+          Assign a new object instead. (Example: view.bbox = new_bbox)
+    Use copy() to get an independent COCO_Annotation object.
+    """
+    __slots__ = ['_columns', '_row']
+
+    def __init__(self, columns: COCO_Annotation_Columns, row: int):
+        self._columns = columns
+        self._row = row
+
+    @property
+    def _index_watchers(self) -> tuple:
+        # Every view of the same columns reports to the handlers that watch any of them.
+        return self._columns._index_watchers
+
+    @_index_watchers.setter
+    def _index_watchers(self, value: tuple):
+        self._columns._index_watchers = value
+
+    @property
+    def id(self) -> int:
+        return int(self._columns.id[self._row])
+
+    @id.setter
+    def id(self, value: int):
+        self._columns.id[self._row] = value
+        note_attr_write(self, 'id')
+
+    @property
+    def category_id(self) -> int:
+        return int(self._columns.category_id[self._row])
+
+    @category_id.setter
+    def category_id(self, value: int):
+        self._columns.category_id[self._row] = value
+        note_attr_write(self, 'category_id')
+
+    @property
+    def image_id(self) -> int:
+        return int(self._columns.image_id[self._row])
+
+    @image_id.setter
+    def image_id(self, value: int):
+        self._columns.image_id[self._row] = value
+        note_attr_write(self, 'image_id')
+
+    @property
+    def segmentation(self) -> Segmentation:
+        return self._columns.get_segmentation(self._row)
+
+    @segmentation.setter
+    def segmentation(self, value: Segmentation):
+        self._columns.set_segmentation(self._row, value)
+
+    @property
+    def bbox(self) -> BBox:
+        return self._columns.get_bbox(self._row)
+
+    @bbox.setter
+    def bbox(self, value: BBox):
+        self._columns.set_bbox(self._row, value)
+
+    @property
+    def area(self) -> float:
+        area = self._columns.area[self._row]
+        return float(area) if not np.isnan(area) else None
+
+    @area.setter
+    def area(self, value: float):
+        self._columns.area[self._row] = value if value is not None else np.nan
+
+    @property
+    def keypoints(self) -> Keypoint2D_List:
+        return self._columns.get_keypoints(self._row)
+
+    @keypoints.setter
+    def keypoints(self, value: Keypoint2D_List):
+        self._columns.set_keypoints(self._row, value)
+
+    @property
+    def num_keypoints(self) -> int:
+        return int(self._columns.num_keypoints[self._row])
+
+    @num_keypoints.setter
+    def num_keypoints(self, value: int):
+        self._columns.num_keypoints[self._row] = value
+
+    @property
+    def iscrowd(self) -> int:
+        iscrowd = int(self._columns.iscrowd[self._row])
+        return iscrowd if iscrowd != -1 else None
+
+    @iscrowd.setter
+    def iscrowd(self, value: int):
+        self._columns.iscrowd[self._row] = value if value is not None else -1
+
+    @property
+    def keypoints_3d(self) -> Keypoint3D_List:
+        return self._columns.keypoints_3d[self._row]
+
+    @keypoints_3d.setter
+    def keypoints_3d(self, value: Keypoint3D_List):
+        self._columns.keypoints_3d[self._row] = value
+
+    @property
+    def camera(self) -> Camera:
+        return self._columns.camera[self._row]
+
+    @camera.setter
+    def camera(self, value: Camera):
+        self._columns.camera[self._row] = value
+
+    def copy(self) -> COCO_Annotation:
+        return self._columns.get_annotation(self._row)
+
+    def to_dict(self, strict: bool=True) -> dict:
+        return self._columns.to_dict(self._row, strict=strict)
@@ -1,9 +1,13 @@
 from __future__ import annotations
 from typing import List
+import os
 import json
+import itertools
 import cv2
 import numpy as np
 from tqdm import tqdm
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack, closing
 
 from logger import logger
 from streamer.recorder import Recorder
@@ -28,16 +32,51 @@ from common_utils.time_utils import get_ctime
 from common_utils.image_utils import scale_to_max, pad_to_max
 
 from .objects import COCO_Info
+from .columns import COCO_Annotation_Columns
+from .load_cache import COCO_Load_Cache
+from .image_cache import COCO_Image_Cache
+from .merger import COCO_Merger
+from .removal import cascade_remove
+from .query import COCO_Query
 from .handlers import COCO_License_Handler, COCO_Image_Handler, \
     COCO_Annotation_Handler, COCO_Category_Handler, \
     COCO_License, COCO_Image, COCO_Annotation, COCO_Category
 
 from .misc import KeypointGroup
 from ...labelme.structs import LabelmeAnnotationHandler, LabelmeAnnotation, LabelmeShapeHandler, LabelmeShape
-from ..util import COCO_Mapper_Handler
+from ..util import COCO_Mapper_Handler, JSON_Stream_Reader, JSON_Stream_Writer, \
+    transfer_files, TRANSFER_METHODS, hash_file, get_stratified_parts, \
+    get_hash_fraction, get_hash_part, draw_bbox_in_place, draw_keypoints_in_place, \
+    draw_skeleton_in_place, add_contours_to_count, draw_transparent_count_in_place, \
+    prefetch_map
 from ...dataset.config import DatasetConfigCollectionHandler
 from ...ndds.structs import NDDS_Frame_Handler
 
+_visualization_worker_state = {}
+
+def _init_visualization_worker(dataset: COCO_Dataset, preview_kwargs: dict):
+    _visualization_worker_state['dataset'] = dataset
+    _visualization_worker_state['preview_kwargs'] = preview_kwargs
+
+def _encode_visualizations(image_id_list: List[int], extension_list: List[str]) -> List[bytes]:
+    """
+    Renders the visualizations of the given images in a worker process of COCO_Dataset.save_visualization
+    and returns them encoded in the format of each extension.
+    """
+    dataset = _visualization_worker_state['dataset']
+    encoded_img_list = []
+    for image_id, extension in zip(image_id_list, extension_list):
+        img = dataset._get_visualization(
+            dataset.images.get_obj_from_id(image_id),
+            preview_kwargs=_visualization_worker_state['preview_kwargs']
+        )
+        success, encoded_img = cv2.imencode(extension, img)
+        if not success:
+            logger.error(f'Failed to encode the visualization of image_id={image_id} as {extension}')
+            raise Exception
+        encoded_img_list.append(encoded_img.tobytes())
+    return encoded_img_list
+
 class COCO_Dataset:
     """
     This is a class that can be thought of as a COCO dataset manipulation tool.
@@ -163,9 +202,15 @@ class COCO_Dataset:
         }
 
     @classmethod
-    def from_dict(cls, dataset_dict: dict, strict: bool=True) -> COCO_Dataset:
+    def from_dict(cls, dataset_dict: dict, strict: bool=True, columnar: bool=False, lazy: bool=False) -> COCO_Dataset:
         """
         Converts a coco dataset dictionary (the standard COCO format) to a COCO_Dataset class object.
+
+        columnar: If True, the annotations are stored in numpy arrays (COCO_Annotation_Columns) instead of
+                  individual objects. This uses much less memory for large datasets.
+                  Refer to COCO_Annotation_Handler.from_columns.
+        lazy: If True, the segmentation, bbox and keypoints of each annotation are kept as raw lists until
+              they are accessed for the first time. Annotations that are never accessed are saved as they were loaded.
         """
         check_required_keys(
             dataset_dict,
@@ -178,7 +223,7 @@ class COCO_Dataset:
             info=COCO_Info.from_dict(dataset_dict['info']),
             licenses=COCO_License_Handler.from_dict_list(dataset_dict['licenses']),
             images=COCO_Image_Handler.from_dict_list(dataset_dict['images']),
-            annotations=COCO_Annotation_Handler.from_dict_list(dataset_dict['annotations'], strict=strict),
+            annotations=COCO_Annotation_Handler.from_dict_list(dataset_dict['annotations'], strict=strict, columnar=columnar, lazy=lazy),
             categories=COCO_Category_Handler.from_dict_list(dataset_dict['categories'], strict=strict)
         )
 
@@ -203,7 +248,7 @@ class COCO_Dataset:
     def move_images(
         self, dst_img_dir: str,
         preserve_filenames: bool=False, overwrite_duplicates: bool=False, update_img_paths: bool=True, overwrite: bool=False,
-        show_pbar: bool=True
+        show_pbar: bool=True, method: str='copy', workers: int=8
     ):
         """
         Combines all image directories specified in the coco_url of each coco image in self.images
@@ -218,7 +263,12 @@ class COCO_Dataset:
         update_img_paths: If True, all coco_url paths specified in self.images will be updated to reflect the new
                           combined image directory.
         overwrite: If True, all files in dst_img_dir will be deleted before copying images into the folder.
+        method: How each image is put in dst_img_dir. 'copy', 'hardlink', 'symlink' or 'reflink'.
+                Links are nearly instant when dst_img_dir is on the same filesystem as the images.
+                Refer to annotation_utils.coco.util.transfer_file.
+        workers: The number of threads used to transfer the images.
         """
+        check_value(method, valid_value_list=TRANSFER_METHODS)
         used_img_dir_list = []
         for coco_image in self.images:
             used_img_dir = get_dirpath_from_filepath(coco_image.coco_url)
@@ -240,52 +290,142 @@ class COCO_Dataset:
                 logger.error('Please use overwrite=True if you would like to delete the contents before proceeding.')
                 raise Exception
 
-        pbar = tqdm(total=len(self.images), unit='image(s)') if show_pbar else None
-        pbar.set_description(f'Moving Images...')
+        # Since dst_img_dir starts out empty, all destination filenames can be decided up front.
+        dst_img_path_list = []
+        next_number = {} # extension -> next number, the same numbering as get_next_dump_path
         for coco_image in self.images:
             if not preserve_filenames:
                 img_extension = get_extension_from_path(coco_image.coco_url)
-                dst_img_path = get_next_dump_path(
-                    dump_dir=dst_img_dir,
-                    file_extension=img_extension
-                )
-                dst_img_path = rel_to_abs_path(dst_img_path)
+                number = next_number[img_extension] if img_extension in next_number else 0
+                next_number[img_extension] = number + 1
+                dst_img_path = rel_to_abs_path(f'{dst_img_dir}/{str(number).zfill(6)}.{img_extension}')
             else:
                 img_filename = get_filename(coco_image.coco_url)
                 dst_img_path = f'{dst_img_dir}/{img_filename}'
-                if file_exists(dst_img_path) and not overwrite_duplicates:
-                    logger.error(f'Failed to copy {coco_image.coco_url} to {dst_img_dir}')
-                    logger.error(f'{img_filename} already exists in destination directory.')
-                    logger.error(f'Hint: In order to use preserve_filenames=True, all filenames in the dataset must be unique.')
-                    logger.error(
-                        f'Suggestion: Either update the filenames to be unique or use preserve_filenames=False' + \
-                        f' in order to automatically assign the destination filename.'
-                    )
-                    raise Exception
-            copy_file(src_path=coco_image.coco_url, dest_path=dst_img_path, silent=True)
-            if update_img_paths:
+            dst_img_path_list.append(dst_img_path)
+
+        # dst path -> src path. When a filename is used more than once, the last image wins.
+        transfer_dict = {}
+        for coco_image, dst_img_path in zip(self.images, dst_img_path_list):
+            if dst_img_path in transfer_dict and not overwrite_duplicates:
+                img_filename = get_filename(dst_img_path)
+                logger.error(f'Failed to copy {coco_image.coco_url} to {dst_img_dir}')
+                logger.error(f'{img_filename} already exists in destination directory.')
+                logger.error(f'Hint: In order to use preserve_filenames=True, all filenames in the dataset must be unique.')
+                logger.error(
+                    f'Suggestion: Either update the filenames to be unique or use preserve_filenames=False' + \
+                    f' in order to automatically assign the destination filename.'
+                )
+                raise Exception
+            transfer_dict[dst_img_path] = coco_image.coco_url
+        transfer_files(
+            src_path_list=list(transfer_dict.values()), dst_path_list=list(transfer_dict.keys()),
+            method=method, workers=workers, show_pbar=show_pbar, pbar_desc='Moving Images...'
+        )
+        if update_img_paths:
+            for coco_image, dst_img_path in zip(self.images, dst_img_path_list):
                 coco_image.coco_url = dst_img_path
                 coco_image.file_name = get_filename(dst_img_path)
-            if pbar is not None:
-                pbar.update(1)
-        if pbar is not None:
-            pbar.close()
 
-    def save_to_path(self, save_path: str, overwrite: bool=False, strict: bool=True):
+    def save_to_path(
+        self, save_path: str, overwrite: bool=False, strict: bool=True,
+        compact: bool=False, precision: int=None, backend: str='json'
+    ):
         """
         Save this COCO_Dataset object to a json file in the standard COCO format.
+        Each license, image, annotation and category is converted and written to the file one at a time,
+        so the dictionary of the whole dataset is never built.
         
         save_path: Path of where you would like to save the dataset.
         overwrite: If True, any existing file that exists at save_path will be overwritten.
+                   The existing file is only replaced once the new file has been written completely.
+        compact: If True, the json file is written without indentation. This makes the file much smaller.
+        precision: If not None, all float values (coordinates, areas, etc.) are rounded to this many decimal places.
+        backend: 'json', 'orjson' or 'auto'. orjson is much faster, but needs to be installed separately.
+                 'auto' uses orjson only if it is installed. Refer to JSON_Stream_Writer.
         """
         if file_exists(save_path) and not overwrite:
             logger.error(f'File already exists at save_path: {save_path}')
             raise Exception
-        json_dict = self.to_dict(strict=strict)
-        json.dump(json_dict, open(save_path, 'w'), indent=2, ensure_ascii=False)
+        with JSON_Stream_Writer(save_path, compact=compact, precision=precision, backend=backend) as writer:
+            writer.write_item('info', self.info.to_dict())
+            writer.write_list('licenses', (coco_license.to_dict() for coco_license in self.licenses.license_list))
+            writer.write_list('images', (coco_image.to_dict() for coco_image in self.images.image_list))
+            writer.write_list('annotations', (coco_ann.to_dict(strict=strict) for coco_ann in self.annotations.annotation_list))
+            writer.write_list('categories', (coco_cat.to_dict(strict=strict) for coco_cat in self.categories.category_list))
 
     @classmethod
-    def load_from_path(cls, json_path: str, img_dir: str=None, check_paths: bool=True, strict: bool=True) -> COCO_Dataset:
+    def from_stream(cls, json_path: str, strict: bool=True, columnar: bool=False, lazy: bool=False, chunk_size: int=2**20) -> COCO_Dataset:
+        """
+        Loads a COCO_Dataset from a COCO json file without ever loading the whole json dictionary into memory.
+        The file is read in chunks of chunk_size characters, and each license, image, annotation and category
+        is converted to its COCO object as soon as it is parsed.
+
+        columnar, lazy: Refer to COCO_Dataset.from_dict.
+        """
+        info = None
+        license_list, image_list, annotation_list, category_list = [], [], [], []
+        ann_dict_batch, columns_list = [], []
+        reader = JSON_Stream_Reader(json_path, chunk_size=chunk_size)
+        for key, value in reader:
+            if key == 'info':
+                info = COCO_Info.from_dict(value)
+            elif key == 'licenses':
+                license_list.append(COCO_License.from_dict(value))
+            elif key == 'images':
+                image_list.append(COCO_Image.from_dict(value))
+            elif key == 'annotations':
+                if columnar:
+                    ann_dict_batch.append(value)
+                    if len(ann_dict_batch) >= 10000:
+                        columns_list.append(COCO_Annotation_Columns.from_dict_list(ann_dict_batch, strict=strict))
+                        ann_dict_batch = []
+                else:
+                    annotation_list.append(COCO_Annotation.from_dict(value, strict=strict, lazy=lazy))
+            elif key == 'categories':
+                category_list.append(COCO_Category.from_dict(value, strict=strict))
+        check_required_keys(
+            {key: None for key in reader.found_keys},
+            required_keys=[
+                'info', 'licenses', 'images',
+                'annotations', 'categories'
+            ]
+        )
+        if columnar:
+            columns_list.append(COCO_Annotation_Columns.from_dict_list(ann_dict_batch, strict=strict))
+            annotations = COCO_Annotation_Handler.from_columns(COCO_Annotation_Columns.concatenate(columns_list))
+        else:
+            annotations = COCO_Annotation_Handler(annotation_list)
+        return COCO_Dataset(
+            info=info,
+            licenses=COCO_License_Handler(license_list),
+            images=COCO_Image_Handler(image_list),
+            annotations=annotations,
+            categories=COCO_Category_Handler(category_list)
+        )
+
+    @classmethod
+    def iter_annotations_from_path(cls, json_path: str, strict: bool=True, lazy: bool=False, chunk_size: int=2**20):
+        """
+        Yields the annotations of a COCO json file one at a time, without building the dataset.
+        Only one annotation (and one chunk of the file) is held in memory at a time.
+
+            ```python
+            for coco_ann in COCO_Dataset.iter_annotations_from_path('output.json'):
+                ...
+            ```
+
+        lazy: Refer to COCO_Annotation.from_dict.
+        """
+        for ann_dict in JSON_Stream_Reader(json_path, chunk_size=chunk_size).iter_key('annotations'):
+            yield COCO_Annotation.from_dict(ann_dict, strict=strict, lazy=lazy)
+
+    @classmethod
+    def load_from_path(
+        cls, json_path: str, img_dir: str=None, check_paths: bool=True, strict: bool=True,
+        columnar: bool=False, lazy: bool=False, stream: bool=False, cache: COCO_Load_Cache=None,
+        path_check_workers: int=None
+    ) -> COCO_Dataset:
         """
         Loads a COCO_Dataset object from a COCO json file.
 
@@ -295,19 +435,69 @@ class COCO_Dataset:
                  Note: In order to create a dataset that has a unified image directory, use self.move_images
         check_paths: If True, all image paths will be checked as the dataset is loaded.
                      An error will be thrown if the corresponding image files do not exist.
+        columnar: If True, the annotations are stored in numpy arrays instead of individual objects.
+                  Refer to COCO_Dataset.from_dict.
+        lazy: If True, annotation geometry is only built when it is accessed.
+              Refer to COCO_Dataset.from_dict.
+        stream: If True, the json file is parsed incrementally instead of being loaded all at once.
+                Use this for very large files. Refer to COCO_Dataset.from_stream.
+        cache: If a COCO_Load_Cache is given, the dataset is loaded from its binary snapshot of json_path
+               when the snapshot is up to date. Otherwise the json file is parsed (stream is ignored in that case)
+               and a new snapshot is saved for the next load.
+               Loading from a snapshot is fastest with columnar=True, since no annotation objects need to be built.
+        path_check_workers: Number of threads used to check the image paths. Refer to COCO_Dataset.check_img_paths.
         """
         check_file_exists(json_path)
-        json_dict = json.load(open(json_path, 'r'))
-        dataset = COCO_Dataset.from_dict(json_dict, strict=strict)
+        cached = cache.load(json_path, strict=strict, columnar=columnar, lazy=lazy) if cache is not None else None
+        if cached is not None:
+            meta, image_list, cached_annotations = cached
+            if columnar:
+                annotations = COCO_Annotation_Handler.from_columns(cached_annotations)
+            else:
+                annotations = COCO_Annotation_Handler(cached_annotations)
+            dataset = COCO_Dataset(
+                info=COCO_Info.from_dict(meta['info']),
+                licenses=COCO_License_Handler.from_dict_list(meta['licenses']),
+                images=COCO_Image_Handler(image_list),
+                annotations=annotations,
+                categories=COCO_Category_Handler.from_dict_list(meta['categories'], strict=strict)
+            )
+        elif cache is not None:
+            json_dict = json.load(open(json_path, 'r'))
+            dataset = COCO_Dataset.from_dict(json_dict, strict=strict, columnar=columnar, lazy=lazy)
+            cache.save(json_path, json_dict, strict=strict)
+        elif stream:
+            dataset = COCO_Dataset.from_stream(json_path, strict=strict, columnar=columnar, lazy=lazy)
+        else:
+            json_dict = json.load(open(json_path, 'r'))
+            dataset = COCO_Dataset.from_dict(json_dict, strict=strict, columnar=columnar, lazy=lazy)
         if img_dir is not None:
             check_dir_exists(img_dir)
             for coco_image in dataset.images:
                 coco_image.coco_url = f'{img_dir}/{coco_image.file_name}'
         if check_paths:
-            for coco_image in dataset.images:
-                check_file_exists(coco_image.coco_url)
+            dataset.check_img_paths(workers=path_check_workers)
         return dataset
 
+    def check_img_paths(self, workers: int=None):
+        """
+        Checks that the image file of every image in the dataset exists.
+        An error is thrown for the first image (in dataset order) whose file cannot be found.
+
+        workers: If not None, the files are checked concurrently using this many threads.
+                 This is much faster when the images are on a network drive.
+        """
+        coco_url_list = [coco_image.coco_url for coco_image in self.images]
+        if workers is None:
+            for coco_url in coco_url_list:
+                check_file_exists(coco_url)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                exists_list = list(executor.map(file_exists, coco_url_list))
+            for coco_url, exists in zip(coco_url_list, exists_list):
+                if not exists:
+                    check_file_exists(coco_url)
+
     def to_labelme(self, priority: str='seg') -> LabelmeAnnotationHandler:
         """
         Convert a COCO_Dataset object to a LabelmeAnnotationHandler.
@@ -652,13 +842,18 @@ class COCO_Dataset:
                 check_file_exists(coco_image.coco_url)
 
     @classmethod
-    def combine(cls, dataset_list: List[COCO_Dataset], img_dir_list: List[str]=None, show_pbar: bool=False) -> COCO_Dataset:
+    def combine(
+        cls, dataset_list: List[COCO_Dataset], img_dir_list: List[str]=None, show_pbar: bool=False,
+        check_paths: bool=True
+    ) -> COCO_Dataset:
         """
         Combines a list of COCO_Dataset's into a single COCO_Dataset.
 
         dataset_list: A list of all of the COCO_Dataset objects that you would like to combine.
         img_dir_list: A list of all of the image directory paths that correspond to each COCO_Dataset in dataset_list.
         show_pbar: If True, a progress bar will be shown while the datasets are combined.
+        check_paths: If True, an error is thrown if the image file of any image cannot be found.
+                     This can be turned off when the paths were already checked while loading the datasets.
         """
         if img_dir_list is not None:
             if len(img_dir_list) != len(dataset_list):
@@ -666,7 +861,7 @@ class COCO_Dataset:
                 raise Exception
             update_img_pbar = tqdm(total=len(img_dir_list), unit='dataset(s)') if show_pbar else None
             if update_img_pbar is not None:
-                pbar.set_description(f'Updating Image Paths...')
+                update_img_pbar.set_description(f'Updating Image Paths...')
             for img_dir, dataset in zip(img_dir_list, dataset_list):
                 dataset = COCO_Dataset.buffer(dataset)
                 dataset.update_img_dir(new_img_dir=img_dir, check_paths=True)
@@ -678,98 +873,252 @@ class COCO_Dataset:
         result_dataset = COCO_Dataset.new(
             description='A combination of many COCO datasets using annotation_utils'
         )
-        map_handler = COCO_Mapper_Handler()
+        merger = COCO_Merger()
         merge_pbar = tqdm(total=len(dataset_list), unit='dataset(s)') if show_pbar else None
         if merge_pbar is not None:
             merge_pbar.set_description(f'Merging Datasets...')
         for i, dataset in enumerate(dataset_list):
-            # Process Licenses
-            for coco_license in dataset.licenses:
-                already_exists = False
-                for existing_license in result_dataset.licenses:
-                    if coco_license.is_equal_to(existing_license, exclude_id=True):
-                        already_exists = True
-                        map_handler.license_mapper.add(
-                            unique_key=i, old_id=coco_license.id, new_id=existing_license.id
-                        )
-                        break
-                if not already_exists:
-                    new_license = coco_license.copy()
-                    new_license.id = len(result_dataset.licenses)
-                    map_handler.license_mapper.add(
-                        unique_key=i, old_id=coco_license.id, new_id=new_license.id
-                    )
-                    result_dataset.licenses.append(new_license)
-
-            # Process Images
-            for coco_image in dataset.images:
-                check_file_exists(coco_image.coco_url)
-                already_exists = False
-                for existing_image in result_dataset.images:
-                    if coco_image.is_equal_to(existing_image, exclude_id=True):
-                        already_exists = True
-                        map_handler.image_mapper.add(
-                            unique_key=i, old_id=coco_image.id, new_id=existing_image.id
-                        )
-                        break
-                if not already_exists:
-                    new_image = coco_image.copy()
-                    new_image.id = len(result_dataset.images)
-                    map_handler.image_mapper.add(
-                        unique_key=i, old_id=coco_image.id, new_id=new_image.id
-                    )
-                    found, new_image.license_id = map_handler.license_mapper.get_new_id(
-                        unique_key=i, old_id=coco_image.license_id
-                    )
-                    if not found:
-                        logger.error(f"Couldn't find license map using unique_key={i}, old_id={coco_image.license_id}")
-                        raise Exception
-                    result_dataset.images.append(new_image)
-
-            # Process Categories
-            for coco_category in dataset.categories:
-                already_exists = False
-                for existing_category in result_dataset.categories:
-                    if coco_category.is_equal_to(existing_category, exclude_id=True):
-                        already_exists = True
-                        map_handler.category_mapper.add(
-                            unique_key=i, old_id=coco_category.id, new_id=existing_category.id
-                        )
-                        break
-                if not already_exists:
-                    new_category = coco_category.copy()
-                    new_category.id = len(result_dataset.categories)
-                    map_handler.category_mapper.add(
-                        unique_key=i, old_id=coco_category.id, new_id=new_category.id
-                    )
-                    result_dataset.categories.append(new_category)
-
-            # Process Annotations
-            for coco_ann in dataset.annotations:
-                new_ann = coco_ann.copy()
-                new_ann.id = len(result_dataset.annotations)
-                found, new_ann.image_id = map_handler.image_mapper.get_new_id(
-                    unique_key=i, old_id=coco_ann.image_id
-                )
-                if not found:
-                    logger.error(f"Couldn't find image map using unique_key={i}, old_id={coco_ann.image_id}")
-                    raise Exception
-                found, new_ann.category_id = map_handler.category_mapper.get_new_id(
-                    unique_key=i, old_id=coco_ann.category_id
-                )
-                if not found:
-                    logger.error(f"Couldn't find category map using unique_key={i}, old_id={coco_ann.category_id}")
-                    raise Exception
+            new_image_list, new_ann_list = merger.merge(dataset, unique_key=i, check_paths=check_paths)
+            for new_image in new_image_list:
+                result_dataset.images.append(new_image)
+            for new_ann in new_ann_list:
                 result_dataset.annotations.append(new_ann)
             if merge_pbar is not None:
                 merge_pbar.update(1)
         if merge_pbar is not None:
             merge_pbar.close()
+        result_dataset.licenses = merger.licenses
+        result_dataset.categories = merger.categories
 
         return result_dataset
 
     @classmethod
-    def combine_from_config(cls, config_path: str, img_sort_attr_name: str=None, show_pbar: bool=False) -> COCO_Dataset:
+    def _merge_to_lines(
+        cls, merger: COCO_Merger, json_path_list: List[str], unique_key_list: list,
+        img_lines_path: str, ann_lines_path: str, img_dir_list: List[str]=None,
+        img_sort_attr_name: str=None, check_paths: bool=True, path_check_workers: int=None,
+        strict: bool=True, show_pbar: bool=False
+    ):
+        """
+        Loads and merges the given json files one at a time.
+        The new images and annotations are appended to img_lines_path and ann_lines_path as json lines.
+        """
+        if img_dir_list is not None and len(img_dir_list) != len(json_path_list):
+            logger.error(f'len(img_dir_list) == {len(img_dir_list)} != {len(json_path_list)} == len(json_path_list)')
+            raise Exception
+        pbar = tqdm(total=len(json_path_list), unit='dataset(s)') if show_pbar else None
+        if pbar is not None:
+            pbar.set_description(f'Merging Datasets...')
+        with open(img_lines_path, 'a', encoding='utf-8') as img_lines, \
+            open(ann_lines_path, 'a', encoding='utf-8') as ann_lines:
+            for i, json_path in enumerate(json_path_list):
+                dataset = COCO_Dataset.load_from_path(
+                    json_path=json_path, img_dir=img_dir_list[i] if img_dir_list is not None else None,
+                    check_paths=check_paths, strict=strict, path_check_workers=path_check_workers
+                )
+                if img_sort_attr_name is not None:
+                    dataset.images.sort(attr_name=img_sort_attr_name)
+                new_image_list, new_ann_list = merger.merge(dataset, unique_key=unique_key_list[i], check_paths=False)
+                for new_image in new_image_list:
+                    img_lines.write(json.dumps(new_image.to_dict(), ensure_ascii=False) + '\n')
+                for new_ann in new_ann_list:
+                    ann_lines.write(json.dumps(new_ann.to_dict(strict=strict), ensure_ascii=False) + '\n')
+                del dataset, new_image_list, new_ann_list
+                if pbar is not None:
+                    pbar.update(1)
+        if pbar is not None:
+            pbar.close()
+
+    @classmethod
+    def _save_merged(
+        cls, merger: COCO_Merger, img_lines_path: str, ann_lines_path: str, save_path: str,
+        strict: bool=True, compact: bool=False, precision: int=None, backend: str='json'
+    ):
+        """
+        Writes the dataset that was merged with _merge_to_lines to save_path.
+        """
+        # The json lines are already compact json, so they can be copied without being parsed again.
+        copy_lines = compact and precision is None
+        with JSON_Stream_Writer(save_path, compact=compact, precision=precision, backend=backend) as writer, \
+            open(img_lines_path, 'r', encoding='utf-8') as img_lines, \
+            open(ann_lines_path, 'r', encoding='utf-8') as ann_lines:
+            writer.write_item('info', COCO_Info(description='A combination of many COCO datasets using annotation_utils').to_dict())
+            writer.write_list('licenses', (coco_license.to_dict() for coco_license in merger.licenses))
+            for key, lines in [('images', img_lines), ('annotations', ann_lines)]:
+                if copy_lines:
+                    writer.write_serialized_list(key, (line.rstrip('\n') for line in lines))
+                else:
+                    writer.write_list(key, (json.loads(line) for line in lines))
+            writer.write_list('categories', (coco_cat.to_dict(strict=strict) for coco_cat in merger.categories))
+
+    @classmethod
+    def combine_to_path(
+        cls, json_path_list: List[str], save_path: str, img_dir_list: List[str]=None,
+        img_sort_attr_name: str=None, check_paths: bool=True, path_check_workers: int=None,
+        overwrite: bool=False, show_pbar: bool=False, strict: bool=True,
+        compact: bool=False, precision: int=None, backend: str='json'
+    ):
+        """
+        Out-of-core version of COCO_Dataset.combine.
+        The datasets are loaded and merged one at a time, and their remapped images and annotations
+        are written out right away, so only one input dataset is held in memory at a time.
+        The saved dataset is the same as the one that COCO_Dataset.combine would return.
+
+        json_path_list: The paths of the coco json files that you would like to combine.
+        save_path: Where the combined dataset is saved.
+        img_dir_list: If not None, the image directory of each json file in json_path_list.
+        img_sort_attr_name: If not None, the images of each dataset are sorted by this attribute before they are merged.
+        check_paths: If True, an error is thrown if the image file of any image cannot be found.
+        path_check_workers: Number of threads used to check the image paths. Refer to COCO_Dataset.check_img_paths.
+        overwrite: If True, any existing file that exists at save_path will be overwritten.
+        compact, precision, backend: Refer to COCO_Dataset.save_to_path.
+        """
+        if file_exists(save_path) and not overwrite:
+            logger.error(f'File already exists at save_path: {save_path}')
+            raise Exception
+        merger = COCO_Merger(keep_id_maps=False)
+        # The images and annotations are buffered on disk as json lines,
+        # since the licenses and categories that come before them in the file aren't known until the end.
+        img_lines_path, ann_lines_path = f'{save_path}.images.tmp', f'{save_path}.annotations.tmp'
+        try:
+            for lines_path in [img_lines_path, ann_lines_path]:
+                open(lines_path, 'w').close()
+            COCO_Dataset._merge_to_lines(
+                merger, json_path_list=json_path_list, unique_key_list=list(range(len(json_path_list))),
+                img_lines_path=img_lines_path, ann_lines_path=ann_lines_path, img_dir_list=img_dir_list,
+                img_sort_attr_name=img_sort_attr_name, check_paths=check_paths, path_check_workers=path_check_workers,
+                strict=strict, show_pbar=show_pbar
+            )
+            COCO_Dataset._save_merged(
+                merger, img_lines_path=img_lines_path, ann_lines_path=ann_lines_path, save_path=save_path,
+                strict=strict, compact=compact, precision=precision, backend=backend
+            )
+        finally:
+            for lines_path in [img_lines_path, ann_lines_path]:
+                if file_exists(lines_path):
+                    os.remove(lines_path)
+
+    @classmethod
+    def combine_incremental(
+        cls, json_path_list: List[str], save_path: str, img_dir_list: List[str]=None, state_dir: str=None,
+        img_sort_attr_name: str=None, check_paths: bool=True, path_check_workers: int=None,
+        overwrite: bool=False, show_pbar: bool=False, strict: bool=True,
+        compact: bool=False, precision: int=None, backend: str='json'
+    ):
+        """
+        Combines datasets into save_path, remembering what has already been merged so that later calls
+        only need to merge the new datasets.
+        The merge state (the COCO_Merger id maps and dedup indexes, as a log of what each call added)
+        and the merged images and annotations are kept in state_dir. Json files in json_path_list that were merged in a previous call
+        (identified by their absolute path) are skipped, so the same growing list of paths can be passed every time.
+        The result is the same as combining all of the json files at once, in the order that they were first merged.
+
+            ```python
+            # Day 1
+            COCO_Dataset.combine_incremental(['day1.json'], save_path='merged.json')
+            # Day 2: Only day2.json is loaded and merged.
+            COCO_Dataset.combine_incremental(['day1.json', 'day2.json'], save_path='merged.json')
+            ```
+
+        state_dir: Where the merge state is kept. Defaults to <save_path>.merge_state
+        overwrite: If True, save_path may be overwritten when there is no merge state yet.
+                   (save_path is always rewritten once a merge state exists.)
+        Refer to COCO_Dataset.combine_to_path for the other parameters.
+        Note: Since the whole file is rewritten, the images and annotations are still copied from state_dir
+              on every call. Only the loading and merging is limited to the new datasets.
+        """
+        state_dir = state_dir if state_dir is not None else f'{save_path}.merge_state'
+        state_path = f'{state_dir}/state.json'
+        # The merger state is an append-only log with one line per call that merged something,
+        # so each call only writes what it merged itself.
+        merger_log_path = f'{state_dir}/merger.jsonl'
+        img_lines_path, ann_lines_path = f'{state_dir}/images.jsonl', f'{state_dir}/annotations.jsonl'
+        log_paths = [
+            (merger_log_path, 'merger_log_size'), (img_lines_path, 'img_lines_size'), (ann_lines_path, 'ann_lines_size')
+        ]
+        if file_exists(state_path):
+            state = json.load(open(state_path, 'r'))
+            # Drop anything that was appended after the state was last saved (e.g. by an interrupted call).
+            for lines_path, size_key in log_paths:
+                if not file_exists(lines_path):
+                    logger.error(f'The merge state at {state_dir} is broken: {lines_path} is missing.')
+                    raise Exception
+                if os.path.getsize(lines_path) < state[size_key]:
+                    logger.error(f'The merge state at {state_dir} is broken: {lines_path} is smaller than the {state[size_key]} bytes that were saved.')
+                    raise Exception
+                with open(lines_path, 'r+b') as f:
+                    f.truncate(state[size_key])
+            merger = COCO_Merger(keep_id_maps=state['keep_id_maps'])
+            with open(merger_log_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    merger.update_from_dict(json.loads(line))
+            # False if the last call was interrupted before save_path was written.
+            saved = state['saved']
+        else:
+            if file_exists(save_path) and not overwrite:
+                logger.error(f'File already exists at save_path: {save_path}')
+                logger.error(f'There is no merge state at {state_dir}, so it cannot be appended to.')
+                raise Exception
+            make_dir_if_not_exists(state_dir)
+            merger = COCO_Merger()
+            saved = False
+            for lines_path, _ in log_paths:
+                open(lines_path, 'w').close()
+
+        new_json_path_list, new_img_dir_list = [], []
+        for i, json_path in enumerate(json_path_list):
+            if os.path.abspath(json_path) in merger.merged_keys:
+                continue
+            new_json_path_list.append(json_path)
+            new_img_dir_list.append(img_dir_list[i] if img_dir_list is not None else None)
+        if len(new_json_path_list) == 0 and saved and file_exists(save_path):
+            logger.info(f'All datasets have already been merged into {save_path}')
+            return
+        checkpoint = merger.get_checkpoint()
+        COCO_Dataset._merge_to_lines(
+            merger, json_path_list=new_json_path_list,
+            unique_key_list=[os.path.abspath(json_path) for json_path in new_json_path_list],
+            img_lines_path=img_lines_path, ann_lines_path=ann_lines_path, img_dir_list=new_img_dir_list,
+            img_sort_attr_name=img_sort_attr_name, check_paths=check_paths, path_check_workers=path_check_workers,
+            strict=strict, show_pbar=show_pbar
+        )
+        if len(new_json_path_list) > 0:
+            with open(merger_log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(merger.to_dict(since=checkpoint), ensure_ascii=False) + '\n')
+        state = {'keep_id_maps': merger.keep_id_maps, 'saved': False}
+        for lines_path, size_key in log_paths:
+            state[size_key] = os.path.getsize(lines_path)
+        COCO_Dataset._save_merge_state(state, state_path)
+        # save_path is only replaced once it has been written completely.
+        COCO_Dataset._save_merged(
+            merger, img_lines_path=img_lines_path, ann_lines_path=ann_lines_path, save_path=save_path,
+            strict=strict, compact=compact, precision=precision, backend=backend
+        )
+        state['saved'] = True
+        COCO_Dataset._save_merge_state(state, state_path)
+
+    @staticmethod
+    def _save_merge_state(state: dict, state_path: str):
+        with open(f'{state_path}.tmp', 'w') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(f'{state_path}.tmp', state_path)
+
+    @classmethod
+    def _load_for_combine(
+        cls, ann_path: str, img_dir: str, img_sort_attr_name: str=None, path_check_workers: int=None
+    ) -> COCO_Dataset:
+        dataset = COCO_Dataset.load_from_path(
+            json_path=ann_path, img_dir=img_dir, check_paths=True, path_check_workers=path_check_workers
+        )
+        if img_sort_attr_name is not None:
+            dataset.images.sort(attr_name=img_sort_attr_name)
+        return dataset
+
+    @classmethod
+    def combine_from_config(
+        cls, config_path: str, img_sort_attr_name: str=None, show_pbar: bool=False,
+        workers: int=None, path_check_workers: int=8
+    ) -> COCO_Dataset:
         """
         This is the same as COCO_Dataset.combine, but with this method you don't have to construct each dataset manually.
         Instead, you can just provide a dataset configuration file that specifies the location of all of your coco json files
@@ -780,6 +1129,10 @@ class COCO_Dataset:
         img_sort_attr_name: The attribute name that you would like to sort the dataset images by before the datasets are combined.
                             (Example: img_sort_attr_name='file_name')
         show_pbar: If True, a progress bar will be shown while the images and annotations are loaded into the dataset.
+        workers: If not None, the datasets are loaded in parallel using a pool of this many processes.
+                 The datasets are always combined in the order of the configuration file,
+                 so the result is the same as when they are loaded one at a time.
+        path_check_workers: Number of threads used to check the image paths of each dataset while it is loaded.
         """
 
         dataset_path_config = DatasetConfigCollectionHandler.load_from_path(config_path)
@@ -795,48 +1148,80 @@ class COCO_Dataset:
         pbar = tqdm(total=len(config_list), unit='dataset(s)') if show_pbar else None
         if pbar is not None:
             pbar.set_description(f'Loading Dataset List...')
-        # for img_dir, ann_path in zip(img_dir_list, ann_path_list):
-        for config in config_list:
-            # dataset = COCO_Dataset.load_from_path(json_path=ann_path, img_dir=img_dir, check_paths=True)
-            dataset = COCO_Dataset.load_from_path(json_path=config.ann_path, img_dir=config.img_dir, check_paths=True)
-            if img_sort_attr_name is not None:
-                dataset.images.sort(attr_name=img_sort_attr_name)
-            dataset_list.append(dataset)
-            if pbar is not None:
-                pbar.update(1)
+        if workers is None:
+            # for img_dir, ann_path in zip(img_dir_list, ann_path_list):
+            for config in config_list:
+                # dataset = COCO_Dataset.load_from_path(json_path=ann_path, img_dir=img_dir, check_paths=True)
+                dataset = COCO_Dataset._load_for_combine(
+                    ann_path=config.ann_path, img_dir=config.img_dir, img_sort_attr_name=img_sort_attr_name,
+                    path_check_workers=path_check_workers
+                )
+                dataset_list.append(dataset)
+                if pbar is not None:
+                    pbar.update(1)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # executor.map returns the results in the same order as config_list.
+                for dataset in executor.map(
+                    COCO_Dataset._load_for_combine,
+                    [config.ann_path for config in config_list],
+                    [config.img_dir for config in config_list],
+                    [img_sort_attr_name] * len(config_list),
+                    [path_check_workers] * len(config_list)
+                ):
+                    dataset_list.append(dataset)
+                    if pbar is not None:
+                        pbar.update(1)
         if pbar is not None:
             pbar.close()
-        return COCO_Dataset.combine(dataset_list, show_pbar=show_pbar)
+        # The image paths were already checked while loading.
+        return COCO_Dataset.combine(dataset_list, show_pbar=show_pbar, check_paths=False)
 
-    def split(
-        self, dest_dir: str,
-        split_dirname_list: List[str]=['train', 'test', 'val'], ratio: list=[2, 1, 0], coco_filename_list: List[str]=None,
-        shuffle: bool=True, preserve_filenames: bool=False, overwrite: bool=False
-    ) -> List[COCO_Dataset]:
+    @classmethod
+    def combine_from_config_to_path(
+        cls, config_path: str, save_path: str, img_sort_attr_name: str=None, show_pbar: bool=False,
+        overwrite: bool=False, path_check_workers: int=8, **kwargs
+    ):
         """
-        Use this method to split a single coco dataset into multiple datasets.
-        This can be useful for when you need to split a single coco dataset into train, test, and validation datasets.
-
-        dest_dir: Path to the folder where you would like to save the split datasets.
-        split_dirname_list: Specify the folder names of each split dataset part that you would like to generate.
-                            These folders are created in the folder specified by dest_dir.
-                            For example, if you want to split your dataset into a train dataset and validation dataset,
-                            use split_dirname_list=['train', 'val']
-        ratio: Specify the ratio of images between each split dataset part.
-               For example, if you would like to have twice as many train images as validation images, use ratio=[2, 1].
-        coco_filename_list: Specify the filenames of the coco annotation file of each split dataset part.
-                            Example: ['train.json', 'val.json']
-        shuffle: If True, the images handler will be shuffled before splitting the dataset into parts.
-        preserve_filenames: If True, the image filenames will be preserved during the split.
-                            However, if a filename conflict is encountered as a result, an error will be thrown.
-                            If False, the image filenames of each dataset part will be automatically generated
-                            so as to avoid filename conflicts.
-        overwrite: If True, the contents of dest_dir will be deleted before creating a new split dataset folder.
-                   If False, an error will be thrown if dest_dir contains any files or directories.
+        Out-of-core version of COCO_Dataset.combine_from_config.
+        The combined dataset is written to save_path without holding all of the datasets in memory.
+        Refer to COCO_Dataset.combine_to_path. Any other keyword arguments are passed on to it.
         """
+        dataset_path_config = DatasetConfigCollectionHandler.load_from_path(config_path)
+        config_list = []
+        for collection in dataset_path_config:
+            for config in collection:
+                check_value(config.ann_format, valid_value_list=['coco'])
+                config_list.append(config)
+        COCO_Dataset.combine_to_path(
+            json_path_list=[config.ann_path for config in config_list],
+            save_path=save_path,
+            img_dir_list=[config.img_dir for config in config_list],
+            img_sort_attr_name=img_sort_attr_name, path_check_workers=path_check_workers,
+            overwrite=overwrite, show_pbar=show_pbar, **kwargs
+        )
 
-        # Checks
-        check_type_from_list([split_dirname_list, ratio, coco_filename_list], valid_type_list=[list])
+    @staticmethod
+    def _get_split_hash_key(coco_image: COCO_Image, hash_key: str) -> str:
+        if hash_key == 'content':
+            check_file_exists(coco_image.coco_url)
+            return hash_file(coco_image.coco_url)
+        elif not hasattr(coco_image, hash_key):
+            logger.error(f"COCO_Image has no attribute '{hash_key}'")
+            logger.error(f"Use the name of a COCO_Image attribute or 'content' for hash_key.")
+            raise Exception
+        return str(getattr(coco_image, hash_key))
+
+    @staticmethod
+    def _prepare_split_dirs(
+        dest_dir: str, split_dirname_list: List[str], ratio: list, coco_filename_list: List[str]=None,
+        overwrite: bool=False
+    ) -> (List[str], List[str], List[str], List[str]):
+        """
+        Checks the arguments of split and creates the folder of each part.
+        Returns (coco_filename_list, split_dirpath_list, split_imgdir_list, split_cocopath_list)
+        """
+        check_type_from_list([split_dirname_list, ratio], valid_type_list=[list])
         if len(split_dirname_list) != len(ratio):
             logger.error(f'len(split_dirname_list) == {len(split_dirname_list)} != {len(ratio)} == len(ratio)')
             raise Exception
@@ -845,6 +1230,7 @@ class COCO_Dataset:
         if coco_filename_list is None:
             coco_filename_list = ['output.json'] * len(split_dirname_list)
         else:
+            check_type(coco_filename_list, valid_type_list=[list])
             check_type_from_list(coco_filename_list, valid_type_list=[str])
             if len(coco_filename_list) != len(split_dirname_list):
                 logger.error(f'len(coco_filename_list) == {len(coco_filename_list)} != {len(split_dirname_list)} == len(split_dirname_list)')
@@ -867,57 +1253,151 @@ class COCO_Dataset:
                     raise Exception
             make_dir_if_not_exists(split_imgdir)
             make_dir_if_not_exists(split_cocodir)
-            
+
+        return coco_filename_list, split_dirpath_list, split_imgdir_list, split_cocopath_list
+
+    def split(
+        self, dest_dir: str,
+        split_dirname_list: List[str]=['train', 'test', 'val'], ratio: list=[2, 1, 0], coco_filename_list: List[str]=None,
+        shuffle: bool=True, preserve_filenames: bool=False, overwrite: bool=False,
+        method: str='copy', workers: int=8, strategy: str='random', seed: int=None, hash_key: str='file_name'
+    ) -> List[COCO_Dataset]:
+        """
+        Use this method to split a single coco dataset into multiple datasets.
+        This can be useful for when you need to split a single coco dataset into train, test, and validation datasets.
+
+        dest_dir: Path to the folder where you would like to save the split datasets.
+        split_dirname_list: Specify the folder names of each split dataset part that you would like to generate.
+                            These folders are created in the folder specified by dest_dir.
+                            For example, if you want to split your dataset into a train dataset and validation dataset,
+                            use split_dirname_list=['train', 'val']
+        ratio: Specify the ratio of images between each split dataset part.
+               For example, if you would like to have twice as many train images as validation images, use ratio=[2, 1].
+        coco_filename_list: Specify the filenames of the coco annotation file of each split dataset part.
+                            Example: ['train.json', 'val.json']
+        shuffle: If True, the images handler will be shuffled before splitting the dataset into parts.
+        preserve_filenames: If True, the image filenames will be preserved during the split.
+                            However, if a filename conflict is encountered as a result, an error will be thrown.
+                            If False, the image filenames of each dataset part will be automatically generated
+                            so as to avoid filename conflicts.
+        overwrite: If True, the contents of dest_dir will be deleted before creating a new split dataset folder.
+                   If False, an error will be thrown if dest_dir contains any files or directories.
+        method: How the images of each part are put in its img folder.
+                'copy', 'hardlink', 'symlink' or 'reflink': Refer to annotation_utils.coco.util.transfer_file.
+                'manifest': No image files are written. The images of each part keep pointing to the original files,
+                            and the planned destination of each image is written to img_manifest.json
+                            in the part's folder, so that the images can be transferred later.
+        workers: The number of threads used to transfer the images.
+        strategy: How the images are divided between the parts.
+                  'random': The images are cut into parts in order, after shuffling them if shuffle=True.
+                  'stratified': The images are divided so that the annotations of every category are split
+                                according to ratio as well. Useful when some categories are rare.
+                                Refer to annotation_utils.coco.util.get_stratified_parts
+                  'hash': Each image is assigned to a part using the hash of hash_key.
+                          An image always ends up in the same part, even after more images are added to the dataset.
+                          Refer to annotation_utils.coco.util.get_hash_part
+        seed: Random seed used by strategy='stratified'. The same seed always results in the same split.
+              With strategy='hash', a different seed gives a different (but still fixed) assignment.
+        hash_key: What is hashed when strategy='hash'.
+                  Either the name of a COCO_Image attribute (e.g. 'file_name') or 'content' for the image file's content.
+        """
+
+        # Checks
+        check_value(method, valid_value_list=TRANSFER_METHODS + ['manifest'])
+        check_value(strategy, valid_value_list=['random', 'stratified', 'hash'])
+        coco_filename_list, split_dirpath_list, split_imgdir_list, split_cocopath_list = \
+            self._prepare_split_dirs(
+                dest_dir=dest_dir, split_dirname_list=split_dirname_list, ratio=ratio,
+                coco_filename_list=coco_filename_list, overwrite=overwrite
+            )
 
         # Split COCO Images Into Samples
-        locations = np.cumsum([val*int(len(self.images)/sum(ratio)) for val in ratio]) - 1
-        start_location = None
-        end_location = 0
-        count = 0
-        coco_image_samples = []
-        if shuffle:
-            self.images.shuffle()
-        while count < len(locations):
-            start_location = end_location
-            end_location = locations[count]
-            count += 1
-            coco_image_samples.append(self.images[start_location:end_location].copy())
+        if strategy == 'stratified':
+            img_id2idx = {coco_image.id: idx for idx, coco_image in enumerate(self.images)}
+            cat_id2idx = {coco_cat.id: idx for idx, coco_cat in enumerate(self.categories)}
+            ann_pairs = [
+                [img_id2idx[coco_ann.image_id], cat_id2idx[coco_ann.category_id]]
+                for coco_ann in self.annotations
+                if coco_ann.image_id in img_id2idx and coco_ann.category_id in cat_id2idx
+            ]
+            ann_pairs = np.array(ann_pairs, dtype=np.int64).reshape(-1, 2)
+            part_idx, priority = get_stratified_parts(
+                ann_img_idx=ann_pairs[:, 0], ann_cat_idx=ann_pairs[:, 1],
+                num_images=len(self.images), num_categories=len(self.categories),
+                ratio=ratio, seed=seed
+            )
+            img_order = priority if shuffle else np.arange(len(self.images))
+            coco_image_samples = [
+                [self.images[idx] for idx in img_order[part_idx[img_order] == i].tolist()]
+                for i in range(len(ratio))
+            ]
+        elif strategy == 'hash':
+            salt = str(seed) if seed is not None else None
+            hash_key_list = [self._get_split_hash_key(coco_image, hash_key) for coco_image in self.images]
+            img_order = list(range(len(self.images)))
+            if shuffle:
+                # Ordered by hash, so that the order is also the same every time.
+                img_order.sort(key=lambda idx: get_hash_fraction(hash_key_list[idx], salt='order' if salt is None else f'order/{salt}'))
+            coco_image_samples = [[] for i in range(len(ratio))]
+            for idx in img_order:
+                part_idx = get_hash_part(hash_key_list[idx], ratio=ratio, salt=salt)
+                coco_image_samples[part_idx].append(self.images[idx])
+        else:
+            locations = np.cumsum([val*int(len(self.images)/sum(ratio)) for val in ratio]) - 1
+            start_location = None
+            end_location = 0
+            count = 0
+            coco_image_samples = []
+            if shuffle:
+                self.images.shuffle()
+            while count < len(locations):
+                start_location = end_location
+                end_location = locations[count]
+                count += 1
+                coco_image_samples.append(self.images[start_location:end_location].copy())
+
+        # Group the annotations by image once, instead of searching them for every image.
+        img_id2anns = {}
+        for coco_ann in self.annotations:
+            if coco_ann.image_id not in img_id2anns:
+                img_id2anns[coco_ann.image_id] = []
+            img_id2anns[coco_ann.image_id].append(coco_ann)
 
         # Construct New Datasets
         dataset_list = []
-        for coco_image_list, split_dirname, split_imgdir, split_cocopath in \
-            tqdm(zip(coco_image_samples, split_dirname_list, split_imgdir_list, split_cocopath_list), total=len(split_dirname_list), unit='part(s)', leave=True):
+        for coco_image_list, split_dirname, split_dirpath, split_imgdir, split_cocopath in \
+            tqdm(zip(coco_image_samples, split_dirname_list, split_dirpath_list, split_imgdir_list, split_cocopath_list), total=len(split_dirname_list), unit='part(s)', leave=True):
             dataset = COCO_Dataset.new(description=f'Split {split_dirname} Dataset')
-            used_license_id_list = []
-            used_category_id_list = []
+            used_license_id_set = set()
+            used_category_id_set = set()
+            src_img_path_list, dst_img_path_list = [], []
+            next_number = {} # extension -> next number, the same numbering as get_next_dump_path
             for coco_image0 in tqdm(coco_image_list, total=len(coco_image_list), unit='image(s)', leave=False):
                 coco_image = coco_image0.copy()
                 # Map Image Index
                 coco_image = COCO_Image.buffer(coco_image)
-                anns = self.annotations.get_annotations_from_imgIds([coco_image.id]).copy()
+                anns = img_id2anns[coco_image.id] if coco_image.id in img_id2anns else []
                 new_image_id = len(dataset.images)
-                
-                # Copy Image
+
+                # Decide Image Path
                 old_img_path = coco_image.coco_url
                 if not preserve_filenames:
                     img_extension = get_extension_from_filename(coco_image.file_name)
-                    new_img_path = get_next_dump_path(dump_dir=split_imgdir, file_extension=img_extension)
+                    number = next_number[img_extension] if img_extension in next_number else 0
+                    next_number[img_extension] = number + 1
+                    new_img_path = f'{split_imgdir}/{str(number).zfill(6)}.{img_extension}'
                 else:
                     new_img_path = f'{split_imgdir}/{coco_image.file_name}'
-                if file_exists(new_img_path):
-                    logger.error(f'Copy failed. Image already exists in destination directory: {new_img_path}')
-                    logger.error(f'This is likely because the filenames in your dataset are not unique.')
-                    logger.error(f'Use preserve_filenames=False to use automatically generated filenames.')
-                    raise Exception
-                copy_file(src_path=old_img_path, dest_path=new_img_path, silent=True)
+                src_img_path_list.append(old_img_path)
+                dst_img_path_list.append(new_img_path)
 
                 # Update COCO Image
                 coco_image.id = new_image_id
-                coco_image.coco_url = new_img_path
-                coco_image.file_name = get_filename(new_img_path)
+                if method != 'manifest':
+                    coco_image.coco_url = new_img_path
+                    coco_image.file_name = get_filename(new_img_path)
                 dataset.images.append(coco_image)
-                if coco_image.license_id not in used_license_id_list:
-                    used_license_id_list.append(coco_image.license_id)
+                used_license_id_set.add(coco_image.license_id)
 
                 for coco_ann0 in anns:
                     coco_ann = coco_ann0.copy()
@@ -928,36 +1408,216 @@ class COCO_Dataset:
                     coco_ann.id = new_ann_id
                     coco_ann.image_id = new_image_id
                     dataset.annotations.append(coco_ann)
-                    if coco_ann.category_id not in used_category_id_list:
-                        used_category_id_list.append(coco_ann.category_id)
+                    used_category_id_set.add(coco_ann.category_id)
+
+            if len(set(dst_img_path_list)) != len(dst_img_path_list):
+                seen_img_path_set = set()
+                for new_img_path in dst_img_path_list:
+                    if new_img_path in seen_img_path_set:
+                        logger.error(f'Copy failed. Image already exists in destination directory: {new_img_path}')
+                        logger.error(f'This is likely because the filenames in your dataset are not unique.')
+                        logger.error(f'Use preserve_filenames=False to use automatically generated filenames.')
+                        raise Exception
+                    seen_img_path_set.add(new_img_path)
+
+            # Copy Images
+            if method == 'manifest':
+                manifest = [
+                    {'src': src_img_path, 'dst': dst_img_path}
+                    for src_img_path, dst_img_path in zip(src_img_path_list, dst_img_path_list)
+                ]
+                json.dump(manifest, open(f'{split_dirpath}/img_manifest.json', 'w'), indent=2, ensure_ascii=False)
+            else:
+                transfer_files(
+                    src_path_list=src_img_path_list, dst_path_list=dst_img_path_list,
+                    method=method, workers=workers
+                )
 
             # Add Used Licenses To Dataset and Update Ids
+            license_id_map = {}
             for coco_license0 in self.licenses:
                 coco_license = coco_license0.copy()
-                if coco_license.id in used_license_id_list:
-                    new_license_id = len(dataset.licenses)
-                    for coco_image in dataset.images:
-                        if coco_image.license_id == coco_license.id:
-                            coco_image.license_id = new_license_id
-                    coco_license.id = new_license_id
+                if coco_license.id in used_license_id_set and coco_license.id not in license_id_map:
+                    license_id_map[coco_license.id] = len(dataset.licenses)
+                    coco_license.id = len(dataset.licenses)
                     dataset.licenses.append(coco_license)
-            
+            for coco_image in dataset.images:
+                if coco_image.license_id in license_id_map:
+                    coco_image.license_id = license_id_map[coco_image.license_id]
+
             # Add Used Categories To Dataset and Update Ids
+            category_id_map = {}
             for coco_cat0 in self.categories:
                 coco_cat = coco_cat0.copy()
-                if coco_cat.id in used_category_id_list:
-                    new_cat_id = len(dataset.categories)
-                    for coco_ann in dataset.annotations:
-                        if coco_ann.category_id == coco_cat.id:
-                            coco_ann.category_id = new_cat_id
-                    coco_cat.id = new_cat_id
+                if coco_cat.id in used_category_id_set and coco_cat.id not in category_id_map:
+                    category_id_map[coco_cat.id] = len(dataset.categories)
+                    coco_cat.id = len(dataset.categories)
                     dataset.categories.append(coco_cat)
-            
+            for coco_ann in dataset.annotations:
+                if coco_ann.category_id in category_id_map:
+                    coco_ann.category_id = category_id_map[coco_ann.category_id]
+
             # Append Dataset To Split Dataset List
             dataset.save_to_path(save_path=split_cocopath, overwrite=False)
             dataset_list.append(dataset)
         return dataset_list
 
+    @classmethod
+    def split_from_path(
+        cls, json_path: str, dest_dir: str,
+        split_dirname_list: List[str]=['train', 'test', 'val'], ratio: list=[2, 1, 0], coco_filename_list: List[str]=None,
+        img_dir: str=None, hash_key: str='file_name', seed: int=None, preserve_filenames: bool=False,
+        overwrite: bool=False, method: str='copy', workers: int=8, strict: bool=True, chunk_size: int=2**20
+    ) -> List[str]:
+        """
+        Same as split(strategy='hash'), but the COCO json file is split in a single pass without loading the dataset.
+        Each image and annotation is written to its part as soon as it is read, so only a mapping from image id
+        to (part, new image id) and the image paths are kept in memory.
+        Use this for datasets that don't fit in memory.
+
+        Differences to split:
+            * The images of each part are kept in the order that they appear in the json file.
+            * Every part contains all of the licenses and categories of json_path, with their original ids.
+            * The images of the json file must come before the annotations.
+            * Any other top level keys of json_path are copied to every part unchanged.
+
+        json_path: Path to the COCO json file that you would like to split.
+        img_dir: If not None, the images are assumed to be in img_dir. Refer to load_from_path.
+        Refer to split for the other parameters.
+
+        Returns the paths of the json files that were saved.
+        """
+        check_file_exists(json_path)
+        check_value(method, valid_value_list=TRANSFER_METHODS + ['manifest'])
+        if img_dir is not None:
+            check_dir_exists(img_dir)
+        coco_filename_list, split_dirpath_list, split_imgdir_list, split_cocopath_list = \
+            cls._prepare_split_dirs(
+                dest_dir=dest_dir, split_dirname_list=split_dirname_list, ratio=ratio,
+                coco_filename_list=coco_filename_list, overwrite=overwrite
+            )
+        salt = str(seed) if seed is not None else None
+        num_parts = len(split_dirname_list)
+        img_id2part = {} # old image id -> (part index, new image id)
+        num_images_list, num_anns_list = [0] * num_parts, [0] * num_parts
+        src_img_path_lists = [[] for i in range(num_parts)]
+        dst_img_path_lists = [[] for i in range(num_parts)]
+        dst_img_path_sets = [set() for i in range(num_parts)]
+        next_number_list = [{} for i in range(num_parts)] # extension -> next number, for each part
+
+        with ExitStack() as stack:
+            writers = [
+                stack.enter_context(JSON_Stream_Writer(split_cocopath))
+                for split_cocopath in split_cocopath_list
+            ]
+            for writer, split_dirname in zip(writers, split_dirname_list):
+                writer.write_item('info', COCO_Info(description=f'Split {split_dirname} Dataset').to_dict())
+            written_keys = ['info']
+            current_key = None
+            reader = JSON_Stream_Reader(json_path, chunk_size=chunk_size)
+            for key, value in reader:
+                if key == 'info':
+                    continue
+                if key not in reader.list_keys:
+                    # Any other top level value is copied to every part unchanged.
+                    if current_key is not None:
+                        for writer in writers:
+                            writer.end_list()
+                        current_key = None
+                    for writer in writers:
+                        writer.write_item(key, value)
+                    written_keys.append(key)
+                    continue
+                if key != current_key:
+                    if current_key is not None:
+                        for writer in writers:
+                            writer.end_list()
+                    for writer in writers:
+                        writer.begin_list(key)
+                    current_key = key
+                    written_keys.append(key)
+
+                if key == 'licenses':
+                    license_dict = COCO_License.from_dict(value).to_dict()
+                    for writer in writers:
+                        writer.write_element(license_dict)
+                elif key == 'categories':
+                    category_dict = COCO_Category.from_dict(value, strict=strict).to_dict(strict=strict)
+                    for writer in writers:
+                        writer.write_element(category_dict)
+                elif key == 'images':
+                    coco_image = COCO_Image.from_dict(value)
+                    if img_dir is not None:
+                        coco_image.coco_url = f'{img_dir}/{coco_image.file_name}'
+                    part_idx = get_hash_part(cls._get_split_hash_key(coco_image, hash_key), ratio=ratio, salt=salt)
+                    if not preserve_filenames:
+                        img_extension = get_extension_from_filename(coco_image.file_name)
+                        next_number = next_number_list[part_idx]
+                        number = next_number[img_extension] if img_extension in next_number else 0
+                        next_number[img_extension] = number + 1
+                        new_img_path = f'{split_imgdir_list[part_idx]}/{str(number).zfill(6)}.{img_extension}'
+                    else:
+                        new_img_path = f'{split_imgdir_list[part_idx]}/{coco_image.file_name}'
+                        if new_img_path in dst_img_path_sets[part_idx]:
+                            logger.error(f'Copy failed. Image already exists in destination directory: {new_img_path}')
+                            logger.error(f'This is likely because the filenames in your dataset are not unique.')
+                            logger.error(f'Use preserve_filenames=False to use automatically generated filenames.')
+                            raise Exception
+                        dst_img_path_sets[part_idx].add(new_img_path)
+                    src_img_path_lists[part_idx].append(coco_image.coco_url)
+                    dst_img_path_lists[part_idx].append(new_img_path)
+
+                    img_id2part[coco_image.id] = (part_idx, num_images_list[part_idx])
+                    coco_image.id = num_images_list[part_idx]
+                    num_images_list[part_idx] += 1
+                    if method != 'manifest':
+                        coco_image.coco_url = new_img_path
+                        coco_image.file_name = get_filename(new_img_path)
+                    writers[part_idx].write_element(coco_image.to_dict())
+                elif key == 'annotations':
+                    coco_ann = COCO_Annotation.from_dict(value, strict=strict, lazy=True)
+                    if coco_ann.image_id not in img_id2part:
+                        logger.error(f"Couldn't find image id {coco_ann.image_id} of annotation id {coco_ann.id}.")
+                        logger.error(f'The images of {json_path} need to come before its annotations in order to split it in a single pass.')
+                        raise Exception
+                    part_idx, coco_ann.image_id = img_id2part[coco_ann.image_id]
+                    coco_ann.id = num_anns_list[part_idx]
+                    num_anns_list[part_idx] += 1
+                    writers[part_idx].write_element(coco_ann.to_dict(strict=strict))
+                else:
+                    # The elements of any other top level list are copied to every part unchanged.
+                    for writer in writers:
+                        writer.write_element(value)
+            if current_key is not None:
+                for writer in writers:
+                    writer.end_list()
+            check_required_keys(
+                {key: None for key in reader.found_keys},
+                required_keys=['licenses', 'images', 'annotations', 'categories']
+            )
+            # Empty lists don't yield anything while reading, so they still need to be written.
+            for key in ['licenses', 'images', 'annotations', 'categories'] + reader.list_keys:
+                if key not in written_keys:
+                    written_keys.append(key)
+                    for writer in writers:
+                        writer.write_list(key, [])
+
+        # Copy Images
+        for split_dirpath, src_img_path_list, dst_img_path_list in \
+            zip(split_dirpath_list, src_img_path_lists, dst_img_path_lists):
+            if method == 'manifest':
+                manifest = [
+                    {'src': src_img_path, 'dst': dst_img_path}
+                    for src_img_path, dst_img_path in zip(src_img_path_list, dst_img_path_list)
+                ]
+                json.dump(manifest, open(f'{split_dirpath}/img_manifest.json', 'w'), indent=2, ensure_ascii=False)
+            else:
+                transfer_files(
+                    src_path_list=src_img_path_list, dst_path_list=dst_img_path_list,
+                    method=method, workers=workers
+                )
+        return split_cocopath_list
+
     def prune_keypoints(self, min_num_kpts: int, verbose: bool=False):
         """Used to prune out all of the annotations and images that contain below a certain level of keypoints, which is specified by min_num_kpts.
         
@@ -977,29 +1637,27 @@ class COCO_Dataset:
             With this the new dataset is saved to a different location.
             In order to avoid accidently deleting files from the python script, please delete the old dataset files manually.
         """
-        ann_idx_list = list(range(len(self.annotations)))
-        ann_idx_list.reverse()
-        for i in ann_idx_list:
-            coco_ann = self.annotations[i]
-            visibility_list = [kpt.visibility for kpt in coco_ann.keypoints]
-            num_visible = 0
-            for v in visibility_list:
-                if v > 0.0:
-                    num_visible += 1
-            if num_visible < min_num_kpts:
-                del self.annotations[i]
-                if verbose:
-                    logger.info(f'Deleted ann id: {coco_ann.id}')
-        img_idx_list = list(range(len(self.images)))
-        img_idx_list.reverse()
-        for i in img_idx_list:
-            coco_image = self.images[i]
-            coco_anns = self.annotations.get_annotations_from_imgIds([coco_image.id])
-            if len(coco_anns) == 0:
-                coco_image = self.images[i]
-                del self.images[i]
-                if verbose:
-                    logger.info(f'Deleted image id: {coco_image.id}')
+        num_visible = (self.annotations.get_keypoint_visibility() > 0).sum(axis=1)
+        keep_ann = num_visible >= min_num_kpts
+        if verbose:
+            for coco_ann in itertools.compress(self.annotations.obj_list, ~keep_ann):
+                logger.info(f'Deleted ann id: {coco_ann.id}')
+        # Rebuilt in place, since the handler's list is shared with its annotation_list attribute.
+        self.annotations.obj_list[:] = list(itertools.compress(self.annotations.obj_list, keep_ann))
+        self.annotations.reset_indexes()
+
+        used_img_ids = set([coco_ann.image_id for coco_ann in self.annotations.obj_list])
+        rm_img_ids = set([coco_image.id for coco_image in self.images.obj_list]) - used_img_ids
+        if len(rm_img_ids) > 0:
+            if verbose:
+                for coco_image in self.images.obj_list:
+                    if coco_image.id in rm_img_ids:
+                        logger.info(f'Deleted image id: {coco_image.id}')
+            self.images.obj_list[:] = [
+                coco_image for coco_image in self.images.obj_list
+                if coco_image.id not in rm_img_ids
+            ]
+            self.images.reset_indexes()
 
     def remove_categories_by_name(self, category_names: List[str], verbose: bool=False):
         self.categories.remove_by_name(
@@ -1010,6 +1668,37 @@ class COCO_Dataset:
             verbose=verbose
         )
 
+    def query(self) -> COCO_Query:
+        """
+        Starts a query over the annotations of this dataset.
+
+            ```python
+            person_images = dataset.query().where(category='person', area__gt=1024).images()
+            ```
+
+        Refer to COCO_Query for the available fields and lookups.
+        """
+        return COCO_Query(self)
+
+    def remove(
+        self, license_ids: List[int]=None, image_ids: List[int]=None, ann_ids: List[int]=None, category_ids: List[int]=None,
+        verbose: bool=False
+    ) -> (set, set, set, set):
+        """
+        Removes licenses, images, annotations and categories by id, along with everything that depends on them.
+        For example, removing a category also removes its annotations, the images that are left without annotations
+        and the licenses that are left without images.
+        Refer to annotation_utils.coco.structs.removal.cascade_remove for the exact rules.
+
+        Returns the removed (license_ids, image_ids, ann_ids, category_ids) as sets.
+        """
+        return cascade_remove(
+            license_handler=self.licenses, img_handler=self.images,
+            ann_handler=self.annotations, cat_handler=self.categories,
+            license_ids=license_ids, image_ids=image_ids, ann_ids=ann_ids, category_ids=category_ids,
+            verbose=verbose
+        )
+
     def print_handler_lengths(self):
         logger.info(f'len(licenses): {len(self.licenses)}')
         logger.info(f'len(images): {len(self.images)}')
@@ -1040,9 +1729,13 @@ class COCO_Dataset:
 
         img: The image array that you would like to draw the annotation on.
         ann_id: The id that corresponds to the annotation that you would like to draw.
-        draw_order: The order in which you would like to draw (render) the annotations.
+        draw_order: The order in which you would like to draw (render) the parts of the annotation.
                     Example: If you specify 'bbox' after 'seg', the bounding box will be
                     drawn after the segmentation is drawn.
+                    When several annotations are drawn at once (draw_annotations, get_preview),
+                    each target is drawn for all of the annotations before the next target,
+                    so the bboxes of every annotation end up on top of all of the segmentations.
+                    To layer one annotation at a time instead, call draw_annotation once per annotation.
         bbox_color: The color of the bbox that is to be drawn.
         bbox_thickness: The thickness of the bbox that is to be drawn.
         bbox_show_label: If True, the label of the bbox will be drawn directly above it.
@@ -1072,46 +1765,104 @@ class COCO_Dataset:
         show_skeleton: If False, the keypoint skeleton will not be drawn at all.
         show_seg: If False, the segmentation will not be drawn at all.
         """
-        coco_ann = self.annotations.get_obj_from_id(ann_id)
+        return self.draw_annotations(
+            img=img, coco_ann_list=[self.annotations.get_obj_from_id(ann_id)],
+            draw_order=draw_order,
+            bbox_color=bbox_color, bbox_thickness=bbox_thickness, # BBox
+            bbox_show_label=bbox_show_label, bbox_label_thickness=bbox_label_thickness,
+            bbox_label_only=bbox_label_only,
+            seg_color=seg_color, seg_transparent=seg_transparent, # Segmentation
+            kpt_radius=kpt_radius, kpt_color=kpt_color, # Keypoints
+            show_kpt_labels=show_kpt_labels, kpt_label_thickness=kpt_label_thickness,
+            kpt_label_only=kpt_label_only, ignore_kpt_idx=ignore_kpt_idx,
+            kpt_idx_offset=kpt_idx_offset,
+            skeleton_thickness=skeleton_thickness, skeleton_color=skeleton_color, # Skeleton
+            show_bbox=show_bbox, show_kpt=show_kpt,
+            show_skeleton=show_skeleton, show_seg=show_seg
+        )
+
+    def draw_annotations(
+        self, img: np.ndarray, coco_ann_list: List[COCO_Annotation],
+        draw_order: list=['seg', 'bbox', 'skeleton', 'kpt'],
+        bbox_color: list=[0, 255, 255], bbox_thickness: list=2, # BBox
+        bbox_show_label: bool=True, bbox_label_thickness: int=None,
+        bbox_label_only: bool=False,
+        seg_color: list=[255, 255, 0], seg_transparent: bool=True, # Segmentation
+        kpt_radius: int=4, kpt_color: list=[0, 0, 255], # Keypoints
+        show_kpt_labels: bool=True, kpt_label_thickness: int=1,
+        kpt_label_only: bool=False, ignore_kpt_idx: list=[],
+        kpt_idx_offset: int=0,
+        skeleton_thickness: int=5, skeleton_color: list=[255, 0, 0], # Skeleton
+        show_bbox: bool=True, show_kpt: bool=True, # Show Flags
+        show_skeleton: bool=True, show_seg: bool=True
+    ) -> np.ndarray:
+        """
+        Draws all of the given annotations on a copy of img.
+        The image is copied once, and every draw target in draw_order is drawn for all of the annotations
+        before moving on to the next one. (Example: All of the bboxes are drawn on top of all of the segmentations.)
+        The category of each annotation is only looked up once per category.
+
+        img: The image array that you would like to draw the annotations on.
+        coco_ann_list: The annotations that you would like to draw.
+        Refer to draw_annotation for the other parameters.
+        """
         result = img.copy()
 
-        if len(coco_ann.keypoints) > 0:
-            vis_keypoints_arr = coco_ann.keypoints.to_numpy(demarcation=True)[:, :2]
-            kpt_visibility = coco_ann.keypoints.to_numpy(demarcation=True)[:, 2:].reshape(-1)
-            base_ignore_kpt_idx = np.argwhere(np.array(kpt_visibility) == 0.0).reshape(-1).tolist()
-            ignore_kpt_idx_list = ignore_kpt_idx + list(set(base_ignore_kpt_idx) - set(ignore_kpt_idx))
-        else:
-            vis_keypoints_arr = np.array([])
-            kpt_visibility = np.array([])
-            ignore_kpt_idx_list = []
-        coco_cat = self.categories.get_obj_from_id(coco_ann.category_id)
+        # Keypoints and categories are prepared once per annotation and once per category.
+        coco_cat_dict = {}
+        kpt_info_list = []
+        for coco_ann in coco_ann_list:
+            if coco_ann.category_id not in coco_cat_dict:
+                coco_cat_dict[coco_ann.category_id] = self.categories.get_obj_from_id(coco_ann.category_id)
+            if len(coco_ann.keypoints) > 0:
+                kpt_arr = coco_ann.keypoints.to_numpy(demarcation=True)
+                vis_keypoints_arr = kpt_arr[:, :2]
+                base_ignore_kpt_idx = np.argwhere(kpt_arr[:, 2] == 0.0).reshape(-1).tolist()
+                ignore_kpt_idx_list = ignore_kpt_idx + list(set(base_ignore_kpt_idx) - set(ignore_kpt_idx))
+            else:
+                vis_keypoints_arr = np.zeros((0, 2))
+                ignore_kpt_idx_list = []
+            kpt_info_list.append((vis_keypoints_arr, ignore_kpt_idx_list))
+
         for draw_target in draw_order:
             if draw_target.lower() == 'bbox':
                 if show_bbox:
-                    result = draw_bbox(
-                        img=result, bbox=coco_ann.bbox, color=bbox_color, thickness=bbox_thickness, text=coco_cat.name,
-                        label_thickness=bbox_label_thickness, label_only=bbox_label_only
-                    )
+                    for coco_ann in coco_ann_list:
+                        draw_bbox_in_place(
+                            img=result, bbox=coco_ann.bbox, color=bbox_color, thickness=bbox_thickness,
+                            text=coco_cat_dict[coco_ann.category_id].name,
+                            label_thickness=bbox_label_thickness, label_only=bbox_label_only
+                        )
             elif draw_target.lower() == 'seg':
                 if show_seg:
-                    result = draw_segmentation(
-                        img=result, segmentation=coco_ann.segmentation, color=seg_color, transparent=seg_transparent
-                    )
+                    if not seg_transparent:
+                        for coco_ann in coco_ann_list:
+                            contours = coco_ann.segmentation.to_contour()
+                            if len(contours) > 0:
+                                cv2.drawContours(image=result, contours=contours, contourIdx=-1, color=seg_color, thickness=-1)
+                    else:
+                        # Overlapping transparent segmentations are blended once per overlap, like when they are drawn one at a time.
+                        count = np.zeros(result.shape[:2], dtype=np.uint16)
+                        for coco_ann in coco_ann_list:
+                            add_contours_to_count(count, coco_ann.segmentation.to_contour())
+                        draw_transparent_count_in_place(result, count, color=seg_color)
             elif draw_target.lower() == 'kpt':
                 if show_kpt:
-                    result = draw_keypoints(
-                        img=result, keypoints=vis_keypoints_arr,
-                        radius=kpt_radius, color=kpt_color, keypoint_labels=coco_cat.keypoints,
-                        show_keypoints_labels=show_kpt_labels, label_thickness=kpt_label_thickness,
-                        label_only=kpt_label_only, ignore_kpt_idx=ignore_kpt_idx_list
-                    )
+                    for coco_ann, (vis_keypoints_arr, ignore_kpt_idx_list) in zip(coco_ann_list, kpt_info_list):
+                        draw_keypoints_in_place(
+                            img=result, keypoints=vis_keypoints_arr,
+                            radius=kpt_radius, color=kpt_color, keypoint_labels=coco_cat_dict[coco_ann.category_id].keypoints,
+                            show_keypoints_labels=show_kpt_labels, label_thickness=kpt_label_thickness,
+                            label_only=kpt_label_only, ignore_kpt_idx=ignore_kpt_idx_list
+                        )
             elif draw_target.lower() == 'skeleton':
                 if show_skeleton:
-                    result = draw_skeleton(
-                        img=result, keypoints=vis_keypoints_arr,
-                        keypoint_skeleton=coco_cat.skeleton, index_offset=kpt_idx_offset,
-                        thickness=skeleton_thickness, color=skeleton_color, ignore_kpt_idx=ignore_kpt_idx_list
-                    )
+                    for coco_ann, (vis_keypoints_arr, ignore_kpt_idx_list) in zip(coco_ann_list, kpt_info_list):
+                        draw_skeleton_in_place(
+                            img=result, keypoints=vis_keypoints_arr,
+                            keypoint_skeleton=coco_cat_dict[coco_ann.category_id].skeleton, index_offset=kpt_idx_offset,
+                            thickness=skeleton_thickness, color=skeleton_color, ignore_kpt_idx=ignore_kpt_idx_list
+                        )
             else:
                 logger.error(f'Invalid target: {draw_target}')
                 logger.error(f"Valid targets: {['bbox', 'seg', 'kpt', 'skeleton']}")
@@ -1135,7 +1886,8 @@ class COCO_Dataset:
         details_thickness: int=2,
         show_bbox: bool=True, show_kpt: bool=True, # Show Flags
         show_skeleton: bool=True, show_seg: bool=True,
-        show_details: bool=False
+        show_details: bool=False,
+        img_cache: COCO_Image_Cache=None
     ) -> np.ndarray:
         """
         Returns a preview of the image in the dataset that corresponds to image_id.
@@ -1145,6 +1897,7 @@ class COCO_Dataset:
         draw_order: The order in which you would like to draw (render) the annotations.
                     Example: If you specify 'bbox' after 'seg', the bounding box will be
                     drawn after the segmentation is drawn.
+                    Each target is drawn for all of the annotations before the next target.
         bbox_color: The color of the bbox that is to be drawn.
         bbox_thickness: The thickness of the bbox that is to be drawn.
         bbox_show_label: If True, the label of the bbox will be drawn directly above it.
@@ -1180,12 +1933,19 @@ class COCO_Dataset:
         show_skeleton: If False, the keypoint skeleton will not be drawn at all.
         show_seg: If False, the segmentation will not be drawn at all.
         show_details: If True, the filename of the current frame and other information will be written to the screen.
+        img_cache: If not None, the images are read through this COCO_Image_Cache instead of being decoded
+                   from disk every time. The same cache can be shared between calls.
         """
         coco_image = self.images.get_obj_from_id(image_id)
-        img = cv2.imread(coco_image.coco_url)
-        for coco_ann in self.annotations.get_annotations_from_imgIds([coco_image.id]):
-            img = self.draw_annotation(
-                img=img, ann_id=coco_ann.id,
+        coco_anns = self.annotations.get_annotations_from_imgIds([coco_image.id])
+        if img_cache is None:
+            img = cv2.imread(coco_image.coco_url)
+        else:
+            # Drawing works on a copy, so the cached image only needs to be copied if nothing is drawn.
+            img = img_cache.imread(coco_image.coco_url, copy=len(coco_anns) == 0 and not show_details)
+        if len(coco_anns) > 0:
+            img = self.draw_annotations(
+                img=img, coco_ann_list=coco_anns,
                 draw_order=draw_order,
                 bbox_color=bbox_color, bbox_thickness=bbox_thickness, # BBox
                 bbox_show_label=bbox_show_label, bbox_label_thickness=bbox_label_thickness,
@@ -1196,17 +1956,11 @@ class COCO_Dataset:
                 kpt_label_only=kpt_label_only, ignore_kpt_idx=ignore_kpt_idx,
                 kpt_idx_offset=kpt_idx_offset,
                 skeleton_thickness=skeleton_thickness, skeleton_color=skeleton_color, # Skeleton
-                details_corner_pos_ratio=details_corner_pos_ratio,
-                details_height_ratio=details_height_ratio,
-                details_leeway=details_leeway, details_color=details_color,
-                details_thickness=details_thickness,
                 show_bbox=show_bbox, show_kpt=show_kpt,
-                show_skeleton=show_skeleton, show_seg=show_seg,
-                show_details=show_details
+                show_skeleton=show_skeleton, show_seg=show_seg
             )
         if show_details:
             img_h, img_w = img.shape[:2]
-            coco_anns = self.annotations.get_annotations_from_imgIds([coco_image.id])
             coco_ann_id_list = [coco_ann.id for coco_ann in coco_anns]
             coco_ann_id_list.sort()
             img = draw_text_rows_at_point(
@@ -1242,7 +1996,9 @@ class COCO_Dataset:
         details_thickness: int=2,
         show_bbox: bool=True, show_kpt: bool=True, # Show Flags
         show_skeleton: bool=True, show_seg: bool=True,
-        show_details: bool=False
+        show_details: bool=False,
+        workers: int=None, max_prefetch: int=8,
+        img_cache: COCO_Image_Cache=None
     ):
         """
         Displays a preview of the dataset in a popup window.
@@ -1292,32 +2048,42 @@ class COCO_Dataset:
         show_skeleton: If False, the keypoint skeleton will not be drawn at all.
         show_seg: If False, the segmentation will not be drawn at all.
         show_details: If True, the filename of the current frame and other information will be written to the screen.
+        workers: If not None, this many background threads read and render the upcoming frames while the current one is displayed.
+        max_prefetch: The maximum number of frames that are rendered ahead of the one that is displayed.
+                      Only used when workers is not None.
+        img_cache: If not None, the images are read through this COCO_Image_Cache instead of being decoded
+                   from disk every time. The same cache can be shared between calls.
         """
         last_idx = len(self.images) if end_idx is None else end_idx
-        for coco_image in self.images[start_idx:last_idx]:
-            img = self.get_preview(
-                image_id=coco_image.id,
-                draw_order=draw_order,
-                bbox_color=bbox_color, bbox_thickness=bbox_thickness, # BBox
-                bbox_show_label=bbox_show_label, bbox_label_thickness=bbox_label_thickness,
-                bbox_label_only=bbox_label_only,
-                seg_color=seg_color, seg_transparent=seg_transparent, # Segmentation
-                kpt_radius=kpt_radius, kpt_color=kpt_color, # Keypoints
-                show_kpt_labels=show_kpt_labels, kpt_label_thickness=kpt_label_thickness,
-                kpt_label_only=kpt_label_only, ignore_kpt_idx=ignore_kpt_idx,
-                kpt_idx_offset=kpt_idx_offset,
-                details_corner_pos_ratio=details_corner_pos_ratio,
-                details_height_ratio=details_height_ratio,
-                details_leeway=details_leeway, details_color=details_color,
-                details_thickness=details_thickness,
-                skeleton_thickness=skeleton_thickness, skeleton_color=skeleton_color, # Skeleton
-                show_bbox=show_bbox, show_kpt=show_kpt,
-                show_skeleton=show_skeleton, show_seg=show_seg,
-                show_details=show_details
+        preview_kwargs = dict(
+            draw_order=draw_order,
+            bbox_color=bbox_color, bbox_thickness=bbox_thickness, # BBox
+            bbox_show_label=bbox_show_label, bbox_label_thickness=bbox_label_thickness,
+            bbox_label_only=bbox_label_only,
+            seg_color=seg_color, seg_transparent=seg_transparent, # Segmentation
+            kpt_radius=kpt_radius, kpt_color=kpt_color, # Keypoints
+            show_kpt_labels=show_kpt_labels, kpt_label_thickness=kpt_label_thickness,
+            kpt_label_only=kpt_label_only, ignore_kpt_idx=ignore_kpt_idx,
+            kpt_idx_offset=kpt_idx_offset,
+            details_corner_pos_ratio=details_corner_pos_ratio,
+            details_height_ratio=details_height_ratio,
+            details_leeway=details_leeway, details_color=details_color,
+            details_thickness=details_thickness,
+            skeleton_thickness=skeleton_thickness, skeleton_color=skeleton_color, # Skeleton
+            show_bbox=show_bbox, show_kpt=show_kpt,
+            show_skeleton=show_skeleton, show_seg=show_seg,
+            show_details=show_details
+        )
+        with closing(
+            prefetch_map(
+                lambda coco_image: self._get_visualization(coco_image, preview_kwargs=preview_kwargs, img_cache=img_cache),
+                self.images[start_idx:last_idx], workers=workers, max_prefetch=max_prefetch
             )
-            quit_flag = cv_simple_image_viewer(img=img, preview_width=preview_width)
-            if quit_flag:
-                break
+        ) as img_iter:
+            for img in img_iter:
+                quit_flag = cv_simple_image_viewer(img=img, preview_width=preview_width)
+                if quit_flag:
+                    break
 
     def save_visualization(
         self, save_dir: str='vis_preview', show_preview: bool=False, preserve_filenames: bool=True,
@@ -1338,7 +2104,9 @@ class COCO_Dataset:
         details_thickness: int=2,
         show_bbox: bool=True, show_kpt: bool=True, # Show Flags
         show_skeleton: bool=True, show_seg: bool=True,
-        show_details: bool=False
+        show_details: bool=False,
+        workers: int=None, chunksize: int=4,
+        img_cache: COCO_Image_Cache=None
     ):
         """
         Generates and saves visualizations of the annotations of this dataset to a dump folder.
@@ -1397,6 +2165,13 @@ class COCO_Dataset:
         show_skeleton: If False, the keypoint skeleton will not be drawn at all.
         show_seg: If False, the segmentation will not be drawn at all.
         show_details: If True, the filename of the current frame and other information will be written to the screen.
+        workers: If not None, the images are rendered and encoded in parallel using a pool of this many processes.
+                 The dataset is sent to each process once, when the pool is started.
+                 The files are still written one at a time, in the order of the images.
+        chunksize: The number of images that each task of the process pool renders. Only used when workers is not None.
+        img_cache: If not None, the images are read through this COCO_Image_Cache instead of being decoded
+                   from disk every time. The same cache can be shared between calls.
+                   Only used when workers is None, since the worker processes decode the images themselves.
         """
 
         # Prepare save directory
@@ -1413,48 +2188,104 @@ class COCO_Dataset:
             viewer = SimpleVideoViewer(preview_width=1000, window_name='Annotation Visualization')
 
         last_idx = len(self.images) if end_idx is None else end_idx
-        total_iter = len(self.images[start_idx:last_idx])
-        for coco_image in tqdm(self.images[start_idx:last_idx], total=total_iter, leave=False):
-            if show_annotations:
-                img = self.get_preview(
-                    image_id=coco_image.id,
-                    draw_order=draw_order,
-                    bbox_color=bbox_color, bbox_thickness=bbox_thickness, # BBox
-                    bbox_show_label=bbox_show_label, bbox_label_thickness=bbox_label_thickness,
-                    bbox_label_only=bbox_label_only,
-                    seg_color=seg_color, seg_transparent=seg_transparent, # Segmentation
-                    kpt_radius=kpt_radius, kpt_color=kpt_color, # Keypoints
-                    show_kpt_labels=show_kpt_labels, kpt_label_thickness=kpt_label_thickness,
-                    kpt_label_only=kpt_label_only, ignore_kpt_idx=ignore_kpt_idx,
-                    kpt_idx_offset=kpt_idx_offset,
-                    skeleton_thickness=skeleton_thickness, skeleton_color=skeleton_color, # Skeleton
-                    details_corner_pos_ratio=details_corner_pos_ratio,
-                    details_height_ratio=details_height_ratio,
-                    details_leeway=details_leeway, details_color=details_color,
-                    details_thickness=details_thickness,
-                    show_bbox=show_bbox, show_kpt=show_kpt,
-                    show_skeleton=show_skeleton, show_seg=show_seg,
-                    show_details=show_details
-                )
-            else:
-                img = cv2.imread(coco_image.coco_url)
+        coco_image_list = self.images[start_idx:last_idx]
 
+        # Since save_dir starts out empty, all output filenames can be decided up front.
+        save_path_list = []
+        next_number = {} # extension -> next number, the same numbering as get_next_dump_path
+        for coco_image in coco_image_list:
             if preserve_filenames:
                 save_path = f'{save_dir}/{coco_image.file_name}'
-                if file_exists(save_path):
-                    logger.error(f"Your dataset contains multiple instances of the same filename.")
-                    logger.error(f"Either make all filenames unique or use preserve_filenames=False")
-                    raise Exception
-                cv2.imwrite(save_path, img)
             else:
                 file_extension = get_extension_from_filename(coco_image.file_name)
-                save_path = get_next_dump_path(dump_dir=save_dir, file_extension=file_extension)
+                number = next_number[file_extension] if file_extension in next_number else 0
+                next_number[file_extension] = number + 1
+                save_path = f'{save_dir}/{str(number).zfill(6)}.{file_extension}'
+            save_path_list.append(save_path)
+        if preserve_filenames and len(set(save_path_list)) < len(save_path_list):
+            logger.error(f"Your dataset contains multiple instances of the same filename.")
+            logger.error(f"Either make all filenames unique or use preserve_filenames=False")
+            raise Exception
+
+        preview_kwargs = dict(
+            draw_order=draw_order,
+            bbox_color=bbox_color, bbox_thickness=bbox_thickness, # BBox
+            bbox_show_label=bbox_show_label, bbox_label_thickness=bbox_label_thickness,
+            bbox_label_only=bbox_label_only,
+            seg_color=seg_color, seg_transparent=seg_transparent, # Segmentation
+            kpt_radius=kpt_radius, kpt_color=kpt_color, # Keypoints
+            show_kpt_labels=show_kpt_labels, kpt_label_thickness=kpt_label_thickness,
+            kpt_label_only=kpt_label_only, ignore_kpt_idx=ignore_kpt_idx,
+            kpt_idx_offset=kpt_idx_offset,
+            skeleton_thickness=skeleton_thickness, skeleton_color=skeleton_color, # Skeleton
+            details_corner_pos_ratio=details_corner_pos_ratio,
+            details_height_ratio=details_height_ratio,
+            details_leeway=details_leeway, details_color=details_color,
+            details_thickness=details_thickness,
+            show_bbox=show_bbox, show_kpt=show_kpt,
+            show_skeleton=show_skeleton, show_seg=show_seg,
+            show_details=show_details
+        ) if show_annotations else None
+
+        pbar = tqdm(total=len(coco_image_list), leave=False)
+        if workers is None or workers <= 1:
+            for coco_image, save_path in zip(coco_image_list, save_path_list):
+                img = self._get_visualization(coco_image, preview_kwargs=preview_kwargs, img_cache=img_cache)
                 cv2.imwrite(save_path, img)
+                pbar.update(1)
 
-            if show_preview:
-                quit_flag = viewer.show(img)
-                if quit_flag:
-                    break
+                if show_preview:
+                    quit_flag = viewer.show(img)
+                    if quit_flag:
+                        break
+        else:
+            # The workers render and encode the images. The encoded files are written here, in order.
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_visualization_worker, initargs=(self, preview_kwargs)
+            )
+            futures = [
+                executor.submit(
+                    _encode_visualizations,
+                    [coco_image.id for coco_image in coco_image_list[i:i+chunksize]],
+                    [f'.{get_extension_from_path(save_path)}' for save_path in save_path_list[i:i+chunksize]]
+                )
+                for i in range(0, len(coco_image_list), chunksize)
+            ]
+            try:
+                quit_flag = False
+                for i, future in enumerate(futures):
+                    for save_path, encoded_img in zip(save_path_list[i*chunksize:(i+1)*chunksize], future.result()):
+                        with open(save_path, 'wb') as f:
+                            f.write(encoded_img)
+                        pbar.update(1)
+
+                        if show_preview:
+                            quit_flag = viewer.show(cv2.imdecode(np.frombuffer(encoded_img, dtype=np.uint8), cv2.IMREAD_COLOR))
+                            if quit_flag:
+                                break
+                    if quit_flag:
+                        break
+            finally:
+                for future in futures:
+                    future.cancel()
+                executor.shutdown(wait=True)
+        pbar.close()
+
+    def _get_visualization(
+        self, coco_image: COCO_Image, preview_kwargs: dict=None, img_cache: COCO_Image_Cache=None
+    ) -> np.ndarray:
+        """
+        Returns the visualization of coco_image.
+        preview_kwargs: The keyword arguments of get_preview. If None, the image is returned without annotations.
+        img_cache: If not None, the image is read through this cache.
+        """
+        if preview_kwargs is not None:
+            return self.get_preview(image_id=coco_image.id, img_cache=img_cache, **preview_kwargs)
+        elif img_cache is not None:
+            return img_cache.imread(coco_image.coco_url)
+        else:
+            return cv2.imread(coco_image.coco_url)
 
     def save_video(
         self, save_path: str='viz.mp4', show_preview: bool=False,
@@ -1476,7 +2307,9 @@ class COCO_Dataset:
         details_thickness: int=2,
         show_bbox: bool=True, show_kpt: bool=True, # Show Flags
         show_skeleton: bool=True, show_seg: bool=True,
-        show_details: bool=False
+        show_details: bool=False,
+        workers: int=None, max_prefetch: int=8,
+        img_cache: COCO_Image_Cache=None
     ):
         """
         save_path: Path to where you would like to save the visualization video of this dataset.
@@ -1537,6 +2370,12 @@ class COCO_Dataset:
         show_skeleton: If False, the keypoint skeleton will not be drawn at all.
         show_seg: If False, the segmentation will not be drawn at all.
         show_details: If True, the filename of the current frame and other information will be written to the screen.
+        workers: If not None, this many background threads read, render, rescale and pad the upcoming frames
+                 while the current one is being encoded.
+        max_prefetch: The maximum number of frames that are prepared ahead of the one that is being encoded.
+                      Only used when workers is not None.
+        img_cache: If not None, the images are read through this COCO_Image_Cache instead of being decoded
+                   from disk every time. The same cache can be shared between calls.
         """
         # Check Output Path
         if file_exists(save_path) and not overwrite:
@@ -1553,39 +2392,41 @@ class COCO_Dataset:
             viewer = SimpleVideoViewer(preview_width=1000, window_name='Annotation Visualization')
 
         last_idx = len(self.images) if end_idx is None else end_idx
-        total_iter = len(self.images[start_idx:last_idx])
-        for coco_image in tqdm(self.images[start_idx:last_idx], total=total_iter, leave=False):
-            if show_annotations:
-                img = self.get_preview(
-                    image_id=coco_image.id,
-                    draw_order=draw_order,
-                    bbox_color=bbox_color, bbox_thickness=bbox_thickness, # BBox
-                    bbox_show_label=bbox_show_label, bbox_label_thickness=bbox_label_thickness,
-                    bbox_label_only=bbox_label_only,
-                    seg_color=seg_color, seg_transparent=seg_transparent, # Segmentation
-                    kpt_radius=kpt_radius, kpt_color=kpt_color, # Keypoints
-                    show_kpt_labels=show_kpt_labels, kpt_label_thickness=kpt_label_thickness,
-                    kpt_label_only=kpt_label_only, ignore_kpt_idx=ignore_kpt_idx,
-                    kpt_idx_offset=kpt_idx_offset,
-                    skeleton_thickness=skeleton_thickness, skeleton_color=skeleton_color, # Skeleton
-                    details_corner_pos_ratio=details_corner_pos_ratio,
-                    details_height_ratio=details_height_ratio,
-                    details_leeway=details_leeway, details_color=details_color,
-                    details_thickness=details_thickness,
-                    show_bbox=show_bbox, show_kpt=show_kpt,
-                    show_skeleton=show_skeleton, show_seg=show_seg,
-                    show_details=show_details
-                )
-            else:
-                img = cv2.imread(coco_image.coco_url)
-
+        preview_kwargs = dict(
+            draw_order=draw_order,
+            bbox_color=bbox_color, bbox_thickness=bbox_thickness, # BBox
+            bbox_show_label=bbox_show_label, bbox_label_thickness=bbox_label_thickness,
+            bbox_label_only=bbox_label_only,
+            seg_color=seg_color, seg_transparent=seg_transparent, # Segmentation
+            kpt_radius=kpt_radius, kpt_color=kpt_color, # Keypoints
+            show_kpt_labels=show_kpt_labels, kpt_label_thickness=kpt_label_thickness,
+            kpt_label_only=kpt_label_only, ignore_kpt_idx=ignore_kpt_idx,
+            kpt_idx_offset=kpt_idx_offset,
+            skeleton_thickness=skeleton_thickness, skeleton_color=skeleton_color, # Skeleton
+            details_corner_pos_ratio=details_corner_pos_ratio,
+            details_height_ratio=details_height_ratio,
+            details_leeway=details_leeway, details_color=details_color,
+            details_thickness=details_thickness,
+            show_bbox=show_bbox, show_kpt=show_kpt,
+            show_skeleton=show_skeleton, show_seg=show_seg,
+            show_details=show_details
+        ) if show_annotations else None
+
+        def get_frame(coco_image: COCO_Image) -> np.ndarray:
+            img = self._get_visualization(coco_image, preview_kwargs=preview_kwargs, img_cache=img_cache)
             if rescale_before_pad:
                 img = scale_to_max(img=img, target_shape=[max_h, max_w])
-            img = pad_to_max(img=img, target_shape=[max_h, max_w])
-            recorder.write(img)
-
-            if show_preview:
-                quit_flag = viewer.show(img)
-                if quit_flag:
-                    break
+            return pad_to_max(img=img, target_shape=[max_h, max_w])
+
+        coco_image_list = self.images[start_idx:last_idx]
+        with closing(
+            prefetch_map(get_frame, coco_image_list, workers=workers, max_prefetch=max_prefetch)
+        ) as frame_iter:
+            for img in tqdm(frame_iter, total=len(coco_image_list), leave=False):
+                recorder.write(img)
+
+                if show_preview:
+                    quit_flag = viewer.show(img)
+                    if quit_flag:
+                        break
         recorder.close()
\ No newline at end of file
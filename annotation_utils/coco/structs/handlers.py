@@ -4,6 +4,8 @@ from typing import List
 import json
 import operator
 import random
+import itertools
+import numpy as np
 
 from logger import logger
 from common_utils.check_utils import check_type, check_type_from_list, \
@@ -12,6 +14,8 @@ from common_utils.path_utils import get_extension_from_filename
 from common_utils.file_utils import file_exists
 
 from .objects import COCO_License, COCO_Image, COCO_Annotation, COCO_Category
+from .columns import COCO_Annotation_Columns, COCO_Annotation_View
+from .removal import cascade_remove
 from ...base import BaseStructHandler
 
 class COCO_License_Handler(BaseStructHandler['COCO_License_Handler', 'COCO_License']):
@@ -32,29 +36,12 @@ class COCO_License_Handler(BaseStructHandler['COCO_License_Handler', 'COCO_Licen
         return COCO_License_Handler.from_dict_list(json_data)
 
     def remove(self, id_list: List[int], verbose: bool=False):
-        # TODO: Create a base class that inherits from BaseStruct that requires an id class parameter
-        # This method could be added to the base handler of the resulting object class.
-        if len(id_list) > 0:
-            idx_list = list(range(len(self)))
-            idx_list.reverse()
-            for idx in idx_list:
-                if self[idx].id in id_list:
-                    del self[idx]
-                    if verbose:
-                        logger.info(f'Deleted License Id: {idx}')
+        self.remove_ids(set(id_list), verbose=verbose, label='License')
 
     def remove_if_no_imgs(self, img_handler: COCO_Image_Handler, id_list: List[int]=None, verbose: bool=False):
-        rm_license_id_list = []
-        if id_list is not None:
-            for license_id in id_list:
-                imgs = img_handler.get_images_from_licenseIds([license_id])
-                if len(imgs) == 0:
-                    rm_license_id_list.append(license_id)
-        else:
-            for coco_license in self:
-                imgs = img_handler.get_images_from_licenseIds([coco_license.id])
-                if len(imgs) == 0:
-                    rm_license_id_list.append(license_id)
+        used_license_ids = set(img_handler.get_attr_values('license_id'))
+        check_id_list = id_list if id_list is not None else self.get_attr_values('id')
+        rm_license_id_list = [license_id for license_id in check_id_list if license_id not in used_license_ids]
         self.remove(rm_license_id_list, verbose=verbose)
 
 class COCO_Image_Handler(BaseStructHandler['COCO_Image_Handler', 'COCO_Image']):
@@ -79,11 +66,11 @@ class COCO_Image_Handler(BaseStructHandler['COCO_Image_Handler', 'COCO_Image']):
                 extension_list.append(extension)
         return extension_list
 
-    def get_images_from_imgIds(self, imgIds: list) -> List[COCO_Image]:		
-	        return [x for x in self if x.id in imgIds]
+    def get_images_from_imgIds(self, imgIds: list) -> List[COCO_Image]:
+        return self.get_objs_from_attr_values('id', imgIds)
 
     def get_images_from_licenseIds(self, licenseIds: List[int]) -> List[COCO_Image]:
-        return [x for x in self if x.license_id in licenseIds]
+        return self.get_objs_from_attr_values('license_id', licenseIds)
 
     @classmethod
     def from_dict_list(cls, dict_list: List[dict]) -> COCO_Image_Handler:
@@ -98,16 +85,7 @@ class COCO_Image_Handler(BaseStructHandler['COCO_Image_Handler', 'COCO_Image']):
         return COCO_Image_Handler.from_dict_list(json_data)
 
     def remove(self, id_list: List[int], verbose: bool=False):
-        # TODO: Create a base class that inherits from BaseStruct that requires an id class parameter
-        # This method could be added to the base handler of the resulting object class.
-        if len(id_list) > 0:
-            idx_list = list(range(len(self)))
-            idx_list.reverse()
-            for idx in idx_list:
-                if self[idx].id in id_list:
-                    del self[idx]
-                    if verbose:
-                        logger.info(f'Deleted Image Id: {idx}')
+        self.remove_ids(set(id_list), verbose=verbose, label='Image')
     
     def remove_if_no_anns(self, ann_handler: COCO_Annotation_Handler, license_handler: COCO_License_Handler=None, id_list: List[int]=None, verbose: bool=False):
         """Removes all of the COCO_Image objects in the handler that do not have any corresponding annotations.
@@ -125,35 +103,29 @@ class COCO_Image_Handler(BaseStructHandler['COCO_Image_Handler', 'COCO_Image']):
                 If None, all images are checked.
             ] (default: {None})
         """
-        rm_image_id_list = []
-        if id_list is not None:
-            for image_id in id_list:
-                anns = ann_handler.get_annotations_from_imgIds([image_id])
-                if len(anns) == 0:
-                    rm_image_id_list.append(image_id)
-        else:
-            for coco_image in self:
-                anns = ann_handler.get_annotations_from_imgIds([coco_image.id])
-                if len(anns) == 0:
-                    rm_image_id_list.append(coco_image.id)
+        used_image_ids = set(ann_handler.get_attr_values('image_id'))
+        check_id_list = id_list if id_list is not None else self.get_attr_values('id')
+        rm_image_id_list = [image_id for image_id in check_id_list if image_id not in used_image_ids]
         self.remove(rm_image_id_list, verbose=verbose)
         if license_handler is not None:
-            pending_license_id_list = [license.id for license in license_handler]
-            license_handler.remove_if_no_imgs(img_handler=self, id_list=pending_license_id_list, verbose=verbose)
+            license_handler.remove_if_no_imgs(img_handler=self, verbose=verbose)
 
 class COCO_Annotation_Handler(BaseStructHandler['COCO_Annotation_Handler', 'COCO_Annotation']):
     def __init__(self, annotation_list: List[COCO_Annotation]=None):
         super().__init__(obj_type=COCO_Annotation, obj_list=annotation_list)
         self.annotation_list = self.obj_list
 
+    def _valid_obj_types(self) -> list:
+        return [COCO_Annotation, COCO_Annotation_View]
+
     def get_annotations_from_annIds(self, annIds: list) -> List[COCO_Annotation]:		
-        return [ann for ann in self if ann.id in annIds]		
+        return self.get_objs_from_attr_values('id', annIds)
         
-    def get_annotations_from_imgIds(self, imgIds: list) -> List[COCO_Annotation]:		
-        return [ann for ann in self if ann.image_id in imgIds]
+    def get_annotations_from_imgIds(self, imgIds: list) -> List[COCO_Annotation]:
+        return self.get_objs_from_attr_values('image_id', imgIds)
     
     def get_annotations_from_catIds(self, catIds: list) -> List[COCO_Annotation]:
-        return [ann for ann in self if ann.category_id in catIds]
+        return self.get_objs_from_attr_values('category_id', catIds)
 
     def to_dict_list(self, strict: bool=True) -> List[dict]:
         return [item.to_dict(strict=strict) for item in self]
@@ -166,52 +138,111 @@ class COCO_Annotation_Handler(BaseStructHandler['COCO_Annotation_Handler', 'COCO
         json.dump(json_data, open(save_path, 'w'), indent=2, ensure_ascii=False)
 
     @classmethod
-    def from_dict_list(cls, dict_list: List[dict], strict: bool=True) -> COCO_Annotation_Handler:
+    def from_dict_list(cls, dict_list: List[dict], strict: bool=True, columnar: bool=False, lazy: bool=False) -> COCO_Annotation_Handler:
+        """
+        columnar: If True, the annotations are stored in COCO_Annotation_Columns and the handler
+                  is filled with COCO_Annotation_View objects. Refer to from_columns.
+        lazy: If True, the geometry of each annotation is only built when it is first accessed.
+              Refer to COCO_Annotation.from_dict. Ignored when columnar is True.
+        """
+        if columnar:
+            return COCO_Annotation_Handler.from_columns(COCO_Annotation_Columns.from_dict_list(dict_list, strict=strict))
         return COCO_Annotation_Handler(
-            annotation_list=[COCO_Annotation.from_dict(ann_dict, strict=strict) for ann_dict in dict_list]
+            annotation_list=[COCO_Annotation.from_dict(ann_dict, strict=strict, lazy=lazy) for ann_dict in dict_list]
         )
 
     @classmethod
-    def load_from_path(cls, json_path: str, strict: bool=True) -> COCO_Annotation_Handler:
+    def load_from_path(cls, json_path: str, strict: bool=True, columnar: bool=False, lazy: bool=False) -> COCO_Annotation_Handler:
         check_file_exists(json_path)
         json_data = json.load(open(json_path, 'r'))
-        return COCO_Annotation_Handler.from_dict_list(json_data, strict=strict)
+        return COCO_Annotation_Handler.from_dict_list(json_data, strict=strict, columnar=columnar, lazy=lazy)
+
+    @classmethod
+    def from_columns(cls, columns: COCO_Annotation_Columns) -> COCO_Annotation_Handler:
+        """
+        Creates a handler that is backed by the given columns.
+        Each annotation in the handler is a COCO_Annotation_View, which only holds a row number,
+        so the memory footprint is mostly that of the numpy arrays in columns.
+        The handler can still be modified as usual. Appended objects may be regular COCO_Annotation objects.
+        """
+        return COCO_Annotation_Handler(
+            annotation_list=[COCO_Annotation_View(columns=columns, row=row) for row in range(len(columns))]
+        )
+
+    def to_columns(self) -> COCO_Annotation_Columns:
+        """
+        Returns the annotations of this handler (in handler order) as COCO_Annotation_Columns.
+        This is cheap when the handler is already backed by columns.
+        """
+        return COCO_Annotation_Columns.from_annotations(self.obj_list)
+
+    def _get_column(self, attr_name: str) -> np.ndarray:
+        """
+        Returns the values of attr_name straight from the columns if the handler is backed by columns
+        and attr_name is one of the id columns. Otherwise returns None.
+        """
+        if attr_name in ['id', 'image_id', 'category_id']:
+            shared_rows = COCO_Annotation_Columns.get_shared_rows(self.obj_list)
+            if shared_rows is not None:
+                columns, rows = shared_rows
+                return getattr(columns, attr_name)[rows]
+        return None
+
+    def get_attr_values(self, attr_name: str) -> list:
+        column = self._get_column(attr_name)
+        return column.tolist() if column is not None else super().get_attr_values(attr_name)
+
+    def get_attr_array(self, attr_name: str) -> np.ndarray:
+        column = self._get_column(attr_name)
+        return column if column is not None else super().get_attr_array(attr_name)
+
+    def get_keypoint_visibility(self) -> np.ndarray:
+        """
+        Returns the keypoint visibilities of all annotations as a float array of shape (N, K),
+        where K is the largest number of keypoints of any annotation. Shorter rows are zero padded.
+        The keypoints are read from the columns or from the raw lists of lazy annotations when possible,
+        so no keypoint objects need to be built.
+        """
+        shared_rows = COCO_Annotation_Columns.get_shared_rows(self.obj_list)
+        if shared_rows is not None:
+            columns, rows = shared_rows
+            return columns.keypoints[rows, :, 2]
+        vis_list = []
+        for ann in self.obj_list:
+            if type(ann) is COCO_Annotation_View:
+                vis_list.append(ann._columns.get_keypoints_arr(ann._row)[:, 2].tolist())
+                continue
+            kpt_list = ann._get_geometry_list('keypoints')
+            if kpt_list is not None:
+                vis_list.append(kpt_list[2::3])
+            else:
+                vis_list.append([kpt.visibility for kpt in ann.keypoints])
+        lengths = np.array([len(vis) for vis in vis_list], dtype=np.int64)
+        visibility = np.zeros((len(vis_list), lengths.max() if len(vis_list) > 0 else 0), dtype=np.float64)
+        if lengths.sum() > 0:
+            starts = np.cumsum(lengths) - lengths
+            positions = np.arange(lengths.sum(), dtype=np.int64) - np.repeat(starts, lengths)
+            visibility[np.repeat(np.arange(len(vis_list)), lengths), positions] = \
+                np.fromiter(itertools.chain.from_iterable(vis_list), dtype=np.float64, count=int(lengths.sum()))
+        return visibility
 
     def remove(self, id_list: List[int], verbose: bool=False):
-        # TODO: Create a base class that inherits from BaseStruct that requires an id class parameter
-        # This method could be added to the base handler of the resulting object class.
-        if len(id_list) > 0:
-            idx_list = list(range(len(self)))
-            idx_list.reverse()
-            for idx in idx_list:
-                if self[idx].id in id_list:
-                    del self[idx]
-                    if verbose:
-                        logger.info(f'Deleted Annotation Id: {idx}')
+        self.remove_ids(set(id_list), verbose=verbose, label='Annotation')
     
     def remove_if_no_categories(
         self, cat_handler: COCO_Category_Handler,
         img_handler: COCO_Image_Handler=None, license_handler: COCO_License_Handler=None, id_list: List[int]=None, verbose: bool=False
     ):
+        existing_cat_ids = set(cat_handler.get_attr_values('id'))
+        check_id_set = set(id_list) if id_list is not None else None
         rm_ann_id_list = []
-        pending_img_id_list = []
-        existing_cat_id_list = [cat.id for cat in cat_handler]
-
-        if id_list is not None:
-            anns = self.get_annotations_from_annIds(id_list)
-            for ann in anns:
-                if ann.category_id not in existing_cat_id_list:
-                    rm_ann_id_list.append(ann.id)
-                    pending_img_id_list.append(ann.image_id)
-        else:
-            for ann in self:
-                if ann.category_id not in existing_cat_id_list:
-                    rm_ann_id_list.append(ann.id)
-                    pending_img_id_list.append(ann.image_id)
-        
-        self.remove(rm_ann_id_list, verbose=verbose)
-        if img_handler is not None:
-            img_handler.remove_if_no_anns(ann_handler=self, license_handler=license_handler, id_list=pending_img_id_list, verbose=verbose)
+        for ann_id, category_id in zip(self.get_attr_values('id'), self.get_attr_values('category_id')):
+            if category_id not in existing_cat_ids and (check_id_set is None or ann_id in check_id_set):
+                rm_ann_id_list.append(ann_id)
+        cascade_remove(
+            license_handler=license_handler, img_handler=img_handler, ann_handler=self,
+            ann_ids=rm_ann_id_list, verbose=verbose
+        )
 
 class COCO_Category_Handler(BaseStructHandler['COCO_Category_Handler', 'COCO_Category']):
     def __init__(self, category_list: List[COCO_Category]=None):
@@ -263,16 +294,7 @@ class COCO_Category_Handler(BaseStructHandler['COCO_Category_Handler', 'COCO_Cat
         return COCO_Category_Handler.from_dict_list(json_data, strict=strict)
     
     def remove(self, id_list: List[int], verbose: bool=False):
-        # TODO: Create a base class that inherits from BaseStruct that requires an id class parameter
-        # This method could be added to the base handler of the resulting object class.
-        if len(id_list) > 0:
-            idx_list = list(range(len(self)))
-            idx_list.reverse()
-            for idx in idx_list:
-                if self[idx].id in id_list:
-                    del self[idx]
-                    if verbose:
-                        logger.info(f'Deleted Category Id: {idx}')
+        self.remove_ids(set(id_list), verbose=verbose, label='Category')
     
     def remove_by_name(
         self, names: List[str],
@@ -282,12 +304,7 @@ class COCO_Category_Handler(BaseStructHandler['COCO_Category_Handler', 'COCO_Cat
         existing_category_names = [coco_cat.name for coco_cat in self]
         check_value_from_list(names, valid_value_list=existing_category_names)
         rm_ids = [coco_cat.id for coco_cat in self if coco_cat.name in names]
-        self.remove(rm_ids, verbose=verbose)
-        if ann_handler is not None:
-            ann_handler.remove_if_no_categories(
-                cat_handler=self,
-                img_handler=img_handler,
-                license_handler=license_handler,
-                id_list=None,
-                verbose=verbose
-            )
\ No newline at end of file
+        cascade_remove(
+            license_handler=license_handler, img_handler=img_handler, ann_handler=ann_handler, cat_handler=self,
+            category_ids=rm_ids, verbose=verbose
+        )
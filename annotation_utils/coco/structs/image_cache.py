@@ -0,0 +1,102 @@
+from __future__ import annotations
+import os
+import threading
+from collections import OrderedDict
+import cv2
+import numpy as np
+
+from logger import logger
+
+class COCO_Image_Cache:
+    """
+    Size-bounded LRU cache of decoded images.
+    Each entry is keyed by the image path and the file's modification time, so an image that was
+    changed on disk is decoded again instead of being served from the cache.
+    When the total size of the cached images exceeds max_bytes, the least recently used images are dropped.
+
+        ```python
+        img_cache = COCO_Image_Cache(max_bytes=2**30)
+        for kpt_radius in [2, 4, 8]:
+            preview = dataset.get_preview(image_id=0, kpt_radius=kpt_radius, img_cache=img_cache)
+        dataset.display_preview(img_cache=img_cache)
+        ```
+
+    The same cache can be shared by get_preview, display_preview, save_visualization and save_video,
+    and it can be used from several threads at the same time.
+
+    max_bytes: The maximum total size (numpy nbytes) of the cached images.
+               Images that are larger than max_bytes on their own are never cached.
+    """
+    def __init__(self, max_bytes: int=2**30):
+        if max_bytes is None or max_bytes < 0:
+            logger.error(f'Invalid max_bytes: {max_bytes}')
+            raise Exception
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict() # path -> (mtime_ns, img). The last entry is the most recently used one.
+        self._num_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __str__(self) -> str:
+        return f'{type(self).__name__}({len(self)} images, {self.num_bytes}/{self.max_bytes} bytes, hits={self.hits}, misses={self.misses})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    def __getstate__(self) -> dict:
+        # Locks can't be pickled. A copy (e.g. in a worker process) starts out empty.
+        return {'max_bytes': self.max_bytes}
+
+    def __setstate__(self, state: dict):
+        self.__init__(max_bytes=state['max_bytes'])
+
+    @property
+    def num_bytes(self) -> int:
+        return self._num_bytes
+
+    def _remove(self, path: str):
+        _, img = self._entries.pop(path)
+        self._num_bytes -= img.nbytes
+
+    def imread(self, path: str, copy: bool=True) -> np.ndarray:
+        """
+        Returns the decoded image at path, the same as cv2.imread(path).
+        Like cv2.imread, None is returned if the image can't be read. Failed reads are not cached.
+
+        copy: If True, a copy of the cached image is returned, which can be modified freely.
+              If False, the cached array itself is returned. It is read-only, so copy it before drawing on it.
+        """
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return cv2.imread(path)
+        with self._lock:
+            entry = self._entries.get(path, None)
+            if entry is not None and entry[0] == mtime:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1].copy() if copy else entry[1]
+            self.misses += 1
+
+        img = cv2.imread(path)
+        if img is None:
+            return None
+        img.flags.writeable = False
+        with self._lock:
+            if path in self._entries:
+                self._remove(path)
+            if img.nbytes <= self.max_bytes:
+                self._entries[path] = (mtime, img)
+                self._num_bytes += img.nbytes
+                while self._num_bytes > self.max_bytes:
+                    self._remove(next(iter(self._entries)))
+        return img.copy() if copy else img
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._num_bytes = 0
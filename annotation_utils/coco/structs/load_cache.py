@@ -0,0 +1,389 @@
+from __future__ import annotations
+from typing import List
+import os
+import json
+import time
+import hashlib
+import numpy as np
+
+from logger import logger
+from common_utils.check_utils import check_file_exists, check_value
+from common_utils.file_utils import file_exists, make_dir_if_not_exists
+from common_utils.path_utils import get_filename
+from common_utils.common_types.keypoint import Keypoint3D_List
+
+from ..camera import Camera
+from .objects import COCO_Image, COCO_Annotation, LazyGeometry, \
+    _segmentation_from_list, _bbox_from_list, _keypoints_from_list, _keypoints_3d_from_list
+from .columns import COCO_Annotation_Columns
+from ..util.file_hash import hash_file
+
+_CACHE_VERSION = 2
+_CACHE_SUFFIX = '.coco_cache.npz'
+_COLUMN_NAMES = [
+    'id', 'image_id', 'category_id', 'bbox', 'area', 'iscrowd',
+    'num_keypoints', 'keypoints', 'kpt_count',
+    'seg_offsets', 'poly_offsets', 'coords'
+]
+_IMAGE_KEYS = ['license', 'file_name', 'coco_url', 'height', 'width', 'date_captured', 'flickr_url', 'id']
+_NUMBER_COLUMN_NAMES = ['bbox', 'area', 'keypoints', 'coords'] # float64 columns whose json values may have been ints
+
+def _get_int_masks(ann_dict_list: List[dict], columns: COCO_Annotation_Columns) -> dict:
+    """
+    Returns column name -> bool array with the shape of the column, which is True where the value in the
+    json file was an int. The columns are always float64, so this is needed to give back the original values.
+    """
+    masks = {name: np.zeros(getattr(columns, name).shape, dtype=bool) for name in _NUMBER_COLUMN_NAMES}
+    coord_idx = 0
+    for row, ann_dict in enumerate(ann_dict_list):
+        if 'bbox' in ann_dict:
+            masks['bbox'][row] = [type(val) is int for val in ann_dict['bbox']]
+        masks['area'][row] = 'area' in ann_dict and type(ann_dict['area']) is int
+        if 'keypoints' in ann_dict and len(ann_dict['keypoints']) > 0:
+            kpt_mask = np.array([type(val) is int for val in ann_dict['keypoints']]).reshape(-1, 3)
+            masks['keypoints'][row, :len(kpt_mask)] = kpt_mask
+        for polygon in ann_dict['segmentation'] if 'segmentation' in ann_dict else []:
+            masks['coords'][coord_idx:coord_idx+len(polygon)] = [type(val) is int for val in polygon]
+            coord_idx += len(polygon)
+    return masks
+
+def _restore_ints(arr: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """
+    Returns arr as an int64 array if every value was an int, as is if none were,
+    and otherwise as an object array that holds ints where mask is True.
+    """
+    if mask is None:
+        return arr
+    elif mask is True:
+        return arr.astype(np.int64)
+    result = arr.astype(object)
+    result[mask] = arr[mask].astype(np.int64).tolist()
+    return result
+
+def _build_annotations(
+    column_dict: dict, int_masks: dict, keypoints_3d_values: list, camera_values: list, lazy: bool=False
+) -> List[COCO_Annotation]:
+    """
+    Builds COCO_Annotation objects straight from the cached columns.
+    The result is the same as that of COCO_Annotation.from_dict(ann_dict, strict=True, lazy=lazy) for each
+    annotation in the json file, but no annotation dictionaries are created along the way.
+    """
+    if lazy:
+        geometry_from_list = LazyGeometry
+    else:
+        geometry_from_list = lambda value_list, builder: builder(value_list)
+    bbox_list = _restore_ints(column_dict['bbox'], int_masks['bbox']).tolist()
+    area_list = [
+        area if area == area else None # NaN where the area was not specified
+        for area in _restore_ints(column_dict['area'], int_masks['area']).tolist()
+    ]
+    iscrowd_list = [iscrowd if iscrowd != -1 else None for iscrowd in column_dict['iscrowd'].tolist()]
+    keypoints = _restore_ints(column_dict['keypoints'], int_masks['keypoints'])
+    kpt_rows = keypoints.reshape(keypoints.shape[0], keypoints.shape[1] * 3).tolist()
+    coords = _restore_ints(column_dict['coords'], int_masks['coords']).tolist()
+    poly_offsets = column_dict['poly_offsets'].tolist()
+    seg_offsets = column_dict['seg_offsets'].tolist()
+    ann_list = []
+    for row, (id, category_id, image_id, bbox, area, iscrowd, num_keypoints, kpts, kpt_count, kpts_3d, camera) in enumerate(
+        zip(
+            column_dict['id'].tolist(), column_dict['category_id'].tolist(), column_dict['image_id'].tolist(),
+            bbox_list, area_list, iscrowd_list, column_dict['num_keypoints'].tolist(),
+            kpt_rows, column_dict['kpt_count'].tolist(), keypoints_3d_values, camera_values
+        )
+    ):
+        segmentation = [coords[poly_offsets[j]:poly_offsets[j+1]] for j in range(seg_offsets[row], seg_offsets[row+1])]
+        ann_list.append(
+            COCO_Annotation(
+                id=id, category_id=category_id, image_id=image_id,
+                segmentation=geometry_from_list(segmentation, _segmentation_from_list),
+                bbox=geometry_from_list(bbox, _bbox_from_list),
+                area=area,
+                keypoints=geometry_from_list(kpts[:kpt_count*3], _keypoints_from_list),
+                num_keypoints=num_keypoints,
+                iscrowd=iscrowd,
+                keypoints_3d=geometry_from_list(kpts_3d, _keypoints_3d_from_list) if kpts_3d is not None else None,
+                camera=Camera.from_dict(camera) if camera is not None else None
+            )
+        )
+    return ann_list
+
+def _pack_values(prefix: str, values: list, arrays: dict):
+    """
+    Stores a list of json values in arrays under keys that start with prefix.
+        int values: an int64 array.
+        str/None values: one string table (utf-8 text + character offsets) and a None mask.
+        Anything else: a string table of json encoded values.
+    """
+    if all([type(val) is int for val in values]):
+        arrays[f'{prefix}/int'] = np.array(values, dtype=np.int64)
+        return
+    if all([type(val) is str or val is None for val in values]):
+        kind, str_list = 'str', [val if val is not None else '' for val in values]
+        arrays[f'{prefix}/none'] = np.array([val is None for val in values], dtype=bool)
+    else:
+        kind, str_list = 'json', [json.dumps(val, ensure_ascii=False) for val in values]
+    offsets = np.zeros(len(str_list) + 1, dtype=np.int64)
+    np.cumsum([len(text) for text in str_list], out=offsets[1:])
+    arrays[f'{prefix}/{kind}'] = np.frombuffer(''.join(str_list).encode('utf-8'), dtype=np.uint8)
+    arrays[f'{prefix}/offsets'] = offsets
+
+def _unpack_values(prefix: str, arrays) -> list:
+    if f'{prefix}/int' in arrays:
+        return arrays[f'{prefix}/int'].tolist()
+    kind = 'str' if f'{prefix}/str' in arrays else 'json'
+    text = arrays[f'{prefix}/{kind}'].tobytes().decode('utf-8')
+    offsets = arrays[f'{prefix}/offsets'].tolist()
+    str_list = [text[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+    if kind == 'json':
+        return [json.loads(val) for val in str_list]
+    return [
+        val if not is_none else None
+        for val, is_none in zip(str_list, arrays[f'{prefix}/none'].tolist())
+    ]
+
+class COCO_Load_Cache:
+    """
+    Binary snapshot cache for COCO json files.
+    The first time a json file is loaded through the cache, the parsed content is saved to a .npz file
+    (numpy arrays for the annotation columns and image fields, string tables for the text fields).
+    Later loads read the snapshot instead of parsing the json file, as long as the json file hasn't changed.
+
+        ```python
+        cache = COCO_Load_Cache()
+        dataset = COCO_Dataset.load_from_path('big.json', cache=cache)
+        ```
+
+    cache_dir: Directory where the snapshots are saved.
+               If None, each snapshot is saved next to its json file as <json_path>.coco_cache.npz
+    validation: How to decide whether a snapshot is still valid.
+        'stat': The json file's path, size and modification time must match. (Fast)
+        'hash': The sha1 hash of the json file's content must match.
+                Slower, but also works when files are touched without being changed, or copied.
+                (In cache_dir, snapshots are named after the content hash, so every copy of a json file
+                shares one snapshot. Without cache_dir, the snapshot has to be copied along with the json file.)
+    max_bytes: If not None, the least recently used snapshots in cache_dir are deleted whenever a new
+               snapshot is saved, until the total size of cache_dir's snapshots is at most max_bytes.
+               Only used when cache_dir is specified.
+    """
+    def __init__(self, cache_dir: str=None, validation: str='stat', max_bytes: int=None):
+        check_value(validation, valid_value_list=['stat', 'hash'])
+        self.cache_dir = cache_dir
+        self.validation = validation
+        self.max_bytes = max_bytes
+        self._hashes = {} # (abs_json_path, size, mtime_ns) -> sha1, so that each version of a file is only hashed once
+
+    def _hash_json(self, json_path: str) -> str:
+        stat = os.stat(json_path)
+        hash_key = (os.path.abspath(json_path), stat.st_size, stat.st_mtime_ns)
+        if hash_key not in self._hashes:
+            self._hashes[hash_key] = hash_file(json_path)
+        return self._hashes[hash_key]
+
+    def get_cache_path(self, json_path: str) -> str:
+        abs_json_path = os.path.abspath(json_path)
+        if self.cache_dir is None:
+            return f'{abs_json_path}{_CACHE_SUFFIX}'
+        if self.validation == 'hash':
+            return f'{self.cache_dir}/{self._hash_json(json_path)}{_CACHE_SUFFIX}'
+        path_hash = hashlib.sha1(abs_json_path.encode('utf-8')).hexdigest()[:16]
+        return f'{self.cache_dir}/{get_filename(abs_json_path)}.{path_hash}{_CACHE_SUFFIX}'
+
+    def _get_key(self, json_path: str, strict: bool) -> dict:
+        stat = os.stat(json_path)
+        key = {
+            'version': _CACHE_VERSION,
+            'size': stat.st_size,
+            'strict': strict
+        }
+        if self.validation == 'stat':
+            key['json_path'] = os.path.abspath(json_path)
+            key['mtime_ns'] = stat.st_mtime_ns
+        else:
+            key['sha1'] = self._hash_json(json_path)
+        return key
+
+    def _read_meta(self, arrays) -> dict:
+        return json.loads(arrays['meta'].tobytes().decode('utf-8'))
+
+    def is_valid(self, json_path: str, strict: bool=True) -> bool:
+        """
+        Returns True if there is an up to date snapshot of json_path.
+        """
+        cache_path = self.get_cache_path(json_path)
+        if not file_exists(cache_path):
+            return False
+        try:
+            with np.load(cache_path, allow_pickle=False) as arrays:
+                meta = self._read_meta(arrays)
+        except Exception:
+            return False
+        return meta['key'] == self._get_key(json_path, strict=strict)
+
+    def save(self, json_path: str, dataset_dict: dict, strict: bool=True):
+        """
+        Saves a snapshot of dataset_dict, which should be the parsed content of json_path.
+        """
+        check_file_exists(json_path)
+        # Get the key before writing, so that a json file that changes while the snapshot is written
+        # doesn't end up with a snapshot that looks valid.
+        key = self._get_key(json_path, strict=strict)
+        arrays = {}
+        columns = COCO_Annotation_Columns.from_dict_list(dataset_dict['annotations'], strict=strict)
+        for name in _COLUMN_NAMES:
+            arrays[f'annotations/{name}'] = getattr(columns, name)
+        int_columns = {}
+        for name, mask in _get_int_masks(dataset_dict['annotations'], columns).items():
+            if mask.all():
+                int_columns[name] = 'int'
+            elif mask.any():
+                int_columns[name] = 'mixed'
+                arrays[f'annotations/{name}/int_mask'] = mask
+            else:
+                int_columns[name] = 'float'
+        _pack_values(
+            'annotations/keypoints_3d',
+            [val.to_list(demarcation=False) if val is not None else None for val in columns.keypoints_3d.tolist()],
+            arrays
+        )
+        _pack_values(
+            'annotations/camera',
+            [val.to_dict() if val is not None else None for val in columns.camera.tolist()],
+            arrays
+        )
+        image_dict_list = dataset_dict['images']
+        for image_key in _IMAGE_KEYS:
+            _pack_values(
+                f'images/{image_key}',
+                [image_dict[image_key] if image_key in image_dict else None for image_dict in image_dict_list],
+                arrays
+            )
+        meta = {
+            'key': key,
+            'num_images': len(image_dict_list),
+            'int_columns': int_columns,
+            'info': dataset_dict['info'],
+            'licenses': dataset_dict['licenses'],
+            'categories': dataset_dict['categories']
+        }
+        arrays['meta'] = np.frombuffer(json.dumps(meta, ensure_ascii=False).encode('utf-8'), dtype=np.uint8)
+
+        cache_path = self.get_cache_path(json_path)
+        if self.cache_dir is not None:
+            make_dir_if_not_exists(self.cache_dir)
+        tmp_path = f'{cache_path}.tmp{os.getpid()}'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, cache_path)
+        if self.cache_dir is not None and self.max_bytes is not None:
+            self.evict(max_bytes=self.max_bytes, keep_path_list=[cache_path])
+
+    def load(
+        self, json_path: str, strict: bool=True, columnar: bool=True, lazy: bool=False
+    ) -> (dict, List[COCO_Image], COCO_Annotation_Columns):
+        """
+        Loads the snapshot of json_path.
+        Returns None if there is no valid snapshot.
+        Otherwise returns (meta, image_list, annotations), where meta contains the 'info', 'licenses' and 'categories'
+        sections of the json file as they were saved.
+
+        columnar: If True, annotations is a COCO_Annotation_Columns object. (All coordinates are floats.)
+                  If False, annotations is a list of COCO_Annotation objects in which every number has the same
+                  type (int or float) as in the json file.
+        lazy: Refer to COCO_Annotation.from_dict. Ignored when columnar is True.
+        """
+        cache_path = self.get_cache_path(json_path)
+        if not file_exists(cache_path):
+            return None
+        try:
+            arrays = np.load(cache_path, allow_pickle=False)
+        except Exception:
+            logger.warning(f'Failed to read cache file: {cache_path}')
+            return None
+        with arrays:
+            meta = self._read_meta(arrays)
+            if meta['key'] != self._get_key(json_path, strict=strict):
+                return None
+            column_dict = {name: arrays[f'annotations/{name}'] for name in _COLUMN_NAMES}
+            int_masks = {} # name -> True (all ints), None (no ints) or the int mask
+            for name, kind in meta['int_columns'].items():
+                if kind == 'mixed':
+                    int_masks[name] = arrays[f'annotations/{name}/int_mask']
+                else:
+                    int_masks[name] = True if kind == 'int' else None
+            keypoints_3d_values = _unpack_values('annotations/keypoints_3d', arrays)
+            camera_values = _unpack_values('annotations/camera', arrays)
+            image_values = [_unpack_values(f'images/{image_key}', arrays) for image_key in _IMAGE_KEYS]
+            image_list = [
+                COCO_Image(
+                    license_id=license_id, file_name=file_name, coco_url=coco_url,
+                    height=height, width=width, date_captured=date_captured,
+                    flickr_url=flickr_url, id=id
+                )
+                for license_id, file_name, coco_url, height, width, date_captured, flickr_url, id in zip(*image_values)
+            ]
+        # Used as the last access time for least recently used eviction.
+        os.utime(cache_path)
+        if not columnar:
+            return meta, image_list, _build_annotations(column_dict, int_masks, keypoints_3d_values, camera_values, lazy=lazy)
+        columns = COCO_Annotation_Columns(**column_dict)
+        for row, val in enumerate(keypoints_3d_values):
+            if val is not None:
+                columns.keypoints_3d[row] = Keypoint3D_List.from_list(val, demarcation=False)
+        for row, val in enumerate(camera_values):
+            if val is not None:
+                columns.camera[row] = Camera.from_dict(val)
+        return meta, image_list, columns
+
+    def invalidate(self, json_path: str):
+        """
+        Deletes the snapshot of json_path, if there is one.
+        """
+        cache_path = self.get_cache_path(json_path)
+        if file_exists(cache_path):
+            os.remove(cache_path)
+
+    def get_cache_path_list(self) -> List[str]:
+        """
+        Returns the paths of all of the snapshots in cache_dir.
+        """
+        if self.cache_dir is None:
+            logger.error(f'There is no cache_dir to search. Snapshots are saved next to their json files.')
+            raise Exception
+        if not os.path.isdir(self.cache_dir):
+            return []
+        return [
+            f'{self.cache_dir}/{filename}' for filename in os.listdir(self.cache_dir)
+            if filename.endswith(_CACHE_SUFFIX)
+        ]
+
+    def evict(self, max_bytes: int=None, max_age: float=None, keep_path_list: List[str]=None):
+        """
+        Deletes snapshots from cache_dir.
+
+        max_bytes: Delete the least recently used snapshots until the total size is at most max_bytes.
+        max_age: Delete all snapshots that haven't been used for more than max_age seconds.
+        keep_path_list: Snapshots that should never be deleted.
+        """
+        keep_path_list = keep_path_list if keep_path_list is not None else []
+        entries = []
+        for cache_path in self.get_cache_path_list():
+            stat = os.stat(cache_path)
+            entries.append([stat.st_mtime, stat.st_size, cache_path])
+        entries.sort()
+        now = time.time()
+        total_bytes = sum([size for _, size, _ in entries])
+        for last_used, size, cache_path in entries:
+            if cache_path in keep_path_list:
+                continue
+            too_old = max_age is not None and now - last_used > max_age
+            too_big = max_bytes is not None and total_bytes > max_bytes
+            if too_old or too_big:
+                os.remove(cache_path)
+                total_bytes -= size
+
+    def clear(self):
+        """
+        Deletes all of the snapshots in cache_dir.
+        """
+        for cache_path in self.get_cache_path_list():
+            os.remove(cache_path)
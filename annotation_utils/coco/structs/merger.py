@@ -0,0 +1,235 @@
+from __future__ import annotations
+from typing import List
+import json
+import itertools
+
+from logger import logger
+from common_utils.check_utils import check_file_exists, check_required_keys
+from common_utils.file_utils import file_exists
+
+from .objects import _to_hashable
+from .handlers import COCO_License_Handler, COCO_Category_Handler, \
+    COCO_License, COCO_Image, COCO_Annotation, COCO_Category
+from ..util import COCO_Mapper_Handler
+
+class COCO_Merger:
+    """
+    Merges COCO datasets one at a time. This is the core of COCO_Dataset.combine.
+
+    Licenses, images and categories that are equal to one that was already merged (refer to is_equal_to)
+    are not added again. Instead, their ids are mapped to the id of the existing one.
+    The merged licenses and categories are kept in self.licenses and self.categories,
+    while the new images and the remapped annotations of each dataset are returned by merge,
+    so that the caller can decide whether to keep them in memory or write them out.
+
+    keep_id_maps: If False, the id maps of a dataset are discarded once it has been merged.
+                  This keeps memory bounded when many datasets are merged one at a time.
+    """
+    def __init__(self, keep_id_maps: bool=True):
+        self.licenses = COCO_License_Handler()
+        self.categories = COCO_Category_Handler()
+        self.map_handler = COCO_Mapper_Handler()
+        self.keep_id_maps = keep_id_maps
+        # Canonical key -> merged id. Replaces comparing every new item against every existing one.
+        self.license_key2id = {}
+        self.image_key2id = {}
+        self.category_key2id = {}
+        self.num_images = 0
+        self.num_annotations = 0
+        self.merged_keys = [] # The unique_key of every dataset that has been merged so far, in order.
+
+    def merge(self, dataset, unique_key, check_paths: bool=True) -> (List[COCO_Image], List[COCO_Annotation]):
+        """
+        Merges the licenses and categories of dataset into self.licenses and self.categories,
+        and returns (new_image_list, new_ann_list).
+        new_image_list only contains the images that weren't merged before.
+        Every returned object is a copy with updated ids.
+
+        dataset: The COCO_Dataset to merge.
+        unique_key: A key that is different for every merged dataset. Used for the id maps.
+        check_paths: If True, an error is thrown if the image file of any image cannot be found.
+        """
+        if not self.keep_id_maps:
+            self.map_handler = COCO_Mapper_Handler()
+        self.merged_keys.append(unique_key)
+        new_image_list, new_ann_list = [], []
+
+        # Process Licenses
+        for coco_license in dataset.licenses:
+            license_key = coco_license.get_canonical_key(exclude_id=True)
+            if license_key in self.license_key2id:
+                self.map_handler.license_mapper.add(
+                    unique_key=unique_key, old_id=coco_license.id, new_id=self.license_key2id[license_key]
+                )
+            else:
+                new_license = coco_license.copy()
+                new_license.id = len(self.licenses)
+                self.map_handler.license_mapper.add(
+                    unique_key=unique_key, old_id=coco_license.id, new_id=new_license.id
+                )
+                self.licenses.append(new_license)
+                self.license_key2id[license_key] = new_license.id
+
+        # Process Images
+        for coco_image in dataset.images:
+            if check_paths:
+                check_file_exists(coco_image.coco_url)
+            image_key = coco_image.get_canonical_key(exclude_id=True)
+            if image_key in self.image_key2id:
+                self.map_handler.image_mapper.add(
+                    unique_key=unique_key, old_id=coco_image.id, new_id=self.image_key2id[image_key]
+                )
+            else:
+                new_image = coco_image.copy()
+                new_image.id = self.num_images
+                self.map_handler.image_mapper.add(
+                    unique_key=unique_key, old_id=coco_image.id, new_id=new_image.id
+                )
+                found, new_image.license_id = self.map_handler.license_mapper.get_new_id(
+                    unique_key=unique_key, old_id=coco_image.license_id
+                )
+                if not found:
+                    logger.error(f"Couldn't find license map using unique_key={unique_key}, old_id={coco_image.license_id}")
+                    raise Exception
+                new_image_list.append(new_image)
+                self.image_key2id[image_key] = new_image.id
+                self.num_images += 1
+
+        # Process Categories
+        for coco_category in dataset.categories:
+            category_key = coco_category.get_canonical_key(exclude_id=True)
+            if category_key in self.category_key2id:
+                self.map_handler.category_mapper.add(
+                    unique_key=unique_key, old_id=coco_category.id, new_id=self.category_key2id[category_key]
+                )
+            else:
+                new_category = coco_category.copy()
+                new_category.id = len(self.categories)
+                self.map_handler.category_mapper.add(
+                    unique_key=unique_key, old_id=coco_category.id, new_id=new_category.id
+                )
+                self.categories.append(new_category)
+                self.category_key2id[category_key] = new_category.id
+
+        # Process Annotations
+        for coco_ann in dataset.annotations:
+            new_ann = coco_ann.copy()
+            new_ann.id = self.num_annotations
+            found, new_ann.image_id = self.map_handler.image_mapper.get_new_id(
+                unique_key=unique_key, old_id=coco_ann.image_id
+            )
+            if not found:
+                logger.error(f"Couldn't find image map using unique_key={unique_key}, old_id={coco_ann.image_id}")
+                raise Exception
+            found, new_ann.category_id = self.map_handler.category_mapper.get_new_id(
+                unique_key=unique_key, old_id=coco_ann.category_id
+            )
+            if not found:
+                logger.error(f"Couldn't find category map using unique_key={unique_key}, old_id={coco_ann.category_id}")
+                raise Exception
+            new_ann_list.append(new_ann)
+            self.num_annotations += 1
+
+        return new_image_list, new_ann_list
+
+    def _get_mappers(self) -> dict:
+        return {
+            'license_mapper': self.map_handler.license_mapper,
+            'image_mapper': self.map_handler.image_mapper,
+            'annotation_mapper': self.map_handler.annotation_mapper,
+            'category_mapper': self.map_handler.category_mapper
+        }
+
+    def get_checkpoint(self) -> dict:
+        """
+        Returns how much has been merged so far. Pass it to to_dict later to get only what was merged after it.
+        """
+        return {
+            'licenses': len(self.licenses),
+            'categories': len(self.categories),
+            'license_key2id': len(self.license_key2id),
+            'image_key2id': len(self.image_key2id),
+            'category_key2id': len(self.category_key2id),
+            'map_handler': {name: len(mapper) for name, mapper in self._get_mappers().items()},
+            'merged_keys': len(self.merged_keys)
+        }
+
+    def to_dict(self, since: dict=None) -> dict:
+        """
+        Everything that is needed to continue merging later, in a json compatible format.
+
+        since: If not None, a checkpoint from get_checkpoint. Only what was merged after the checkpoint is included,
+               so the size of the result doesn't grow with the number of datasets that were merged before it.
+               Use update_from_dict to apply the result to a merger that has been restored up to the checkpoint.
+               (Merging only ever appends, so the entries after the checkpoint are always the new ones.)
+        """
+        if since is None:
+            since = COCO_Merger(keep_id_maps=self.keep_id_maps).get_checkpoint()
+        # When id maps aren't kept, the current maps all belong to the last merged dataset.
+        map_starts = since['map_handler'] if self.keep_id_maps else dict.fromkeys(since['map_handler'], 0)
+        return {
+            'licenses': [coco_license.to_dict() for coco_license in self.licenses.license_list[since['licenses']:]],
+            'categories': [coco_category.to_dict() for coco_category in self.categories.category_list[since['categories']:]],
+            'map_handler': {
+                name: [
+                    {'unique_key': id_map.unique_key, 'old_id': id_map.old_id, 'new_id': id_map.new_id}
+                    for id_map in mapper.id_maps[map_starts[name]:]
+                ]
+                for name, mapper in self._get_mappers().items()
+            },
+            'keep_id_maps': self.keep_id_maps,
+            'license_key2id': [[key, id] for key, id in itertools.islice(self.license_key2id.items(), since['license_key2id'], None)],
+            'image_key2id': [[key, id] for key, id in itertools.islice(self.image_key2id.items(), since['image_key2id'], None)],
+            'category_key2id': [[key, id] for key, id in itertools.islice(self.category_key2id.items(), since['category_key2id'], None)],
+            'num_images': self.num_images,
+            'num_annotations': self.num_annotations,
+            'merged_keys': self.merged_keys[since['merged_keys']:]
+        }
+
+    def update_from_dict(self, merger_dict: dict):
+        """
+        Applies the output of to_dict(since=checkpoint) to a merger that is at that checkpoint.
+        """
+        check_required_keys(
+            merger_dict,
+            required_keys=[
+                'licenses', 'categories', 'map_handler', 'keep_id_maps',
+                'license_key2id', 'image_key2id', 'category_key2id',
+                'num_images', 'num_annotations', 'merged_keys'
+            ]
+        )
+        for license_dict in merger_dict['licenses']:
+            self.licenses.append(COCO_License.from_dict(license_dict))
+        for category_dict in merger_dict['categories']:
+            self.categories.append(COCO_Category.from_dict(category_dict))
+        if not self.keep_id_maps and len(merger_dict['merged_keys']) > 0:
+            self.map_handler = COCO_Mapper_Handler()
+        for name, mapper in self._get_mappers().items():
+            for item_dict in merger_dict['map_handler'][name]:
+                mapper.add(unique_key=item_dict['unique_key'], old_id=item_dict['old_id'], new_id=item_dict['new_id'])
+        # Keys are saved as json lists, so they need to be converted back to tuples.
+        self.license_key2id.update({_to_hashable(key): id for key, id in merger_dict['license_key2id']})
+        self.image_key2id.update({_to_hashable(key): id for key, id in merger_dict['image_key2id']})
+        self.category_key2id.update({_to_hashable(key): id for key, id in merger_dict['category_key2id']})
+        self.num_images = merger_dict['num_images']
+        self.num_annotations = merger_dict['num_annotations']
+        self.merged_keys.extend(merger_dict['merged_keys'])
+
+    @classmethod
+    def from_dict(cls, merger_dict: dict) -> COCO_Merger:
+        check_required_keys(merger_dict, required_keys=['keep_id_maps'])
+        merger = COCO_Merger(keep_id_maps=merger_dict['keep_id_maps'])
+        merger.update_from_dict(merger_dict)
+        return merger
+
+    def save_to_path(self, save_path: str, overwrite: bool=False):
+        if file_exists(save_path) and not overwrite:
+            logger.error(f'File already exists at save_path: {save_path}')
+            raise Exception
+        json.dump(self.to_dict(), open(save_path, 'w'), ensure_ascii=False)
+
+    @classmethod
+    def load_from_path(cls, json_path: str) -> COCO_Merger:
+        check_file_exists(json_path)
+        json_dict = json.load(open(json_path, 'r'))
+        return COCO_Merger.from_dict(json_dict)
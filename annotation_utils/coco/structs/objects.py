@@ -67,8 +67,19 @@ class COCO_Info(BaseStructObject['COCO_Info']):
         json_dict = json.load(open(json_path, 'r'))
         return COCO_Info.from_dict(json_dict)
 
+def _to_hashable(value):
+    if type(value) in [list, tuple]:
+        return tuple([_to_hashable(val) for val in value])
+    elif type(value) is dict:
+        return tuple([(key, _to_hashable(val)) for key, val in value.items()])
+    else:
+        return value
+
 class COCO_License(BaseStructObject['COCO_License']):
+    __slots__ = ['url', 'id', 'name', '_index_watchers']
+
     def __init__(self, url: str, id: int, name: str):
+        self._index_watchers = None
         self.url = url
         self.id = id
         self.name = name
@@ -84,6 +95,15 @@ class COCO_License(BaseStructObject['COCO_License']):
             result = result and self.id == other.id
         return result
 
+    def get_canonical_key(self, exclude_id: bool=True) -> tuple:
+        """
+        Returns a hashable key that is the same for two licenses if and only if is_equal_to would return True.
+        """
+        key = (self.url, self.name)
+        if not exclude_id:
+            key += (self.id,)
+        return _to_hashable(key)
+
     @classmethod
     def from_dict(cls, license_dict: dict) -> COCO_License:
         check_required_keys(
@@ -103,10 +123,13 @@ class COCO_License(BaseStructObject['COCO_License']):
         return COCO_License.from_dict(json_dict)
 
 class COCO_Image(BaseStructObject['COCO_License']):
+    __slots__ = ['license_id', 'file_name', 'coco_url', 'height', 'width', 'date_captured', 'flickr_url', 'id', '_index_watchers']
+
     def __init__(
         self, license_id: int, file_name: str, coco_url: str,
         height: int, width: int, date_captured: str, flickr_url: str, id: int
     ):
+        self._index_watchers = None
         self.license_id = license_id
         self.file_name = file_name
         self.coco_url = coco_url
@@ -145,6 +168,17 @@ class COCO_Image(BaseStructObject['COCO_License']):
             result = result and self.license_id == other.license_id
         return result
 
+    def get_canonical_key(self, exclude_id: bool=True, exclude_date_captured: bool=False) -> tuple:
+        """
+        Returns a hashable key that is the same for two images if and only if is_equal_to would return True.
+        """
+        key = (self.file_name, self.coco_url, self.height, self.width, self.flickr_url)
+        if not exclude_date_captured:
+            key += (self.date_captured,)
+        if not exclude_id:
+            key += (self.id, self.license_id)
+        return _to_hashable(key)
+
     def to_dict(self) -> dict:
         return {
             'license': self.license_id,
@@ -200,40 +234,66 @@ class COCO_Image(BaseStructObject['COCO_License']):
         json_dict = json.load(open(json_path, 'r'))
         return COCO_Image.from_dict(json_dict)
 
-class COCO_Annotation(BaseStructObject['COCO_License']):
-    def __init__(
-        self,
-        id: int, category_id: int, image_id: int, # Standard Required
-        segmentation: Segmentation=None, # Standard Optional
-        bbox: BBox=None, area: float=None,
-        keypoints: Keypoint2D_List=None, num_keypoints: int=None,
-        iscrowd: int=0,
-        keypoints_3d: Keypoint3D_List=None, camera: Camera=None # Custom Optional
-    ):
-        # Standard Required
-        self.id = id
-        self.category_id = category_id
-        self.image_id = image_id
+def _segmentation_from_list(value_list: list) -> Segmentation:
+    return Segmentation.from_list(value_list, demarcation=False)
 
-        # Standard Optional
-        self.segmentation = segmentation if segmentation is not None else Segmentation([])
-        if bbox is not None:
-            self.bbox = bbox
-        else:
-            if len(self.segmentation) > 0:
-                self.bbox = self.segmentation.to_bbox()
-            else:
-                logger.error(f'A COCO_Annotation needs to be given either a bbox or a non-empty segmentation at the very least to make a valid annotation.')
-                logger.error(f'id: {id}, category_id: {category_id}, image_id: {image_id}')
-                raise Exception
-        self.area = area
-        self.keypoints = keypoints if keypoints is not None else Keypoint2D_List([])
-        self.num_keypoints = num_keypoints if num_keypoints is not None else len(self.keypoints)
-        self.iscrowd = iscrowd
+def _bbox_from_list(value_list: list) -> BBox:
+    return BBox.from_list(value_list, input_format='pminsize')
 
-        # Custom Optional
-        self.keypoints_3d = keypoints_3d
-        self.camera = camera
+def _keypoints_from_list(value_list: list) -> Keypoint2D_List:
+    return Keypoint2D_List.from_list(value_list, demarcation=False)
+
+def _keypoints_3d_from_list(value_list: list) -> Keypoint3D_List:
+    return Keypoint3D_List.from_list(value_list, demarcation=False)
+
+class LazyGeometry:
+    """
+    Placeholder for a COCO_Annotation geometry attribute that has not been built yet.
+    Holds the raw list from the annotation dictionary and the function that converts it to an object.
+    """
+    __slots__ = ['value_list', 'builder']
+
+    def __init__(self, value_list: list, builder):
+        self.value_list = value_list
+        self.builder = builder
+
+    def __str__(self) -> str:
+        return f'LazyGeometry({self.value_list})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    def build(self):
+        return self.builder(self.value_list)
+
+    def copy(self) -> LazyGeometry:
+        return LazyGeometry(value_list=self.value_list.copy(), builder=self.builder)
+
+class COCO_Annotation_Base(BaseStructObject['COCO_License']):
+    """
+    The part of COCO_Annotation that doesn't depend on how the attributes are stored.
+    It has no slots of its own, so subclasses that keep their attributes elsewhere (COCO_Annotation_View)
+    don't carry the storage of COCO_Annotation.
+    Subclasses provide the attributes of COCO_Annotation as well as copy and to_dict.
+    Annotations are compared by value, regardless of how they are stored.
+    """
+    __slots__ = []
+
+    def _get_key_values(self) -> list:
+        # Geometry is compared after it is built, so that a lazily loaded annotation equals the same annotation loaded eagerly.
+        return [
+            self.id, self.category_id, self.image_id,
+            self.segmentation, self.bbox, self.area, self.keypoints, self.num_keypoints, self.iscrowd,
+            self.keypoints_3d, self.camera
+        ]
+
+    def __hash__(self):
+        return hash(tuple(self._get_key_values()))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, COCO_Annotation_Base):
+            return self._get_key_values() == other._get_key_values()
+        return NotImplemented
 
     def __str__(self) -> str:
         print_str = 'COCO_Annotation'
@@ -262,45 +322,6 @@ class COCO_Annotation(BaseStructObject['COCO_License']):
         print_str += '\t'*indent + f'camera: {self.camera}'
         return print_str
 
-    def to_dict(self, strict: bool=True) -> dict:
-        if strict:
-            data_dict = {
-                'segmentation': self.segmentation.to_list(demarcation=False),
-                'num_keypoints': self.num_keypoints,
-                'area': self.area,
-                'iscrowd': self.iscrowd,
-                'keypoints': self.keypoints.to_list(demarcation=False),
-                'image_id': self.image_id,
-                'bbox': self.bbox.to_list(output_format='pminsize'),
-                'category_id': self.category_id,
-                'id': self.id
-            }
-            if self.keypoints_3d is not None:
-                data_dict['keypoints_3d'] = self.keypoints_3d.to_list(demarcation=False)
-            if self.camera is not None:
-                data_dict['camera_params'] = self.camera.to_dict()
-            return data_dict
-        else:
-            data_dict = {
-                'bbox': self.bbox.to_list(output_format='pminsize'),
-                'area': self.area,
-                'iscrowd': self.iscrowd,
-                'image_id': self.image_id,
-                'category_id': self.category_id,
-                'id': self.id
-            }
-            if len(self.segmentation) > 0:
-                data_dict['segmentation'] = self.segmentation.to_list(demarcation=False)
-            if len(self.keypoints) > 0:
-                data_dict['keypoints'] = self.keypoints.to_list(demarcation=False)
-                data_dict['num_keypoints'] = self.num_keypoints
-
-            if self.keypoints_3d is not None:
-                data_dict['keypoints_3d'] = self.keypoints_3d.to_list(demarcation=False)
-            if self.camera is not None:
-                data_dict['camera_params'] = self.camera.to_dict()
-            return data_dict
-
     def save_to_path(self, save_path: str, overwrite: bool=False, strict: bool=True):
         if file_exists(save_path) and not overwrite:
             logger.error(f'File already exists at save_path: {save_path}')
@@ -309,7 +330,16 @@ class COCO_Annotation(BaseStructObject['COCO_License']):
         json.dump(json_dict, open(save_path, 'w'), indent=2, ensure_ascii=False)
 
     @classmethod
-    def from_dict(cls, ann_dict: dict, strict: bool=True) -> COCO_Annotation:
+    def from_dict(cls, ann_dict: dict, strict: bool=True, lazy: bool=False) -> COCO_Annotation:
+        """
+        lazy: If True, segmentation, bbox, keypoints and keypoints_3d are kept as raw lists and are only
+              converted to objects the first time that they are accessed.
+              This makes loading much faster for jobs that don't need the geometry of every annotation.
+        """
+        if lazy:
+            geometry_from_list = lambda value_list, builder: LazyGeometry(value_list, builder)
+        else:
+            geometry_from_list = lambda value_list, builder: builder(value_list)
         if strict:
             check_required_keys(
                 ann_dict,
@@ -319,17 +349,20 @@ class COCO_Annotation(BaseStructObject['COCO_License']):
                     'bbox', 'category_id', 'id'
                 ]
             )
+            num_keypoints = ann_dict['num_keypoints']
+            if num_keypoints is None and lazy:
+                num_keypoints = len(ann_dict['keypoints']) // 3
             return COCO_Annotation(
-                segmentation=Segmentation.from_list(ann_dict['segmentation'], demarcation=False),
-                num_keypoints=ann_dict['num_keypoints'],
+                segmentation=geometry_from_list(ann_dict['segmentation'], _segmentation_from_list),
+                num_keypoints=num_keypoints,
                 area=ann_dict['area'],
                 iscrowd=ann_dict['iscrowd'],
-                keypoints=Keypoint2D_List.from_list(ann_dict['keypoints'], demarcation=False),
+                keypoints=geometry_from_list(ann_dict['keypoints'], _keypoints_from_list),
                 image_id=ann_dict['image_id'],
-                bbox=BBox.from_list(ann_dict['bbox'], input_format='pminsize'),
+                bbox=geometry_from_list(ann_dict['bbox'], _bbox_from_list),
                 category_id=ann_dict['category_id'],
                 id=ann_dict['id'],
-                keypoints_3d=Keypoint3D_List.from_list(ann_dict['keypoints_3d'], demarcation=False) if 'keypoints_3d' in ann_dict else None,
+                keypoints_3d=geometry_from_list(ann_dict['keypoints_3d'], _keypoints_3d_from_list) if 'keypoints_3d' in ann_dict else None,
                 camera=Camera.from_dict(ann_dict['camera_params']) if 'camera_params' in ann_dict else None
             )
         else:
@@ -339,17 +372,23 @@ class COCO_Annotation(BaseStructObject['COCO_License']):
                     'id', 'category_id', 'image_id'
                 ]
             )
+            if 'num_keypoints' in ann_dict and ann_dict['num_keypoints'] is not None:
+                num_keypoints = ann_dict['num_keypoints']
+            elif lazy and 'keypoints' in ann_dict:
+                num_keypoints = len(ann_dict['keypoints']) // 3
+            else:
+                num_keypoints = None
             return COCO_Annotation(
-                segmentation=Segmentation.from_list(ann_dict['segmentation'], demarcation=False) if 'segmentation' in ann_dict else None,
-                num_keypoints=ann_dict['num_keypoints'] if 'num_keypoints' in ann_dict else None,
+                segmentation=geometry_from_list(ann_dict['segmentation'], _segmentation_from_list) if 'segmentation' in ann_dict else None,
+                num_keypoints=num_keypoints,
                 area=ann_dict['area'] if 'area' in ann_dict else None,
                 iscrowd=ann_dict['iscrowd'] if 'iscrowd' in ann_dict else None,
-                keypoints=Keypoint2D_List.from_list(ann_dict['keypoints'], demarcation=False) if 'keypoints' in ann_dict else None,
+                keypoints=geometry_from_list(ann_dict['keypoints'], _keypoints_from_list) if 'keypoints' in ann_dict else None,
                 image_id=ann_dict['image_id'],
-                bbox=BBox.from_list(ann_dict['bbox'], input_format='pminsize') if 'bbox' in ann_dict else None,
+                bbox=geometry_from_list(ann_dict['bbox'], _bbox_from_list) if 'bbox' in ann_dict else None,
                 category_id=ann_dict['category_id'],
                 id=ann_dict['id'],
-                keypoints_3d=Keypoint3D_List.from_list(ann_dict['keypoints_3d'], demarcation=False) if 'keypoints_3d' in ann_dict else None,
+                keypoints_3d=geometry_from_list(ann_dict['keypoints_3d'], _keypoints_3d_from_list) if 'keypoints_3d' in ann_dict else None,
                 camera=Camera.from_dict(ann_dict['camera_params']) if 'camera_params' in ann_dict else None
             )
 
@@ -359,10 +398,164 @@ class COCO_Annotation(BaseStructObject['COCO_License']):
         json_dict = json.load(open(json_path, 'r'))
         return COCO_Annotation.from_dict(ann_dict=json_dict, strict=strict)
 
+class COCO_Annotation(COCO_Annotation_Base):
+    # The geometry attributes are kept in underscored slots behind properties so that they can be built lazily.
+    __slots__ = [
+        'id', 'category_id', 'image_id',
+        '_segmentation', '_bbox', 'area', '_keypoints', 'num_keypoints', 'iscrowd',
+        '_keypoints_3d', 'camera', '_index_watchers'
+    ]
+
+    def __init__(
+        self,
+        id: int, category_id: int, image_id: int, # Standard Required
+        segmentation: Segmentation=None, # Standard Optional
+        bbox: BBox=None, area: float=None,
+        keypoints: Keypoint2D_List=None, num_keypoints: int=None,
+        iscrowd: int=0,
+        keypoints_3d: Keypoint3D_List=None, camera: Camera=None # Custom Optional
+    ):
+        self._index_watchers = None
+
+        # Standard Required
+        self.id = id
+        self.category_id = category_id
+        self.image_id = image_id
+
+        # Standard Optional
+        self.segmentation = segmentation if segmentation is not None else Segmentation([])
+        if bbox is not None:
+            self.bbox = bbox
+        else:
+            if len(self.segmentation) > 0:
+                self.bbox = self.segmentation.to_bbox()
+            else:
+                logger.error(f'A COCO_Annotation needs to be given either a bbox or a non-empty segmentation at the very least to make a valid annotation.')
+                logger.error(f'id: {id}, category_id: {category_id}, image_id: {image_id}')
+                raise Exception
+        self.area = area
+        self.keypoints = keypoints if keypoints is not None else Keypoint2D_List([])
+        self.num_keypoints = num_keypoints if num_keypoints is not None else len(self.keypoints)
+        self.iscrowd = iscrowd
+
+        # Custom Optional
+        self.keypoints_3d = keypoints_3d
+        self.camera = camera
+
+    def _get_geometry(self, name: str):
+        value = getattr(self, f'_{name}')
+        if type(value) is LazyGeometry:
+            value = value.build()
+            setattr(self, f'_{name}', value)
+        return value
+
+    def copy(self) -> COCO_Annotation:
+        """
+        Geometry that hasn't been built yet stays lazy in the copy, but the copy gets its own placeholder.
+        """
+        attr_values = [
+            value.copy() if type(value) is LazyGeometry else value
+            for value in self._get_attr_dict().values()
+        ]
+        return type(self)(*attr_values)
+
+    def _get_geometry_list(self, name: str) -> list:
+        """
+        Returns the raw list of a geometry attribute if it hasn't been built yet. Otherwise returns None.
+        """
+        value = getattr(self, f'_{name}')
+        return value.value_list if type(value) is LazyGeometry else None
+
+    @property
+    def segmentation(self) -> Segmentation:
+        return self._get_geometry('segmentation')
+
+    @segmentation.setter
+    def segmentation(self, value: Segmentation):
+        self._segmentation = value
+
+    @property
+    def bbox(self) -> BBox:
+        return self._get_geometry('bbox')
+
+    @bbox.setter
+    def bbox(self, value: BBox):
+        self._bbox = value
+
+    @property
+    def keypoints(self) -> Keypoint2D_List:
+        return self._get_geometry('keypoints')
+
+    @keypoints.setter
+    def keypoints(self, value: Keypoint2D_List):
+        self._keypoints = value
+
+    @property
+    def keypoints_3d(self) -> Keypoint3D_List:
+        return self._get_geometry('keypoints_3d')
+
+    @keypoints_3d.setter
+    def keypoints_3d(self, value: Keypoint3D_List):
+        self._keypoints_3d = value
+
+    def to_dict(self, strict: bool=True) -> dict:
+        # Geometry that was never built is written back as it was loaded.
+        segmentation = self._get_geometry_list('segmentation')
+        segmentation = segmentation if segmentation is not None else self.segmentation.to_list(demarcation=False)
+        bbox = self._get_geometry_list('bbox')
+        bbox = bbox if bbox is not None else self.bbox.to_list(output_format='pminsize')
+        keypoints = self._get_geometry_list('keypoints')
+        keypoints = keypoints if keypoints is not None else self.keypoints.to_list(demarcation=False)
+        has_keypoints_3d = self._keypoints_3d is not None # Checking the property would build the keypoints.
+        if has_keypoints_3d:
+            keypoints_3d = self._get_geometry_list('keypoints_3d')
+            keypoints_3d = keypoints_3d if keypoints_3d is not None else self.keypoints_3d.to_list(demarcation=False)
+        if strict:
+            data_dict = {
+                'segmentation': segmentation,
+                'num_keypoints': self.num_keypoints,
+                'area': self.area,
+                'iscrowd': self.iscrowd,
+                'keypoints': keypoints,
+                'image_id': self.image_id,
+                'bbox': bbox,
+                'category_id': self.category_id,
+                'id': self.id
+            }
+            if has_keypoints_3d:
+                data_dict['keypoints_3d'] = keypoints_3d
+            if self.camera is not None:
+                data_dict['camera_params'] = self.camera.to_dict()
+            return data_dict
+        else:
+            data_dict = {
+                'bbox': bbox,
+                'area': self.area,
+                'iscrowd': self.iscrowd,
+                'image_id': self.image_id,
+                'category_id': self.category_id,
+                'id': self.id
+            }
+            if len(segmentation) > 0:
+                data_dict['segmentation'] = segmentation
+            if len(keypoints) > 0:
+                data_dict['keypoints'] = keypoints
+                data_dict['num_keypoints'] = self.num_keypoints
+
+            if has_keypoints_3d:
+                data_dict['keypoints_3d'] = keypoints_3d
+            if self.camera is not None:
+                data_dict['camera_params'] = self.camera.to_dict()
+            return data_dict
+
 class COCO_Category(BaseStructObject['COCO_License']):
+    __slots__ = ['id', 'supercategory', 'name', 'keypoints', 'skeleton', '_index_watchers']
+
     def __init__(
         self, id: int, supercategory: str=None, name: str=None, keypoints: List[str]=None, skeleton: List[list]=None
     ):
+        self._index_watchers = None
+
         # Standard Required
         self.id = id
 
@@ -400,9 +593,18 @@ class COCO_Category(BaseStructObject['COCO_License']):
             result = result and self.id == other.id
         return result
 
+    def get_canonical_key(self, exclude_id: bool=True) -> tuple:
+        """
+        Returns a hashable key that is the same for two categories if and only if is_equal_to would return True.
+        """
+        key = (self.supercategory, self.name, self.keypoints, self.skeleton)
+        if not exclude_id:
+            key += (self.id,)
+        return _to_hashable(key)
+
     def to_dict(self, strict: bool=True) -> dict:
         if strict:
-            return self.__dict__
+            return self._get_attr_dict()
         else:
             result_dict = {
                 'id': self.id,
@@ -0,0 +1,262 @@
+from __future__ import annotations
+from typing import List
+import numpy as np
+
+from logger import logger
+
+from .columns import COCO_Annotation_Columns, COCO_Annotation_View
+from .handlers import COCO_Annotation_Handler, COCO_Image_Handler
+
+_LOOKUPS = ['eq', 'ne', 'gt', 'gte', 'lt', 'lte', 'in', 'not_in']
+_IMAGE_FIELDS = { # field name -> COCO_Image attribute
+    'license_id': 'license_id',
+    'file_name': 'file_name',
+    'coco_url': 'coco_url',
+    'image_height': 'height',
+    'image_width': 'width',
+    'date_captured': 'date_captured'
+}
+_CATEGORY_FIELDS = { # field name -> COCO_Category attribute
+    'category': 'name',
+    'supercategory': 'supercategory'
+}
+
+def _to_array(values: list) -> np.ndarray:
+    """
+    Converts a list of attribute values to a numpy array.
+    Numbers become a float64 array (None becomes NaN), everything else an object array.
+    """
+    if all([type(val) in [int, float] or val is None for val in values]):
+        return np.array([val if val is not None else np.nan for val in values], dtype=np.float64)
+    arr = np.empty(len(values), dtype=object)
+    arr[:] = values
+    return arr
+
+def _join(keys: np.ndarray, obj_ids: np.ndarray, obj_values: np.ndarray) -> np.ndarray:
+    """
+    Returns the value of the object whose id matches each key. (The first one, if several objects share an id.)
+    Keys without a matching object get NaN or None.
+    """
+    result = np.full(len(keys), np.nan if obj_values.dtype != object else None, dtype=obj_values.dtype)
+    if len(obj_ids) == 0 or len(keys) == 0:
+        return result
+    order = np.argsort(obj_ids, kind='stable')
+    sorted_ids = obj_ids[order]
+    pos = np.minimum(np.searchsorted(sorted_ids, keys), len(sorted_ids) - 1)
+    found = sorted_ids[pos] == keys
+    result[found] = obj_values[order][pos[found]]
+    return result
+
+def _evaluate(values: np.ndarray, lookup: str, target) -> np.ndarray:
+    if lookup in ['in', 'not_in']:
+        target_list = list(target)
+        if values.dtype == object:
+            target_set = set(target_list)
+            mask = np.fromiter((val in target_set for val in values.tolist()), dtype=bool, count=len(values))
+        else:
+            mask = np.isin(values, np.array(target_list, dtype=np.float64))
+        return mask if lookup == 'in' else ~mask
+    if lookup in ['eq', 'ne']:
+        if target is None:
+            mask = np.isnan(values) if values.dtype != object else np.array([val is None for val in values.tolist()], dtype=bool)
+        else:
+            mask = np.asarray(values == target, dtype=bool)
+        return mask if lookup == 'eq' else ~mask
+    if values.dtype == object:
+        logger.error(f"'{lookup}' can only be used with numeric fields.")
+        raise Exception
+    if lookup == 'gt':
+        return values > target
+    elif lookup == 'gte':
+        return values >= target
+    elif lookup == 'lt':
+        return values < target
+    else:
+        return values <= target
+
+class COCO_Query:
+    """
+    Filters the annotations of a COCO_Dataset with vectorized conditions.
+    Use COCO_Dataset.query() to create one.
+
+        ```python
+        person_images = dataset.query().where(category='person', area__gt=1024).images()
+        small = dataset.query().where(bbox_width__lt=32).exclude(iscrowd=1).annotations()
+        ```
+
+    Conditions are written as field=value or field__lookup=value.
+        Lookups: eq (default), ne, gt, gte, lt, lte, in, not_in
+        Annotation fields: id, image_id, category_id, area, iscrowd, num_keypoints, num_visible_keypoints,
+                           bbox_xmin, bbox_ymin, bbox_width, bbox_height, bbox_area
+        Image fields: license_id, file_name, coco_url, image_height, image_width, date_captured
+        Category fields: category (the category name), supercategory
+    Every field is gathered into a numpy array the first time it is used, and the arrays are shared by all of
+    the queries that were derived from the same dataset.query() call, so a condition costs a few numpy
+    operations over the annotations.
+
+    Note: The field arrays reflect the dataset as it was when they were first used.
+          Call dataset.query() again after modifying the dataset.
+    """
+    def __init__(self, dataset, mask: np.ndarray=None, _fields: dict=None):
+        self.dataset = dataset
+        self._fields = _fields if _fields is not None else {}
+        self.mask = mask if mask is not None else np.ones(len(dataset.annotations), dtype=bool)
+        if len(self.mask) != len(dataset.annotations):
+            logger.error(f'The dataset has {len(dataset.annotations)} annotations, but the query was made for {len(self.mask)}.')
+            logger.error(f'Call dataset.query() again after adding or removing annotations.')
+            raise Exception
+        self._ann_list = dataset.annotations.obj_list
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __str__(self) -> str:
+        return f'{type(self).__name__}({self.count()}/{len(self._ann_list)} annotations)'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    def _get_shared_rows(self) -> (COCO_Annotation_Columns, np.ndarray):
+        if '_shared_rows' not in self._fields:
+            self._fields['_shared_rows'] = COCO_Annotation_Columns.get_shared_rows(self._ann_list)
+        return self._fields['_shared_rows']
+
+    def _get_bbox(self) -> np.ndarray:
+        if '_bbox' not in self._fields:
+            shared_rows = self._get_shared_rows()
+            if shared_rows is not None:
+                columns, rows = shared_rows
+                bbox = columns.bbox[rows]
+            else:
+                bbox_list = []
+                for ann in self._ann_list:
+                    raw_bbox = ann._get_geometry_list('bbox') if type(ann) is not COCO_Annotation_View else None
+                    bbox_list.append(raw_bbox if raw_bbox is not None else ann.bbox.to_list(output_format='pminsize'))
+                bbox = np.array(bbox_list, dtype=np.float64).reshape(-1, 4)
+            self._fields['_bbox'] = bbox
+        return self._fields['_bbox']
+
+    def _compute_field(self, name: str) -> np.ndarray:
+        if name in ['id', 'image_id', 'category_id']:
+            shared_rows = self._get_shared_rows()
+            if shared_rows is not None:
+                columns, rows = shared_rows
+                return getattr(columns, name)[rows]
+            return self.dataset.annotations.get_attr_array(name)
+        elif name in ['area', 'iscrowd', 'num_keypoints']:
+            shared_rows = self._get_shared_rows()
+            if shared_rows is not None:
+                columns, rows = shared_rows
+                values = getattr(columns, name)[rows].astype(np.float64)
+                if name == 'iscrowd':
+                    values[values == -1] = np.nan # -1 means that iscrowd wasn't specified.
+                return values
+            return _to_array(self.dataset.annotations.get_attr_values(name))
+        elif name == 'num_visible_keypoints':
+            return (self.dataset.annotations.get_keypoint_visibility() > 0).sum(axis=1).astype(np.float64)
+        elif name in ['bbox_xmin', 'bbox_ymin', 'bbox_width', 'bbox_height']:
+            return self._get_bbox()[:, ['bbox_xmin', 'bbox_ymin', 'bbox_width', 'bbox_height'].index(name)]
+        elif name == 'bbox_area':
+            bbox = self._get_bbox()
+            return bbox[:, 2] * bbox[:, 3]
+        elif name in _IMAGE_FIELDS:
+            images = self.dataset.images
+            return _join(
+                keys=self.get_field('image_id'),
+                obj_ids=images.get_attr_array('id'),
+                obj_values=_to_array(images.get_attr_values(_IMAGE_FIELDS[name]))
+            )
+        elif name in _CATEGORY_FIELDS:
+            categories = self.dataset.categories
+            return _join(
+                keys=self.get_field('category_id'),
+                obj_ids=categories.get_attr_array('id'),
+                obj_values=_to_array(categories.get_attr_values(_CATEGORY_FIELDS[name]))
+            )
+        else:
+            logger.error(f'Unknown query field: {name}')
+            logger.error(f'Valid fields: {self.get_field_names()}')
+            raise Exception
+
+    @staticmethod
+    def get_field_names() -> List[str]:
+        return [
+            'id', 'image_id', 'category_id', 'area', 'iscrowd', 'num_keypoints', 'num_visible_keypoints',
+            'bbox_xmin', 'bbox_ymin', 'bbox_width', 'bbox_height', 'bbox_area'
+        ] + list(_IMAGE_FIELDS.keys()) + list(_CATEGORY_FIELDS.keys())
+
+    def get_field(self, name: str) -> np.ndarray:
+        """
+        Returns the value of the given field for every annotation of the dataset (not only the matching ones).
+        """
+        if name not in self._fields:
+            self._fields[name] = self._compute_field(name)
+        return self._fields[name]
+
+    def _get_condition_mask(self, conditions: dict) -> np.ndarray:
+        mask = np.ones(len(self._ann_list), dtype=bool)
+        for key, target in conditions.items():
+            name, lookup = key, 'eq'
+            if '__' in key:
+                name, lookup = key.rsplit('__', 1)
+                if lookup not in _LOOKUPS:
+                    logger.error(f"Unknown lookup '{lookup}' in condition '{key}'")
+                    logger.error(f'Valid lookups: {_LOOKUPS}')
+                    raise Exception
+            mask &= _evaluate(self.get_field(name), lookup, target)
+        return mask
+
+    def where(self, **conditions) -> COCO_Query:
+        """
+        Returns a new query that only matches the annotations that also satisfy all of the given conditions.
+        """
+        return COCO_Query(self.dataset, mask=self.mask & self._get_condition_mask(conditions), _fields=self._fields)
+
+    def exclude(self, **conditions) -> COCO_Query:
+        """
+        Returns a new query without the annotations that satisfy all of the given conditions.
+        """
+        return COCO_Query(self.dataset, mask=self.mask & ~self._get_condition_mask(conditions), _fields=self._fields)
+
+    def count(self) -> int:
+        return int(self.mask.sum())
+
+    def ann_idx(self) -> np.ndarray:
+        """
+        Returns the indices of the matching annotations in dataset.annotations.
+        """
+        return np.nonzero(self.mask)[0]
+
+    def annotations(self) -> COCO_Annotation_Handler:
+        """
+        Returns the matching annotations. The annotation objects are shared with the dataset.
+        """
+        return self.dataset.annotations.take(self.mask)
+
+    def image_ids(self) -> np.ndarray:
+        """
+        Returns the sorted ids of the images that have at least one matching annotation.
+        """
+        return np.unique(self.get_field('image_id')[self.mask])
+
+    def images(self) -> COCO_Image_Handler:
+        """
+        Returns the images that have at least one matching annotation, in the order of dataset.images.
+        The image objects are shared with the dataset.
+        """
+        images = self.dataset.images
+        return images.take(images.get_idx_array_from_attr_values('id', self.image_ids()))
+
+    def to_dataset(self):
+        """
+        Returns a new COCO_Dataset with the matching annotations and their images.
+        The info, licenses and categories are kept as they are.
+        Note: The objects are shared with the original dataset, not copied.
+        """
+        return type(self.dataset)(
+            info=self.dataset.info,
+            licenses=self.dataset.licenses.copy(),
+            images=self.images(),
+            annotations=self.annotations(),
+            categories=self.dataset.categories.copy()
+        )
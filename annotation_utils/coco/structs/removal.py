@@ -0,0 +1,77 @@
+from __future__ import annotations
+from typing import List
+
+def cascade_remove(
+    license_handler=None, img_handler=None, ann_handler=None, cat_handler=None,
+    license_ids: List[int]=None, image_ids: List[int]=None, ann_ids: List[int]=None, category_ids: List[int]=None,
+    verbose: bool=False
+) -> (set, set, set, set):
+    """
+    Removes licenses, images, annotations and categories by id, together with everything that depends on them.
+    All of the dependent removals are worked out with sets first, and then each handler is rebuilt once.
+
+    Downwards:
+        * Images that use a removed license are removed.
+        * Annotations of removed images are removed.
+        * When categories are removed, annotations whose category no longer exists are removed.
+    Upwards:
+        * Images that lost annotations and have no annotations left are removed.
+        * Licenses that have no images left are removed, even if they were already unused before.
+          (This only happens when both license_handler and img_handler are given.)
+    Categories are never removed because they have no annotations.
+
+    Handlers that are None are neither changed nor used to look for dependent removals.
+
+    license_handler, img_handler, ann_handler, cat_handler: The handlers of the dataset.
+    license_ids, image_ids, ann_ids, category_ids: The ids that should be removed at each level.
+    verbose: If True, the id of every removed object is logged.
+
+    Returns the removed (license_ids, image_ids, ann_ids, category_ids) as sets.
+    """
+    rm_license_ids = set(license_ids) if license_ids is not None else set()
+    rm_image_ids = set(image_ids) if image_ids is not None else set()
+    rm_ann_ids = set(ann_ids) if ann_ids is not None else set()
+    rm_category_ids = set(category_ids) if category_ids is not None else set()
+
+    if img_handler is not None and len(rm_license_ids) > 0:
+        for image_id, license_id in zip(img_handler.get_attr_values('id'), img_handler.get_attr_values('license_id')):
+            if license_id in rm_license_ids:
+                rm_image_ids.add(image_id)
+
+    if ann_handler is not None:
+        if cat_handler is not None and len(rm_category_ids) > 0:
+            remaining_category_ids = set(cat_handler.get_attr_values('id')) - rm_category_ids
+            is_removed_category = lambda category_id: category_id not in remaining_category_ids
+        else:
+            is_removed_category = lambda category_id: category_id in rm_category_ids
+        affected_image_ids, used_image_ids = set(), set()
+        for ann_id, image_id, category_id in zip(
+            ann_handler.get_attr_values('id'),
+            ann_handler.get_attr_values('image_id'),
+            ann_handler.get_attr_values('category_id')
+        ):
+            if ann_id in rm_ann_ids or image_id in rm_image_ids or is_removed_category(category_id):
+                rm_ann_ids.add(ann_id)
+                affected_image_ids.add(image_id)
+            else:
+                used_image_ids.add(image_id)
+        if img_handler is not None:
+            rm_image_ids |= affected_image_ids - used_image_ids
+
+    if license_handler is not None and img_handler is not None:
+        used_license_ids = set([
+            license_id
+            for image_id, license_id in zip(img_handler.get_attr_values('id'), img_handler.get_attr_values('license_id'))
+            if image_id not in rm_image_ids
+        ])
+        rm_license_ids |= set(license_handler.get_attr_values('id')) - used_license_ids
+
+    if cat_handler is not None:
+        cat_handler.remove_ids(rm_category_ids, verbose=verbose, label='Category')
+    if ann_handler is not None:
+        ann_handler.remove_ids(rm_ann_ids, verbose=verbose, label='Annotation')
+    if img_handler is not None:
+        img_handler.remove_ids(rm_image_ids, verbose=verbose, label='Image')
+    if license_handler is not None:
+        license_handler.remove_ids(rm_license_ids, verbose=verbose, label='License')
+    return rm_license_ids, rm_image_ids, rm_ann_ids, rm_category_ids
@@ -1 +1,8 @@
-from .id_map import ID_Map, ID_Mapper, COCO_Mapper_Handler
\ No newline at end of file
+from .id_map import ID_Map, ID_Mapper, COCO_Mapper_Handler
+from .json_stream import JSON_Stream_Reader, JSON_Stream_Writer
+from .file_hash import hash_file
+from .file_transfer import transfer_file, transfer_files, TRANSFER_METHODS
+from .split_assign import get_stratified_parts, get_hash_fraction, get_hash_part
+from .draw import draw_bbox_in_place, draw_keypoints_in_place, draw_skeleton_in_place, \
+    add_contours_to_count, draw_transparent_count_in_place
+from .prefetch import prefetch_map
\ No newline at end of file
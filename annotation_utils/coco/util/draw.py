@@ -0,0 +1,190 @@
+"""
+In-place versions of the common_utils.cv_drawing_utils functions that COCO_Dataset uses for previews.
+The common_utils functions copy the whole image on every call, which is what makes drawing crowded images slow.
+The functions here make the same cv2 calls as their common_utils counterparts, but on the given buffer.
+test/coco/draw_in_place_test.py checks that the results are identical.
+"""
+from __future__ import annotations
+from typing import List
+import cv2
+import numpy as np
+
+from logger import logger
+from common_utils.check_utils import check_type
+from common_utils.common_types.bbox import BBox
+
+def _fit_font_scale(
+    text: str, target_w: float, font_scale: float, textbox_w: int, textbox_h: int,
+    font_face: int, thickness: int
+) -> (float, float, int, int):
+    """
+    Adjusts font_scale until text is about target_w wide, the same way that common_utils' label drawing functions do.
+    Returns (font_scale, target_w, textbox_w, textbox_h), where target_w and textbox_w are at least 1.
+    """
+    # Prevent Divide By Zero Errors
+    target_w = target_w if target_w > 1 else 1
+    textbox_w = textbox_w if textbox_w > 1 else 1
+    retry_count = 0
+    while abs(textbox_w - target_w) / target_w > 0.1 and retry_count < 3:
+        retry_count += 1
+        font_scale = font_scale * (target_w / textbox_w)
+        [textbox_w, textbox_h], _ = cv2.getTextSize(text=text, fontFace=font_face, fontScale=font_scale, thickness=thickness)
+        textbox_w = textbox_w if textbox_w > 1 else 1
+        textbox_h = textbox_h if textbox_h > 1 else 1
+    return font_scale, target_w, textbox_w, textbox_h
+
+def _draw_bbox_text_in_place(
+    img: np.ndarray, bbox: BBox, text: str, color: list, thickness: int, font_face: int=cv2.FONT_HERSHEY_COMPLEX
+):
+    """
+    Same as common_utils' draw_bbox_text with orientation='top', but draws directly on img.
+    """
+    bbox_h, bbox_w = bbox.shape()
+    font_scale = 1 * (bbox_w / 93)
+    [textbox_w, textbox_h], _ = cv2.getTextSize(text=text, fontFace=font_face, fontScale=font_scale, thickness=thickness)
+    textbox_h = textbox_h if textbox_h > 1 else 1
+    font_scale, target_w, textbox_w, textbox_h = _fit_font_scale(
+        text=text, target_w=bbox_w, font_scale=font_scale, textbox_w=textbox_w, textbox_h=textbox_h,
+        font_face=font_face, thickness=thickness
+    )
+    textbox_org = (int(0.5 * (target_w - textbox_w) + bbox.xmin), int(bbox.ymin - 0.2 * textbox_h))
+    cv2.putText(img=img, text=text, org=textbox_org, fontFace=font_face, fontScale=font_scale, color=color, thickness=thickness, bottomLeftOrigin=False)
+
+def _draw_keypoints_labels_in_place(
+    img: np.ndarray, keypoints: np.ndarray, keypoint_labels: list, color: list, thickness: int,
+    ignore_kpt_idx: list, font_face: int=cv2.FONT_HERSHEY_COMPLEX
+):
+    """
+    Same as common_utils' draw_keypoints_labels, but draws directly on img.
+    """
+    np_kpts = np.array(keypoints)
+    if len(np_kpts) == 0:
+        return
+    kpts_xmin, kpts_ymin = np.min(np_kpts, axis=0)
+    kpts_xmax, kpts_ymax = np.max(np_kpts, axis=0)
+    bbox_h, bbox_w = BBox(xmin=kpts_xmin, ymin=kpts_ymin, xmax=kpts_xmax, ymax=kpts_ymax).shape()
+    target_w = 0.1 * bbox_w
+    font_scale = 1 * (target_w / 93)
+    # The font scale is fitted to the widest label.
+    textbox_w, textbox_h, max_size_label_idx = None, None, None
+    for i, keypoint_label in enumerate(keypoint_labels):
+        [label_w, label_h], _ = cv2.getTextSize(text=keypoint_label, fontFace=font_face, fontScale=font_scale, thickness=thickness)
+        if textbox_w is None or label_w > textbox_w:
+            textbox_w, textbox_h = label_w, label_h
+            max_size_label_idx = i
+    font_scale, target_w, textbox_w, textbox_h = _fit_font_scale(
+        text=keypoint_labels[max_size_label_idx], target_w=target_w, font_scale=font_scale,
+        textbox_w=textbox_w, textbox_h=textbox_h, font_face=font_face, thickness=thickness
+    )
+    for i, [[x, y], keypoint_label] in enumerate(zip(keypoints, keypoint_labels)):
+        if i not in ignore_kpt_idx:
+            textbox_org = (int(x - 0.5 * textbox_w), int(y - 0.5 * textbox_h))
+            cv2.putText(
+                img=img, text=keypoint_label, org=textbox_org, fontFace=font_face, fontScale=font_scale,
+                color=color, thickness=thickness, bottomLeftOrigin=False
+            )
+
+def draw_bbox_in_place(
+    img: np.ndarray, bbox: BBox,
+    color: list=[0, 255, 255], thickness: int=2, text: str=None, label_thickness: int=None,
+    label_only: bool=False
+):
+    """
+    Same as common_utils' draw_bbox, but draws directly on img.
+    """
+    xmin, ymin, xmax, ymax = bbox.to_int().to_list()
+    if not (text is not None and label_only):
+        cv2.rectangle(img=img, pt1=(xmin, ymin), pt2=(xmax, ymax), color=color, thickness=thickness)
+    if text is not None:
+        _draw_bbox_text_in_place(
+            img=img, bbox=bbox, text=text, color=color,
+            thickness=label_thickness if label_thickness is not None else thickness
+        )
+
+def draw_keypoints_in_place(
+    img: np.ndarray, keypoints: np.ndarray,
+    radius: int=4, color: list=[0, 0, 255],
+    keypoint_labels: list=None, show_keypoints_labels: bool=False, label_thickness: int=1,
+    label_only: bool=False, ignore_kpt_idx: list=[]
+):
+    """
+    Same as common_utils' draw_keypoints, but draws directly on img.
+    keypoints: Array of shape (K, 2)
+    """
+    if not (keypoint_labels is not None and label_only):
+        for i, [x, y] in enumerate(keypoints):
+            if i not in ignore_kpt_idx:
+                cv2.circle(img, (int(x), int(y)), radius, color, -1)
+    if show_keypoints_labels or label_only:
+        if keypoint_labels is None:
+            logger.error(f"Need to provide keypoint_labels in order to show labels.")
+            raise Exception
+        _draw_keypoints_labels_in_place(
+            img=img, keypoints=keypoints, keypoint_labels=keypoint_labels, color=color, thickness=label_thickness,
+            ignore_kpt_idx=ignore_kpt_idx
+        )
+
+def draw_skeleton_in_place(
+    img: np.ndarray, keypoints: np.ndarray, keypoint_skeleton: list, index_offset: int=0,
+    thickness: int=5, color: list=[255, 0, 0], ignore_kpt_idx: list=[]
+):
+    """
+    Same as common_utils' draw_skeleton, but draws directly on img.
+    keypoints: Array of shape (K, 2)
+    """
+    check_type(keypoints, valid_type_list=[list, tuple, np.ndarray])
+    kpts = keypoints.tolist() if type(keypoints) is np.ndarray else keypoints
+    if len(kpts) == 0:
+        return
+    flat_skeleton = np.array(keypoint_skeleton).reshape(-1) + index_offset
+    if np.any(flat_skeleton < 0):
+        logger.error(f'Found a negative index. Currently using index_offset={index_offset}')
+        logger.error(f'Minimum index found: {np.min(flat_skeleton)}')
+        logger.error(f'Please use index_offset={-np.min(flat_skeleton)+index_offset}')
+        raise IndexError
+    if np.any(flat_skeleton >= len(kpts)):
+        logger.error(f'Found index that exceeds size of keypoint array ({len(kpts)}). Currently using index_offset={index_offset}')
+        logger.error(f'Maximum index found: {np.max(flat_skeleton)}')
+        logger.error(f'Please use index_offset={-(np.max(flat_skeleton)-(len(kpts)-1))+index_offset}')
+        raise IndexError
+    for joint_start_index, joint_end_index in keypoint_skeleton:
+        if joint_start_index+index_offset not in ignore_kpt_idx and joint_end_index+index_offset not in ignore_kpt_idx:
+            line_start_x, line_start_y = kpts[joint_start_index+index_offset]
+            line_end_x, line_end_y = kpts[joint_end_index+index_offset]
+            cv2.line(
+                img=img,
+                pt1=(int(line_start_x), int(line_start_y)),
+                pt2=(int(line_end_x), int(line_end_y)),
+                color=color,
+                thickness=thickness
+            )
+
+def add_contours_to_count(count: np.ndarray, contours: List[np.ndarray]):
+    """
+    Adds 1 to count at every pixel that is covered by the filled contours.
+    Only the region around the contours is rasterized, so the cost doesn't depend on the size of count.
+    """
+    if len(contours) == 0:
+        return
+    img_h, img_w = count.shape[:2]
+    points = np.concatenate([np.asarray(contour).reshape(-1, 2) for contour in contours], axis=0)
+    if len(points) == 0:
+        return
+    xmin, ymin = np.clip(points.min(axis=0), 0, [img_w, img_h])
+    xmax, ymax = np.clip(points.max(axis=0) + 1, 0, [img_w, img_h])
+    if xmax <= xmin or ymax <= ymin:
+        return
+    roi_mask = np.zeros((ymax - ymin, xmax - xmin), np.uint8)
+    cv2.drawContours(image=roi_mask, contours=contours, contourIdx=-1, color=255, thickness=-1, offset=(int(-xmin), int(-ymin)))
+    count[ymin:ymax, xmin:xmax] += roi_mask > 0
+
+def draw_transparent_count_in_place(img: np.ndarray, count: np.ndarray, color: list=[255, 255, 0]):
+    """
+    Draws the transparent masks that were accumulated in count (with add_contours_to_count) on img.
+    The result is the same as drawing each mask one after the other with common_utils' draw_segmentation(transparent=True).
+    """
+    covered = count > 0
+    if not covered.any():
+        return
+    added = count[covered].astype(np.int64)[:, None] * (3 * np.array(color, dtype=np.int64))[None, :]
+    img[covered] = np.minimum(img[covered].astype(np.int64) + added, 255).astype(img.dtype)
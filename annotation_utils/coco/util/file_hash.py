@@ -0,0 +1,12 @@
+from __future__ import annotations
+import hashlib
+
+def hash_file(path: str) -> str:
+    """
+    Returns the sha1 hash of the file's content. The file is read in chunks, so it can be of any size.
+    """
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(2**20), b''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
@@ -0,0 +1,81 @@
+from __future__ import annotations
+from typing import List
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tqdm import tqdm
+
+from logger import logger
+from common_utils.check_utils import check_value
+
+TRANSFER_METHODS = ['copy', 'hardlink', 'symlink', 'reflink']
+_FICLONE = 0x40049409 # Linux ioctl request for copy-on-write cloning (reflink) of a whole file.
+
+def _reflink(src_path: str, dst_path: str):
+    import fcntl
+    with open(src_path, 'rb') as src_f, open(dst_path, 'wb') as dst_f:
+        fcntl.ioctl(dst_f.fileno(), _FICLONE, src_f.fileno())
+
+def transfer_file(src_path: str, dst_path: str, method: str='copy'):
+    """
+    Puts the file at src_path at dst_path.
+
+    method:
+        'copy': Copy the file's content.
+        'hardlink': Make a hard link. Nearly instant, but only possible within the same filesystem.
+        'symlink': Make a symbolic link that points to the absolute path of src_path.
+        'reflink': Make a copy-on-write clone. Nearly instant on filesystems that support it (btrfs, xfs, etc.)
+    If a hardlink or reflink can't be made, the file is copied instead.
+    """
+    if method == 'hardlink':
+        try:
+            os.link(src_path, dst_path)
+            return
+        except OSError:
+            pass
+    elif method == 'symlink':
+        os.symlink(os.path.abspath(src_path), dst_path)
+        return
+    elif method == 'reflink':
+        try:
+            _reflink(src_path, dst_path)
+            return
+        except (OSError, ImportError):
+            if os.path.exists(dst_path):
+                os.remove(dst_path)
+    shutil.copyfile(src_path, dst_path)
+
+def transfer_files(
+    src_path_list: List[str], dst_path_list: List[str], method: str='copy', workers: int=8,
+    show_pbar: bool=False, pbar_desc: str='Transferring Files...'
+):
+    """
+    Transfers every file in src_path_list to the corresponding path in dst_path_list using a thread pool.
+    Refer to transfer_file for the available methods.
+
+    workers: The number of threads. If None or 1, the files are transferred one at a time.
+    """
+    check_value(method, valid_value_list=TRANSFER_METHODS)
+    if len(src_path_list) != len(dst_path_list):
+        logger.error(f'len(src_path_list) == {len(src_path_list)} != {len(dst_path_list)} == len(dst_path_list)')
+        raise Exception
+    pbar = tqdm(total=len(src_path_list), unit='file(s)') if show_pbar else None
+    if pbar is not None:
+        pbar.set_description(pbar_desc)
+    if workers is None or workers <= 1:
+        for src_path, dst_path in zip(src_path_list, dst_path_list):
+            transfer_file(src_path, dst_path, method=method)
+            if pbar is not None:
+                pbar.update(1)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(transfer_file, src_path, dst_path, method)
+                for src_path, dst_path in zip(src_path_list, dst_path_list)
+            ]
+            for future in as_completed(futures):
+                future.result()
+                if pbar is not None:
+                    pbar.update(1)
+    if pbar is not None:
+        pbar.close()
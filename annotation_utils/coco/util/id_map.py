@@ -1,52 +1,208 @@
 from __future__ import annotations
 import operator
+import weakref
+import numpy as np
 from logger import logger
 from common_utils.check_utils import check_type
 
 class ID_Map:
+    """
+    Changing an attribute of an ID_Map updates the lookup tables of every ID_Mapper that holds it.
+    """
+    __slots__ = ['_unique_key', '_old_id', '_new_id', '_mapper_refs']
+
     def __init__(self, unique_key: str, old_id: int, new_id: int):
-        self.unique_key = unique_key
-        self.old_id = old_id
-        self.new_id = new_id
+        self._unique_key = unique_key
+        self._old_id = old_id
+        self._new_id = new_id
+        self._mapper_refs = () # Weak references to the ID_Mappers whose lookup tables contain this map.
+
+    def _reset_mappers(self):
+        for mapper_ref in self._mapper_refs:
+            mapper = mapper_ref()
+            if mapper is not None:
+                mapper._reset_lookup()
+
+    @property
+    def unique_key(self) -> str:
+        return self._unique_key
+
+    @unique_key.setter
+    def unique_key(self, unique_key: str):
+        self._unique_key = unique_key
+        self._reset_mappers()
+
+    @property
+    def old_id(self) -> int:
+        return self._old_id
+
+    @old_id.setter
+    def old_id(self, old_id: int):
+        self._old_id = old_id
+        self._reset_mappers()
+
+    @property
+    def new_id(self) -> int:
+        return self._new_id
+
+    @new_id.setter
+    def new_id(self, new_id: int):
+        self._new_id = new_id
+        self._reset_mappers()
+
+    def _add_mapper(self, mapper_ref: weakref.ref):
+        mapper_refs = self._mapper_refs
+        if len(mapper_refs) == 0:
+            self._mapper_refs = (mapper_ref,)
+        elif mapper_ref not in mapper_refs:
+            self._mapper_refs = tuple([ref for ref in mapper_refs if ref() is not None]) + (mapper_ref,)
+
+    def __getstate__(self) -> tuple:
+        return (self._unique_key, self._old_id, self._new_id)
+
+    def __setstate__(self, state: tuple):
+        self.__init__(*state)
+
+class _ID_Map_List(list):
+    """
+    The id_maps list of an ID_Mapper.
+    Appending extends the mapper's lookup tables, and any other change to the list makes the mapper rebuild them.
+    """
+    def __init__(self, mapper: ID_Mapper, id_maps: list=None):
+        super().__init__(id_maps if id_maps is not None else [])
+        self._mapper_ref = weakref.ref(mapper)
+
+    def _reset_lookup(self):
+        mapper = self._mapper_ref()
+        if mapper is not None:
+            mapper._reset_lookup()
+
+    def append(self, id_map: ID_Map):
+        super().append(id_map)
+        mapper = self._mapper_ref()
+        if mapper is not None:
+            mapper._add_to_lookup(id_map)
+
+    def extend(self, id_maps):
+        super().extend(id_maps)
+        self._reset_lookup()
+
+    def insert(self, idx: int, id_map: ID_Map):
+        super().insert(idx, id_map)
+        self._reset_lookup()
+
+    def remove(self, id_map: ID_Map):
+        super().remove(id_map)
+        self._reset_lookup()
+
+    def pop(self, idx: int=-1) -> ID_Map:
+        result = super().pop(idx)
+        self._reset_lookup()
+        return result
+
+    def clear(self):
+        super().clear()
+        self._reset_lookup()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._reset_lookup()
+
+    def reverse(self):
+        super().reverse()
+        self._reset_lookup()
+
+    def __setitem__(self, idx, value):
+        super().__setitem__(idx, value)
+        self._reset_lookup()
+
+    def __delitem__(self, idx):
+        super().__delitem__(idx)
+        self._reset_lookup()
+
+    def __iadd__(self, id_maps) -> _ID_Map_List:
+        result = super().__iadd__(id_maps)
+        self._reset_lookup()
+        return result
+
+    def __imul__(self, n: int) -> _ID_Map_List:
+        result = super().__imul__(n)
+        self._reset_lookup()
+        return result
+
+    def __reduce__(self):
+        return (list, (list(self),))
 
 class ID_Mapper:
     def __init__(self):
+        self._ref = weakref.ref(self)
         self.id_maps = []
 
+    @property
+    def id_maps(self) -> list:
+        return self._id_maps
+
+    @id_maps.setter
+    def id_maps(self, id_maps: list):
+        self._id_maps = _ID_Map_List(self, id_maps)
+        # (unique_key, old_id) -> new_id lookup table, built from id_maps when it is first needed.
+        # It is extended when a map is appended, and discarded when id_maps or one of its maps changes in any other way.
+        self._id_dict = None
+        # unique_key -> (sorted old_id array, corresponding new_id array), used for bulk remapping.
+        self._remap_arrays = {}
+
+    def __getstate__(self) -> dict:
+        return {'id_maps': list(self._id_maps)}
+
+    def __setstate__(self, state: dict):
+        self.__init__()
+        self.id_maps = state['id_maps']
+
     def __len__(self) -> int:
-        return len(self.id_maps)
+        return len(self._id_maps)
 
     def __getitem__(self, idx: int) -> ID_Mapper:
-        if len(self.id_maps) == 0:
+        if len(self._id_maps) == 0:
             logger.error(f"ID_Mapper is empty.")
             raise IndexError
-        elif idx < 0 or idx >= len(self.id_maps):
+        elif idx < 0 or idx >= len(self._id_maps):
             logger.error(f"Index out of range: {idx}")
             raise IndexError
         else:
-            return self.id_maps[idx]
+            return self._id_maps[idx]
+
+    def __setitem__(self, idx: int, value: ID_Map):
+        check_type(value, valid_type_list=[ID_Map])
+        self._id_maps[idx] = value
 
-    def __setitem__(self, idx: int, value: ID_Mapper):
-        check_type(value, valid_type_list=[ID_Mapper])
-        self.id_maps[idx] = value
+    def __delitem__(self, idx: int):
+        if len(self._id_maps) == 0:
+            logger.error(f"ID_Mapper is empty.")
+            raise IndexError
+        elif idx < 0 or idx >= len(self._id_maps):
+            logger.error(f"Index out of range: {idx}")
+            raise IndexError
+        else:
+            del self._id_maps[idx]
 
     def __iter__(self):
         self.n = 0
         return self
 
     def __next__(self) -> ID_Mapper:
-        if self.n < len(self.id_maps):
-            result = self.id_maps[self.n]
+        if self.n < len(self._id_maps):
+            result = self._id_maps[self.n]
             self.n += 1
             return result
         else:
             raise StopIteration
 
     def sort(self):
-        self.id_maps.sort(key=operator.attrgetter('old_id'), reverse=False)
+        self._id_maps.sort(key=operator.attrgetter('old_id'), reverse=False)
 
     def add_id_map(self, id_map: ID_Map):
-        self.id_maps.append(id_map)
+        check_type(id_map, valid_type_list=[ID_Map])
+        self._id_maps.append(id_map)
 
     def add(self, unique_key: str, old_id: int, new_id: int):
         new_id_map = ID_Map(
@@ -56,18 +212,89 @@ class ID_Mapper:
         )
         self.add_id_map(new_id_map)
     
+    def _reset_lookup(self):
+        self._id_dict = None
+        self._remap_arrays = {}
+
+    def _add_to_lookup(self, id_map: ID_Map):
+        if self._id_dict is not None:
+            id_map._add_mapper(self._ref)
+            self._id_dict[(id_map.unique_key, id_map.old_id)] = id_map.new_id
+        self._remap_arrays.pop(id_map.unique_key, None)
+
+    def _get_id_dict(self) -> dict:
+        if self._id_dict is None:
+            # When the same (unique_key, old_id) pair was added more than once, the last one wins.
+            id_dict = {}
+            mapper_ref = self._ref
+            for id_map in self._id_maps:
+                id_map._add_mapper(mapper_ref)
+                id_dict[(id_map.unique_key, id_map.old_id)] = id_map.new_id
+            self._id_dict = id_dict
+        return self._id_dict
+
     def get_new_id(self, unique_key: str, old_id: int) -> (bool, int):
-        found = False
-        new_id = None
-        for id_map in self.id_maps:
-            if id_map.unique_key == unique_key and id_map.old_id == old_id:
-                found = True
-                new_id = id_map.new_id
-        return found, new_id
+        id_dict = self._get_id_dict()
+        if (unique_key, old_id) in id_dict:
+            return True, id_dict[(unique_key, old_id)]
+        else:
+            return False, None
+
+    def get_new_ids(self, unique_key: str, old_ids: np.ndarray) -> (np.ndarray, np.ndarray):
+        """
+        Bulk version of get_new_id for integer ids.
+        Returns (found, new_ids), where found is a boolean array that is False wherever no map was found
+        for the corresponding old id. new_ids is -1 at those positions.
+        """
+        id_dict = self._get_id_dict()
+        if unique_key not in self._remap_arrays:
+            pairs = sorted([(old_id, new_id) for (key, old_id), new_id in id_dict.items() if key == unique_key])
+            self._remap_arrays[unique_key] = (
+                np.array([old_id for old_id, _ in pairs], dtype=np.int64),
+                np.array([new_id for _, new_id in pairs], dtype=np.int64)
+            )
+        sorted_old_ids, mapped_new_ids = self._remap_arrays[unique_key]
+        old_ids = np.asarray(old_ids, dtype=np.int64)
+        if len(sorted_old_ids) == 0:
+            return np.zeros(old_ids.shape, dtype=bool), np.full(old_ids.shape, -1, dtype=np.int64)
+        positions = np.clip(np.searchsorted(sorted_old_ids, old_ids), 0, len(sorted_old_ids) - 1)
+        found = sorted_old_ids[positions] == old_ids
+        new_ids = np.where(found, mapped_new_ids[positions], -1)
+        return found, new_ids
+
+    def to_dict_list(self) -> list:
+        return [
+            {'unique_key': id_map.unique_key, 'old_id': id_map.old_id, 'new_id': id_map.new_id}
+            for id_map in self._id_maps
+        ]
+
+    @classmethod
+    def from_dict_list(cls, dict_list: list) -> ID_Mapper:
+        mapper = ID_Mapper()
+        for item_dict in dict_list:
+            mapper.add(unique_key=item_dict['unique_key'], old_id=item_dict['old_id'], new_id=item_dict['new_id'])
+        return mapper
 
 class COCO_Mapper_Handler:
     def __init__(self):
         self.license_mapper = ID_Mapper()
         self.image_mapper = ID_Mapper()
         self.annotation_mapper = ID_Mapper()
-        self.category_mapper = ID_Mapper()
\ No newline at end of file
+        self.category_mapper = ID_Mapper()
+
+    def to_dict(self) -> dict:
+        return {
+            'license_mapper': self.license_mapper.to_dict_list(),
+            'image_mapper': self.image_mapper.to_dict_list(),
+            'annotation_mapper': self.annotation_mapper.to_dict_list(),
+            'category_mapper': self.category_mapper.to_dict_list()
+        }
+
+    @classmethod
+    def from_dict(cls, mapper_dict: dict) -> COCO_Mapper_Handler:
+        map_handler = COCO_Mapper_Handler()
+        map_handler.license_mapper = ID_Mapper.from_dict_list(mapper_dict['license_mapper'])
+        map_handler.image_mapper = ID_Mapper.from_dict_list(mapper_dict['image_mapper'])
+        map_handler.annotation_mapper = ID_Mapper.from_dict_list(mapper_dict['annotation_mapper'])
+        map_handler.category_mapper = ID_Mapper.from_dict_list(mapper_dict['category_mapper'])
+        return map_handler
\ No newline at end of file
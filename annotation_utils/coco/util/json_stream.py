@@ -0,0 +1,310 @@
+from __future__ import annotations
+import os
+import re
+import json
+import tempfile
+from logger import logger
+from common_utils.check_utils import check_file_exists, check_value
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+class JSON_Stream_Reader:
+    """
+    Incremental reader for json files whose top level is a dictionary, like COCO json files.
+    The file is read in chunks, and the values of the top level keys are parsed one at a time.
+    If a value is a list, its elements are parsed and yielded one by one, so the whole list
+    never has to be in memory at the same time.
+
+    Usage:
+        for key, value in JSON_Stream_Reader(json_path):
+            ...
+    """
+    def __init__(self, json_path: str, chunk_size: int=2**20):
+        check_file_exists(json_path)
+        self.json_path = json_path
+        self.chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._f = None
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self.found_keys = [] # Top level keys that have been read so far.
+        self.list_keys = [] # The keys in found_keys whose value is a list.
+
+    def _read_chunk(self, size: int=None) -> bool:
+        if self._eof:
+            return False
+        chunk = self._f.read(size if size is not None else self.chunk_size)
+        if len(chunk) == 0:
+            self._eof = True
+            return False
+        # Drop the part of the buffer that was already parsed so that memory stays bounded.
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """
+        Skips whitespace and returns the next character without consuming it.
+        Returns an empty string at the end of the file.
+        """
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read_chunk():
+                return ''
+
+    def _expect(self, char: str):
+        found = self._peek()
+        if found != char:
+            logger.error(f"Expected '{char}' at position {self._pos} of the buffer, but found '{found}'.")
+            logger.error(f'json_path: {self.json_path}')
+            raise Exception
+        self._pos += 1
+
+    def _decode_value(self):
+        """
+        Parses the next json value.
+        A value is only accepted once the character after it is in the buffer too,
+        since numbers at the end of the buffer could otherwise be cut off.
+        The value is parsed again from the start after every read, so the read size is doubled each time.
+        That way, a value that is much larger than chunk_size still costs O(size of value) in total.
+        """
+        self._peek()
+        read_size = self.chunk_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self._eof:
+                    logger.error(f'Failed to parse {self.json_path}: {e}')
+                    raise Exception
+            self._read_chunk(read_size)
+            read_size *= 2
+
+    def _iter_list(self):
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._decode_value()
+            char = self._peek()
+            self._pos += 1
+            if char == ']':
+                return
+            elif char != ',':
+                logger.error(f"Expected ',' or ']' between list elements, but found '{char}'.")
+                logger.error(f'json_path: {self.json_path}')
+                raise Exception
+
+    def __iter__(self):
+        """
+        Yields (key, value) pairs in the order that they appear in the file.
+        Values that are lists are not yielded as a whole. Instead, (key, element) is yielded
+        for each element. (Empty lists don't yield anything.)
+        All other values are yielded as is. Use list_keys to tell the two apart.
+        """
+        self._f = open(self.json_path, 'r', encoding='utf-8')
+        self._buffer, self._pos, self._eof = '', 0, False
+        self.found_keys = []
+        self.list_keys = []
+        try:
+            self._expect('{')
+            if self._peek() == '}':
+                return
+            while True:
+                key = self._decode_value()
+                self.found_keys.append(key)
+                self._expect(':')
+                if self._peek() == '[':
+                    self.list_keys.append(key)
+                    for element in self._iter_list():
+                        yield key, element
+                else:
+                    yield key, self._decode_value()
+                char = self._peek()
+                self._pos += 1
+                if char == '}':
+                    return
+                elif char != ',':
+                    logger.error(f"Expected ',' or '}}' between dictionary items, but found '{char}'.")
+                    logger.error(f'json_path: {self.json_path}')
+                    raise Exception
+        finally:
+            self._f.close()
+            self._f = None
+            self._buffer = ''
+
+    def iter_key(self, key: str):
+        """
+        Yields the elements of the list stored under the given top level key.
+        Everything else in the file is parsed but discarded as it is read.
+        """
+        for item_key, item in self:
+            if item_key == key:
+                yield item
+
+def round_floats(obj, precision: int):
+    """
+    Returns a copy of obj (a json compatible structure) in which every float is rounded to precision digits.
+    """
+    if type(obj) is float:
+        return round(obj, precision)
+    elif type(obj) is list or type(obj) is tuple:
+        return [round_floats(val, precision) for val in obj]
+    elif type(obj) is dict:
+        return {key: round_floats(val, precision) for key, val in obj.items()}
+    else:
+        return obj
+
+class JSON_Stream_Writer:
+    """
+    Writes a json file whose top level is a dictionary one value at a time.
+    Lists can be written from any iterable, so the entire content of the file never has to be in memory.
+
+    With the default settings, the output is identical to that of json.dump(..., indent=2, ensure_ascii=False).
+    The file is written to a uniquely named temporary file next to save_path and only moved to save_path
+    once the with block has finished without an exception, so an existing file at save_path is never left
+    half written, and writers that save to the same path at the same time don't overwrite each other's output.
+
+        ```python
+        with JSON_Stream_Writer(save_path) as writer:
+            writer.write_item('info', info_dict)
+            writer.write_list('images', (coco_image.to_dict() for coco_image in images))
+        ```
+
+    compact: If True, the file is written without any indentation or whitespace.
+    precision: If not None, all floats are rounded to this many digits after the decimal point.
+    backend: The library used to serialize each value.
+        'json': The json standard library.
+        'orjson': orjson. Much faster, but floats may be formatted differently than with json.
+                  (e.g. 1e-05 is written as 1e-5)
+        'auto': orjson if it is installed, otherwise json.
+    """
+    def __init__(self, save_path: str, compact: bool=False, precision: int=None, backend: str='json'):
+        check_value(backend, valid_value_list=['json', 'orjson', 'auto'])
+        if backend == 'orjson' and orjson is None:
+            logger.error(f"backend='orjson' was specified, but orjson is not installed.")
+            raise Exception
+        self.save_path = save_path
+        self._tmp_path = None
+        self.compact = compact
+        self.precision = precision
+        self.use_orjson = orjson is not None and backend in ['orjson', 'auto']
+        if compact:
+            self._encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+        else:
+            self._encoder = json.JSONEncoder(ensure_ascii=False, indent=2)
+        self._f = None
+        self._num_items = 0
+        self._num_elements = 0 # Number of elements written to the list that is currently open.
+
+    def __enter__(self) -> JSON_Stream_Writer:
+        save_dir, save_filename = os.path.split(self.save_path)
+        fd, self._tmp_path = tempfile.mkstemp(prefix=f'.{save_filename}.', suffix='.tmp', dir=save_dir if save_dir != '' else '.')
+        # mkstemp only gives the owner access, but the saved file should get the same permissions as a file made with open().
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(self._tmp_path, 0o666 & ~umask)
+        self._f = os.fdopen(fd, 'w', encoding='utf-8')
+        self._f.write('{')
+        self._num_items = 0
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self._f.write('}' if self.compact or self._num_items == 0 else '\n}')
+            self._f.close()
+            if exc_type is None:
+                os.replace(self._tmp_path, self.save_path)
+        finally:
+            self._f = None
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+            self._tmp_path = None
+
+    def _dumps(self, obj, indent_str: str) -> str:
+        if self.precision is not None:
+            obj = round_floats(obj, self.precision)
+        if self.use_orjson:
+            if self.compact:
+                return orjson.dumps(obj).decode('utf-8')
+            text = orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode('utf-8')
+        elif self.compact:
+            return self._encoder.encode(obj)
+        else:
+            text = self._encoder.encode(obj)
+        return text.replace('\n', '\n' + indent_str)
+
+    def _write_key(self, key: str):
+        if self.compact:
+            self._f.write(',' if self._num_items > 0 else '')
+            self._f.write(json.dumps(key, ensure_ascii=False) + ':')
+        else:
+            self._f.write(',\n  ' if self._num_items > 0 else '\n  ')
+            self._f.write(json.dumps(key, ensure_ascii=False) + ': ')
+        self._num_items += 1
+
+    def write_item(self, key: str, value):
+        """
+        Writes a value to the top level dictionary all at once.
+        """
+        self._write_key(key)
+        self._f.write(self._dumps(value, indent_str='  '))
+
+    def write_list(self, key: str, iterable):
+        """
+        Writes a list to the top level dictionary, serializing one element at a time.
+        """
+        self.begin_list(key)
+        for element in iterable:
+            self.write_element(element)
+        self.end_list()
+
+    def begin_list(self, key: str):
+        """
+        Starts a list in the top level dictionary. Add its elements with write_element and close it with end_list.
+        Use this instead of write_list when the elements are not available as a single iterable,
+        e.g. when the elements of one input are divided between several writers.
+        """
+        self._write_key(key)
+        self._f.write('[')
+        self._num_elements = 0
+
+    def write_element(self, element):
+        if self.compact:
+            self._f.write(',' if self._num_elements > 0 else '')
+        else:
+            self._f.write(',\n    ' if self._num_elements > 0 else '\n    ')
+        self._f.write(self._dumps(element, indent_str='    '))
+        self._num_elements += 1
+
+    def end_list(self):
+        self._f.write(']' if self.compact or self._num_elements == 0 else '\n  ]')
+
+    def write_serialized_list(self, key: str, text_iterable):
+        """
+        Same as write_list, but each element is given as text that was already serialized with json.
+        The text is written as is, so it should match the formatting of this writer. (e.g. compact=True)
+        """
+        self._write_key(key)
+        self._f.write('[')
+        num_elements = 0
+        for text in text_iterable:
+            if self.compact:
+                self._f.write(',' if num_elements > 0 else '')
+            else:
+                self._f.write(',\n    ' if num_elements > 0 else '\n    ')
+            self._f.write(text)
+            num_elements += 1
+        self._f.write(']' if self.compact or num_elements == 0 else '\n  ]')
@@ -0,0 +1,40 @@
+from __future__ import annotations
+from typing import List, Callable, Iterator
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+def prefetch_map(func: Callable, item_list: list, workers: int=4, max_prefetch: int=8) -> Iterator:
+    """
+    Yields func(item) for every item in item_list, in order.
+    The results are computed ahead of time by a pool of background threads, so the caller can consume
+    (display, encode, write) one result while the next ones are being read and rendered.
+
+    workers: The number of background threads. If None or 1, each result is computed when it is needed.
+    max_prefetch: The maximum number of results that are computed ahead of the caller.
+                  This bounds the number of decoded frames that are held in memory at the same time.
+
+    Note: If the caller stops early (break, exception), the results that haven't been started yet are cancelled.
+    """
+    if workers is None or workers <= 1:
+        for item in item_list:
+            yield func(item)
+        return
+
+    item_iter = iter(item_list)
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = deque()
+    try:
+        for item in item_iter:
+            futures.append(executor.submit(func, item))
+            if len(futures) >= max(max_prefetch, 1):
+                break
+        while len(futures) > 0:
+            result = futures.popleft().result()
+            for item in item_iter:
+                futures.append(executor.submit(func, item))
+                break
+            yield result
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
@@ -0,0 +1,126 @@
+from __future__ import annotations
+from typing import List
+import hashlib
+import numpy as np
+from logger import logger
+
+def _get_part_fractions(ratio: List[int]) -> np.ndarray:
+    fractions = np.array(ratio, dtype=np.float64)
+    if len(fractions) == 0 or (fractions < 0).any() or fractions.sum() == 0:
+        logger.error(f'Invalid ratio: {ratio}')
+        logger.error(f'ratio must contain at least one positive value and no negative values.')
+        raise Exception
+    return fractions / fractions.sum()
+
+def _fill_by_demand(weights: np.ndarray, demand: np.ndarray) -> np.ndarray:
+    """
+    Lays weights out one after the other and divides the line into one segment per part,
+    with segment lengths proportional to demand.
+    Returns the part whose segment contains the center of each weight.
+    Parts with a demand of 0 are never chosen.
+    """
+    bounds = np.cumsum(demand) / demand.sum() * weights.sum()
+    centers = np.cumsum(weights) - weights / 2
+    return np.minimum(np.searchsorted(bounds, centers, side='left'), len(demand) - 1)
+
+def get_stratified_parts(
+    ann_img_idx: np.ndarray, ann_cat_idx: np.ndarray, num_images: int, num_categories: int,
+    ratio: List[int], seed: int=None
+) -> (np.ndarray, np.ndarray):
+    """
+    Assigns each image to a part so that the number of annotations of every category is divided
+    between the parts as closely to ratio as possible.
+
+    The categories are processed from the rarest to the most common.
+    For each category, the images that contain it and haven't been assigned yet are handed out to the parts
+    according to how many annotations of that category each part is still missing.
+    The annotation counts of all of the categories in the assigned images are then added to each part's totals,
+    so later (more common) categories make up for whatever the rarer ones pushed off balance.
+    Images without any annotations are handed out last, so that the number of images follows ratio.
+
+    ann_img_idx: The index of the image of each annotation.
+    ann_cat_idx: The index of the category of each annotation.
+    num_images: The total number of images.
+    num_categories: The total number of categories.
+    ratio: The ratio between the parts.
+    seed: Seed for the order in which images are handed out. The result is always the same for the same seed.
+
+    Returns (part_idx, priority):
+        part_idx: The index of the part of each image.
+        priority: A random permutation of the image indexes, which can be used to shuffle the images of each part.
+    """
+    fractions = _get_part_fractions(ratio)
+    num_parts = len(fractions)
+    ann_img_idx = np.asarray(ann_img_idx, dtype=np.int64)
+    ann_cat_idx = np.asarray(ann_cat_idx, dtype=np.int64)
+    if len(ann_img_idx) != len(ann_cat_idx):
+        logger.error(f'len(ann_img_idx) == {len(ann_img_idx)} != {len(ann_cat_idx)} == len(ann_cat_idx)')
+        raise Exception
+
+    rng = np.random.RandomState(seed)
+    priority = rng.permutation(num_images)
+    rank = np.empty(num_images, dtype=np.int64)
+    rank[priority] = np.arange(num_images)
+
+    # Sparse image x category count matrix: one entry per (image, category) pair that has annotations.
+    pair_keys, pair_counts = np.unique(ann_img_idx * num_categories + ann_cat_idx, return_counts=True)
+    pair_img = pair_keys // num_categories
+    pair_cat = pair_keys % num_categories
+    cat_totals = np.bincount(pair_cat, weights=pair_counts, minlength=num_categories)
+    targets = fractions[:, None] * cat_totals[None, :]
+    part_totals = np.zeros((num_parts, num_categories), dtype=np.float64)
+
+    # Pairs grouped by category, so that the images of each category can be sliced out.
+    cat_order = np.argsort(pair_cat, kind='stable')
+    cat_bounds = np.searchsorted(pair_cat[cat_order], np.arange(num_categories + 1))
+
+    part_idx = np.full(num_images, -1, dtype=np.int64)
+    for cat_idx in np.argsort(cat_totals, kind='stable'):
+        if cat_totals[cat_idx] == 0:
+            continue
+        pairs = cat_order[cat_bounds[cat_idx]:cat_bounds[cat_idx+1]]
+        pairs = pairs[part_idx[pair_img[pairs]] < 0]
+        if len(pairs) == 0:
+            continue
+        pairs = pairs[np.argsort(rank[pair_img[pairs]], kind='stable')]
+        demand = np.clip(targets[:, cat_idx] - part_totals[:, cat_idx], 0, None)
+        if demand.sum() == 0:
+            demand = fractions
+        new_img_idx = pair_img[pairs]
+        part_idx[new_img_idx] = _fill_by_demand(pair_counts[pairs].astype(np.float64), demand)
+
+        # Add every category of the newly assigned images to the part totals.
+        is_new = np.zeros(num_images, dtype=bool)
+        is_new[new_img_idx] = True
+        new_pairs = is_new[pair_img]
+        np.add.at(part_totals, (part_idx[pair_img[new_pairs]], pair_cat[new_pairs]), pair_counts[new_pairs])
+
+    # Images without annotations
+    remaining = priority[part_idx[priority] < 0]
+    if len(remaining) > 0:
+        num_assigned = np.bincount(part_idx[part_idx >= 0], minlength=num_parts)
+        demand = np.clip(fractions * num_images - num_assigned, 0, None)
+        if demand.sum() == 0:
+            demand = fractions
+        part_idx[remaining] = _fill_by_demand(np.ones(len(remaining)), demand)
+
+    return part_idx, priority
+
+def get_hash_fraction(key: str, salt: str=None) -> float:
+    """
+    Maps key to a number in [0, 1) using its sha1 hash.
+    The same key (and salt) always gives the same number, no matter which other keys exist.
+
+    salt: If not None, it is hashed together with key, which results in a different, but still fixed, mapping.
+    """
+    text = key if salt is None else f'{salt}/{key}'
+    return int(hashlib.sha1(text.encode('utf-8')).hexdigest()[:16], 16) / 2**64
+
+def get_hash_part(key: str, ratio: List[int], salt: str=None) -> int:
+    """
+    Assigns key to a part according to ratio, using get_hash_fraction.
+    Since the part only depends on key, adding new keys never moves existing keys to a different part.
+    """
+    bounds = np.cumsum(_get_part_fractions(ratio))
+    part_idx = int(np.searchsorted(bounds, get_hash_fraction(key, salt=salt), side='right'))
+    return min(part_idx, len(ratio) - 1)
@@ -0,0 +1,29 @@
+import time
+import cv2
+import numpy as np
+from logger import logger
+from annotation_utils.coco.structs import COCO_Dataset
+
+dataset = COCO_Dataset.load_from_path(json_path='output.json')
+
+for params in [{}, {'seg_transparent': False}, {'seg_color': [50, 60, 70]}, {'draw_order': ['kpt', 'bbox', 'seg']}]:
+    draw_order = params['draw_order'] if 'draw_order' in params else ['seg', 'bbox', 'skeleton', 'kpt']
+    other_params = {key: val for key, val in params.items() if key != 'draw_order'}
+    for coco_image in dataset.images[:20]:
+        coco_anns = dataset.annotations.get_annotations_from_imgIds([coco_image.id])
+        if len(coco_anns) == 0:
+            continue
+        t0 = time.time()
+        preview = dataset.get_preview(image_id=coco_image.id, **params)
+        batched_time = time.time() - t0
+
+        # Reference: one draw_annotation call per annotation and draw target, in the same order.
+        t0 = time.time()
+        expected = cv2.imread(coco_image.coco_url)
+        for draw_target in draw_order:
+            for coco_ann in coco_anns:
+                expected = dataset.draw_annotation(img=expected, ann_id=coco_ann.id, draw_order=[draw_target], **other_params)
+        reference_time = time.time() - t0
+        assert np.array_equal(preview, expected)
+    logger.purple(f'{params}: batched {batched_time:.4f} sec, one annotation at a time {reference_time:.4f} sec')
+logger.green('Batched drawing checks passed.')
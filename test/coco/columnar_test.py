@@ -0,0 +1,27 @@
+from logger import logger
+from common_utils.common_types.bbox import BBox
+from annotation_utils.coco.structs import COCO_Dataset, COCO_Annotation_View
+
+dataset = COCO_Dataset.load_from_path(json_path='output.json', check_paths=False, columnar=True)
+logger.purple(f'dataset.annotations[0]: {dataset.annotations[0]}')
+assert type(dataset.annotations[0]) is COCO_Annotation_View
+
+# Views behave like regular COCO_Annotation objects.
+dataset.annotations.sort(attr_name='category_id')
+coco_ann = dataset.annotations[0]
+coco_ann.bbox = BBox(xmin=0, ymin=0, xmax=10, ymax=10)
+assert dataset.annotations[0].bbox.to_list() == [0, 0, 10, 10]
+del dataset.annotations[1]
+
+# Views compare by value, just like COCO_Annotation.
+coco_ann = dataset.annotations[1]
+assert coco_ann == coco_ann.copy() and coco_ann.copy() == coco_ann
+assert coco_ann != dataset.annotations[2]
+
+# The underlying arrays can be used directly for vectorized processing.
+columns = dataset.annotations.to_columns()
+logger.cyan(columns)
+logger.cyan(f'mean bbox area: {(columns.bbox[:, 2] * columns.bbox[:, 3]).mean()}')
+logger.cyan(f'visible keypoints per annotation: {(columns.keypoints[:, :, 2] > 0).sum(axis=1)}')
+
+dataset.save_to_path('columnar_output.json', overwrite=True)
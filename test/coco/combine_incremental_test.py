@@ -0,0 +1,74 @@
+import os
+import json
+from logger import logger
+from common_utils.file_utils import make_dir_if_not_exists, delete_all_files_in_dir
+from annotation_utils.coco.structs import COCO_Dataset
+
+work_dir = 'combine_incremental_dump'
+make_dir_if_not_exists(work_dir)
+delete_all_files_in_dir(work_dir, ask_permission=False)
+
+def make_json(json_path: str, num_images: int, license_name: str):
+    json.dump(
+        {
+            'info': {'description': 'x', 'url': '', 'version': '1', 'year': 2020, 'contributor': '', 'date_created': ''},
+            'licenses': [{'id': 0, 'name': license_name, 'url': 'u'}],
+            'images': [
+                {
+                    'id': i, 'license': 0, 'file_name': f'{json_path}_{i}.png', 'coco_url': f'/x/{json_path}_{i}.png',
+                    'height': 10, 'width': 10, 'date_captured': '', 'flickr_url': ''
+                }
+                for i in range(num_images)
+            ],
+            'annotations': [
+                {
+                    'id': i, 'image_id': i, 'category_id': 1, 'bbox': [0, 0, 1, 1], 'area': 1, 'iscrowd': 0,
+                    'segmentation': [], 'keypoints': [], 'num_keypoints': 0
+                }
+                for i in range(num_images)
+            ],
+            'categories': [{'id': 1, 'name': 'c', 'supercategory': 's', 'keypoints': [], 'skeleton': []}]
+        },
+        open(json_path, 'w')
+    )
+
+json_path_list = [f'{work_dir}/{i}.json' for i in range(3)]
+for i, json_path in enumerate(json_path_list):
+    make_json(json_path, num_images=i+2, license_name=f'license{i % 2}')
+save_path, expected_path = f'{work_dir}/merged.json', f'{work_dir}/expected.json'
+state_dir = f'{save_path}.merge_state'
+COCO_Dataset.combine_to_path(json_path_list, save_path=expected_path, check_paths=False)
+
+# Each call only appends what it merged to the merger log.
+for i in range(len(json_path_list)):
+    COCO_Dataset.combine_incremental(json_path_list[:i+1], save_path=save_path, check_paths=False)
+    assert len(open(f'{state_dir}/merger.jsonl').readlines()) == i + 1
+assert open(save_path).read() == open(expected_path).read()
+state = json.load(open(f'{state_dir}/state.json'))
+assert state['saved'] and state['merger_log_size'] == os.path.getsize(f'{state_dir}/merger.jsonl')
+
+# A merge state whose files are missing or shorter than recorded must not be used.
+os.rename(f'{state_dir}/images.jsonl', f'{work_dir}/images.jsonl')
+try:
+    COCO_Dataset.combine_incremental(json_path_list, save_path=save_path, check_paths=False)
+    raise AssertionError
+except AssertionError:
+    raise
+except Exception:
+    pass
+assert not os.path.exists(f'{state_dir}/images.jsonl')
+with open(f'{state_dir}/images.jsonl', 'w') as f:
+    f.write(open(f'{work_dir}/images.jsonl').read()[:-1])
+try:
+    COCO_Dataset.combine_incremental(json_path_list, save_path=save_path, check_paths=False)
+    raise AssertionError
+except AssertionError:
+    raise
+except Exception:
+    pass
+os.replace(f'{work_dir}/images.jsonl', f'{state_dir}/images.jsonl')
+make_json(f'{work_dir}/3.json', num_images=1, license_name='license2')
+COCO_Dataset.combine_incremental(json_path_list + [f'{work_dir}/3.json'], save_path=save_path, check_paths=False)
+COCO_Dataset.combine_to_path(json_path_list + [f'{work_dir}/3.json'], save_path=expected_path, check_paths=False, overwrite=True)
+assert open(save_path).read() == open(expected_path).read()
+logger.green('Incremental combine checks passed.')
@@ -0,0 +1,58 @@
+import numpy as np
+from logger import logger
+from common_utils.common_types.bbox import BBox
+from common_utils.cv_drawing_utils import draw_bbox, draw_keypoints, draw_skeleton
+from annotation_utils.coco.util import draw_bbox_in_place, draw_keypoints_in_place, draw_skeleton_in_place
+
+rng = np.random.default_rng(0)
+labels = ['nose', 'left_eye', 'right_eye', 'left_ear']
+skeleton = [[0, 1], [0, 2], [1, 3]]
+
+def check(ref_func, in_place_func, img: np.ndarray, *args, **kwargs):
+    """
+    The in-place function has to draw exactly what the common_utils function draws, and it has to draw it into img.
+    """
+    ref = ref_func(img.copy(), *args, **kwargs)
+    if not tiny:
+        assert not np.array_equal(ref, img), f'{ref_func.__name__} did not draw anything'
+    in_place_func(img, *args, **kwargs)
+    assert np.array_equal(img, ref), f'{in_place_func.__name__} does not match {ref_func.__name__}'
+
+img = rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)
+for i in range(50):
+    # Tiny boxes and keypoints hit the font size clamps. Their labels can be too small to show up.
+    tiny = i % 5 == 0
+    x, y = rng.uniform(0, 400, 2)
+    w, h = rng.uniform(0, 2, 2) if tiny else rng.uniform(10, 200, 2)
+    bbox = BBox(xmin=x, ymin=y, xmax=x+w, ymax=y+h)
+    check(draw_bbox, draw_bbox_in_place, img, bbox)
+    check(draw_bbox, draw_bbox_in_place, img, bbox, text='person', thickness=i % 3 + 1, label_only=i % 2 == 0)
+    check(draw_bbox, draw_bbox_in_place, img, bbox, text='p', label_thickness=1, color=[255, 0, 255])
+
+    kpts = rng.uniform(100, 101, (4, 2)) if tiny else rng.uniform(0, 400, (4, 2))
+    check(draw_keypoints, draw_keypoints_in_place, img, kpts, radius=i % 4 + 1, ignore_kpt_idx=[i % 4])
+    check(
+        draw_keypoints, draw_keypoints_in_place, img, kpts, keypoint_labels=labels,
+        show_keypoints_labels=True, label_thickness=i % 2 + 1, ignore_kpt_idx=[1]
+    )
+    check(draw_keypoints, draw_keypoints_in_place, img, kpts, keypoint_labels=labels, label_only=True, color=[0, 255, 0])
+
+    check(draw_skeleton, draw_skeleton_in_place, img, kpts, skeleton, thickness=i % 5 + 1, ignore_kpt_idx=[2])
+    check(draw_skeleton, draw_skeleton_in_place, img, kpts.tolist(), [[a+1, b+1] for a, b in skeleton], index_offset=-1, color=[0, 0, 255])
+
+# Nothing is drawn for images without keypoints.
+tiny = False
+empty_kpts = np.zeros((0, 2))
+before = img.copy()
+draw_keypoints_in_place(img, empty_kpts, keypoint_labels=labels, show_keypoints_labels=True)
+draw_skeleton_in_place(img, empty_kpts, skeleton)
+assert np.array_equal(img, before)
+
+# Skeletons that do not fit the keypoints are rejected the same way.
+for index_offset in [-1, 1]:
+    try:
+        draw_skeleton_in_place(img, kpts, skeleton, index_offset=index_offset)
+        raise AssertionError
+    except IndexError:
+        pass
+logger.green('In-place drawing checks passed.')
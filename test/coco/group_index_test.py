@@ -0,0 +1,57 @@
+from logger import logger
+from annotation_utils.coco.structs import COCO_Image_Handler, COCO_Image, \
+    COCO_Annotation_Handler, COCO_Annotation, COCO_Annotation_Columns
+from common_utils.common_types.bbox import BBox
+
+def make_ann(id: int, image_id: int, category_id: int=0) -> COCO_Annotation:
+    return COCO_Annotation(
+        id=id, category_id=category_id, image_id=image_id,
+        bbox=BBox(xmin=0, ymin=0, xmax=10, ymax=10)
+    )
+
+anns = COCO_Annotation_Handler([make_ann(id=i, image_id=i // 10, category_id=i % 3) for i in range(100)])
+assert [ann.id for ann in anns.get_annotations_from_imgIds([2])] == list(range(20, 30))
+
+# An attribute changed in place to a queried value has to show up in the next query.
+anns[5].image_id = 2
+assert [ann.id for ann in anns.get_annotations_from_imgIds([2])] == [5] + list(range(20, 30))
+assert 5 not in [ann.id for ann in anns.get_annotations_from_imgIds([0])]
+anns[50].category_id = 7
+assert [ann.id for ann in anns.get_annotations_from_catIds([7])] == [50]
+
+images = COCO_Image_Handler(
+    [
+        COCO_Image(
+            license_id=0, file_name=f'{i}.png', coco_url=f'img/{i}.png',
+            height=10, width=10, date_captured='', flickr_url=None, id=i
+        )
+        for i in range(10)
+    ]
+)
+assert len(images.get_images_from_licenseIds([1])) == 0
+images[3].license_id = 1
+assert [coco_image.id for coco_image in images.get_images_from_licenseIds([1])] == [3]
+images[4].id = 30
+assert [coco_image.id for coco_image in images.get_images_from_imgIds([30])] == [30]
+
+# The same goes for columnar annotations.
+view_anns = COCO_Annotation_Handler.from_columns(COCO_Annotation_Columns.from_annotations(anns.annotation_list))
+assert len(view_anns.get_annotations_from_imgIds([9])) == 10
+view_anns[0].image_id = 9
+assert [ann.id for ann in view_anns.get_annotations_from_imgIds([9])] == [0] + list(range(90, 100))
+
+# Constructing or copying objects in between lookups must not invalidate the indexes of a handler.
+group_index = anns._group_indexes['image_id'][0]
+for i in range(100):
+    other_ann = make_ann(id=1000+i, image_id=i).copy()
+    other_ann.image_id = 2
+    assert [ann.id for ann in anns.get_annotations_from_imgIds([2])] == [5] + list(range(20, 30))
+assert anns._group_indexes['image_id'][0] is group_index
+
+# A write through an object that is shared by two handlers has to reach both of them.
+other_anns = COCO_Annotation_Handler(anns.annotation_list[:50])
+assert len(other_anns.get_annotations_from_imgIds([3])) == 10
+anns[31].image_id = 8
+assert 31 not in [ann.id for ann in other_anns.get_annotations_from_imgIds([3])]
+assert 31 in [ann.id for ann in anns.get_annotations_from_imgIds([8])]
+logger.green('Group index checks passed.')
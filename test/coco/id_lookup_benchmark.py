@@ -0,0 +1,91 @@
+import time
+import random
+from logger import logger
+from annotation_utils.coco.structs import COCO_Annotation_Handler, COCO_Annotation
+from common_utils.common_types.bbox import BBox
+
+def make_handler(n: int) -> COCO_Annotation_Handler:
+    return COCO_Annotation_Handler(
+        [
+            COCO_Annotation(id=i, category_id=0, image_id=i // 10, bbox=BBox(xmin=0, ymin=0, xmax=10, ymax=10))
+            for i in range(n)
+        ]
+    )
+
+num_lookups = 10000
+for n in [1000, 10000, 100000, 200000]:
+    handler = make_handler(n)
+    query_ids = [random.randint(0, n-1) for i in range(num_lookups)]
+    handler.get_obj_from_id(0) # Build the index before timing.
+    t0 = time.time()
+    for ann_id in query_ids:
+        assert handler.get_obj_from_id(ann_id).id == ann_id
+    dt = time.time() - t0
+    logger.purple(f'n={n}: {num_lookups} lookups in {dt:.4f} sec ({1e6*dt/num_lookups:.3f} usec/lookup)')
+
+# The index has to stay correct while the handler is being modified.
+handler = make_handler(1000)
+handler.get_obj_from_id(0)
+del handler[10]
+handler.append(COCO_Annotation(id=5000, category_id=0, image_id=0, bbox=BBox(xmin=0, ymin=0, xmax=1, ymax=1)))
+handler[0] = COCO_Annotation(id=6000, category_id=0, image_id=0, bbox=BBox(xmin=0, ymin=0, xmax=1, ymax=1))
+handler.shuffle()
+handler.sort(attr_name='id')
+handler[20].id = 7000
+assert handler.get_obj_from_id(5000).id == 5000
+assert handler.get_obj_from_id(6000).id == 6000
+assert handler.get_obj_from_id(7000).id == 7000
+for missing_id in [0, 10]:
+    try:
+        handler.get_obj_from_id(missing_id)
+        raise AssertionError
+    except AssertionError:
+        raise
+    except Exception:
+        pass
+
+# With duplicate ids, the first object in the current order has to be returned after a reorder.
+handler = make_handler(10)
+handler.append(COCO_Annotation(id=3, category_id=1, image_id=0, bbox=BBox(xmin=0, ymin=0, xmax=1, ymax=1)))
+assert handler.get_obj_from_id(3).category_id == 0
+handler.sort(attr_name='category_id', reverse=True)
+assert handler.get_obj_from_id(3).category_id == 1
+
+# Misses must not rebuild the index unless an id was written in the meantime.
+handler = make_handler(100000)
+handler.get_obj_from_id(0)
+id_index = handler._id_index
+t0 = time.time()
+for missing_id in range(100000, 100000 + num_lookups):
+    assert handler._lookup_id_index(missing_id) is None
+logger.purple(f'{num_lookups} misses in {time.time()-t0:.4f} sec')
+assert handler._id_index is id_index
+handler[500].id = 100001
+assert handler.get_obj_from_id(100001) is handler[500]
+
+# Constructing or copying objects that are not in the handler must not invalidate its index either.
+id_index = handler._id_index
+for missing_id in range(200000, 200000 + num_lookups):
+    other_ann = COCO_Annotation(id=missing_id, category_id=0, image_id=0, bbox=BBox(xmin=0, ymin=0, xmax=1, ymax=1)).copy()
+    other_ann.id += 1
+    assert handler._lookup_id_index(missing_id) is None
+assert handler._id_index is id_index
+
+# A write through an object that two handlers share has to reach both of them.
+other_handler = COCO_Annotation_Handler(handler.obj_list[:1000])
+assert other_handler.get_obj_from_id(1) is handler.get_obj_from_id(1)
+handler[1].id = 100002
+assert other_handler.get_obj_from_id(100002) is handler.get_obj_from_id(100002) is handler[1]
+logger.green('Index consistency checks passed.')
+
+# Bulk selection by id should be linear in the number of annotations and ids.
+handler = make_handler(200000)
+query_ids = set(range(0, 200000, 2))
+t0 = time.time()
+idx_array = handler.get_idx_array_from_attr_values('id', query_ids)
+selected = handler.take(idx_array)
+logger.purple(f'Selected {len(selected)} of {len(handler)} annotations by id in {time.time()-t0:.4f} sec')
+assert [coco_ann.id for coco_ann in selected] == sorted(query_ids)
+assert selected[0] is handler[0]
+assert len(handler.get_annotations_from_annIds(query_ids)) == len(query_ids)
+logger.green('Bulk selection checks passed.')
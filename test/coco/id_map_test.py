@@ -0,0 +1,45 @@
+import pickle
+from logger import logger
+from annotation_utils.coco.util import ID_Map, ID_Mapper
+
+mapper = ID_Mapper()
+for i in range(5):
+    mapper.add(unique_key='a', old_id=i, new_id=i+10)
+assert mapper.get_new_id('a', 3) == (True, 13)
+
+# Changing a map has to show up in the next lookup.
+mapper.id_maps[3].new_id = 99
+assert mapper.get_new_id('a', 3) == (True, 99)
+mapper[3].old_id = 30
+assert mapper.get_new_id('a', 3) == (False, None)
+assert mapper.get_new_id('a', 30) == (True, 99)
+mapper[3].unique_key = 'b'
+assert mapper.get_new_id('b', 30) == (True, 99)
+
+# So does changing id_maps directly.
+mapper.id_maps.append(ID_Map(unique_key='a', old_id=7, new_id=70))
+assert mapper.get_new_id('a', 7) == (True, 70)
+mapper.id_maps[0] = ID_Map(unique_key='c', old_id=0, new_id=5)
+assert mapper.get_new_id('a', 0) == (False, None)
+assert mapper.get_new_id('c', 0) == (True, 5)
+del mapper.id_maps[0]
+assert mapper.get_new_id('c', 0) == (False, None)
+mapper.id_maps = [ID_Map(unique_key='d', old_id=1, new_id=2)]
+assert mapper.get_new_id('a', 1) == (False, None)
+assert mapper.get_new_ids('d', [1, 5])[1].tolist() == [2, -1]
+mapper.id_maps[0].new_id = 3
+assert mapper.get_new_ids('d', [1])[1].tolist() == [3]
+
+# A map that is shared by two mappers updates both of them.
+other_mapper = ID_Mapper()
+other_mapper.add_id_map(mapper[0])
+assert other_mapper.get_new_id('d', 1) == (True, 3)
+mapper[0].new_id = 4
+assert mapper.get_new_id('d', 1) == other_mapper.get_new_id('d', 1) == (True, 4)
+
+# Copies keep working after being unpickled.
+mapper_copy = pickle.loads(pickle.dumps(mapper))
+mapper_copy[0].new_id = 6
+assert mapper_copy.get_new_id('d', 1) == (True, 6)
+assert mapper.get_new_id('d', 1) == (True, 4)
+logger.green('ID map checks passed.')
@@ -0,0 +1,46 @@
+import os
+import time
+import numpy as np
+from logger import logger
+from annotation_utils.coco.structs import COCO_Dataset, COCO_Image_Cache
+
+dataset = COCO_Dataset.load_from_path(json_path='output.json')
+coco_image = dataset.images[0]
+
+# Repeated previews of the same image only decode it once, and look the same as without a cache.
+img_cache = COCO_Image_Cache()
+expected = dataset.get_preview(image_id=coco_image.id)
+for kpt_radius in [2, 4, 8]:
+    preview = dataset.get_preview(image_id=coco_image.id, kpt_radius=kpt_radius, img_cache=img_cache)
+    assert np.array_equal(preview, dataset.get_preview(image_id=coco_image.id, kpt_radius=kpt_radius))
+assert img_cache.misses == 1 and img_cache.hits == 2
+assert np.array_equal(dataset.get_preview(image_id=coco_image.id, img_cache=img_cache), expected)
+
+# Copies returned by the cache can be drawn on without changing the cached image.
+img = img_cache.imread(coco_image.coco_url)
+img[:] = 0
+assert not np.array_equal(img_cache.imread(coco_image.coco_url), img)
+assert not img_cache.imread(coco_image.coco_url, copy=False).flags.writeable
+
+# Changing the file on disk invalidates its entry.
+misses = img_cache.misses
+stat = os.stat(coco_image.coco_url)
+os.utime(coco_image.coco_url, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+img_cache.imread(coco_image.coco_url)
+assert img_cache.misses == misses + 1
+os.utime(coco_image.coco_url, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+# The least recently used images are dropped once the byte budget is exceeded.
+img_nbytes = img_cache.imread(coco_image.coco_url, copy=False).nbytes
+img_cache = COCO_Image_Cache(max_bytes=2 * img_nbytes)
+for other_image in dataset.images[:3]:
+    img_cache.imread(other_image.coco_url)
+assert len(img_cache) <= 2 and img_cache.num_bytes <= img_cache.max_bytes
+assert dataset.images[0].coco_url not in img_cache._entries
+logger.green('COCO_Image_Cache checks passed.')
+
+img_cache = COCO_Image_Cache()
+for i in range(2):
+    t0 = time.time()
+    dataset.save_video(save_path='image_cache_test.mp4', overwrite=True, show_details=True, workers=4, img_cache=img_cache)
+    logger.purple(f'save_video pass {i}: {time.time()-t0:.2f} sec, {img_cache}')
@@ -0,0 +1,33 @@
+from logger import logger
+from annotation_utils.coco.structs import COCO_Annotation
+from annotation_utils.coco.structs.objects import LazyGeometry
+
+ann_dict = {
+    'segmentation': [[0, 0, 10, 0, 10, 10, 0, 10]],
+    'num_keypoints': 1, 'area': 100, 'iscrowd': 0,
+    'keypoints': [5, 5, 2], 'image_id': 0,
+    'bbox': [0, 0, 10, 10], 'category_id': 0, 'id': 0,
+    'keypoints_3d': [1, 2, 3, 2]
+}
+
+# A lazily loaded annotation has to equal the same annotation loaded eagerly.
+eager_ann = COCO_Annotation.from_dict(ann_dict)
+lazy_ann = COCO_Annotation.from_dict(ann_dict, lazy=True)
+assert lazy_ann == eager_ann
+assert lazy_ann == COCO_Annotation.from_dict(ann_dict, lazy=True)
+
+# Copies don't share placeholders, and unbuilt geometry stays lazy.
+lazy_ann = COCO_Annotation.from_dict(ann_dict, lazy=True)
+ann_copy0, ann_copy1 = lazy_ann.copy(), lazy_ann.copy()
+assert type(ann_copy0._bbox) is LazyGeometry and ann_copy0._bbox is not ann_copy1._bbox
+assert ann_copy0._bbox is not lazy_ann._bbox
+assert ann_copy0 == ann_copy1 == eager_ann
+
+# Saving must not build any geometry.
+lazy_ann = COCO_Annotation.from_dict(ann_dict, lazy=True)
+for strict in [True, False]:
+    assert lazy_ann.to_dict(strict=strict)['keypoints_3d'] == ann_dict['keypoints_3d']
+for name in ['_segmentation', '_bbox', '_keypoints', '_keypoints_3d']:
+    assert type(getattr(lazy_ann, name)) is LazyGeometry, name
+assert lazy_ann.to_dict() == eager_ann.to_dict()
+logger.green('Lazy geometry checks passed.')
@@ -0,0 +1,35 @@
+import os
+import json
+import time
+from logger import logger
+from annotation_utils.coco.structs import COCO_Dataset, COCO_Load_Cache
+
+json_path = 'output.json'
+cache = COCO_Load_Cache(validation='stat')
+cache.invalidate(json_path)
+
+# The snapshot replaces json parsing in every mode, but only columnar loads skip object construction as well,
+# so they gain the most. Eager and lazy loads build their objects straight from the cached arrays.
+for mode in [{}, {'lazy': True}, {'columnar': True}]:
+    t0 = time.time()
+    COCO_Dataset.load_from_path(json_path=json_path, check_paths=False, **mode)
+    no_cache_time = time.time() - t0
+    cache.invalidate(json_path)
+    t0 = time.time()
+    cold = COCO_Dataset.load_from_path(json_path=json_path, check_paths=False, **mode, cache=cache)
+    cold_time = time.time() - t0
+    t0 = time.time()
+    warm = COCO_Dataset.load_from_path(json_path=json_path, check_paths=False, **mode, cache=cache)
+    warm_time = time.time() - t0
+    assert len(warm.images) == len(cold.images) and len(warm.annotations) == len(cold.annotations)
+    # The snapshot must not change the result, not even int coordinates into floats.
+    assert json.dumps(warm.annotations.to_dict_list()) == json.dumps(cold.annotations.to_dict_list())
+    logger.purple(
+        f'{mode}: no cache {no_cache_time:.3f} sec, cold {cold_time:.3f} sec, warm {warm_time:.3f} sec'
+    )
+logger.cyan(f'cache size: {os.path.getsize(cache.get_cache_path(json_path))} bytes, json size: {os.path.getsize(json_path)} bytes')
+
+# Touching the json file invalidates the snapshot.
+os.utime(json_path)
+assert not cache.is_valid(json_path)
+cache.invalidate(json_path)
@@ -0,0 +1,135 @@
+import os
+import gc
+import json
+import time
+import timeit
+import tracemalloc
+from logger import logger
+from annotation_utils.coco.structs import COCO_Dataset, COCO_Image, COCO_Annotation
+
+# Synthetic dataset with 1M bbox-only annotations (10 per image)
+json_path = 'memory_benchmark.json'
+num_images, anns_per_image = 100000, 10
+if not os.path.exists(json_path):
+    json.dump(
+        {
+            'info': {
+                'description': 'memory benchmark', 'url': '', 'version': '1.0', 'year': '2020',
+                'contributor': '', 'date_created': '2020/01/01'
+            },
+            'licenses': [{'url': 'url', 'id': 0, 'name': 'license'}],
+            'images': [
+                {
+                    'license': 0, 'file_name': f'{i:06}.png', 'coco_url': f'img/{i:06}.png',
+                    'height': 480, 'width': 640, 'date_captured': '2020/01/01', 'flickr_url': None, 'id': i
+                }
+                for i in range(num_images)
+            ],
+            'annotations': [
+                {
+                    'segmentation': [], 'num_keypoints': 0, 'area': 400,
+                    'iscrowd': 0, 'keypoints': [], 'image_id': i // anns_per_image,
+                    'bbox': [0, 0, 20, 20], 'category_id': 0, 'id': i
+                }
+                for i in range(num_images * anns_per_image)
+            ],
+            'categories': [
+                {'supercategory': 'person', 'id': 0, 'name': 'person', 'keypoints': [], 'skeleton': []}
+            ]
+        },
+        open(json_path, 'w')
+    )
+
+for mode in [{}, {'lazy': True}, {'columnar': True}]:
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.time()
+    dataset = COCO_Dataset.load_from_path(json_path=json_path, check_paths=False, **mode)
+    load_time = time.time() - t0
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    logger.purple(
+        f'{mode}: {len(dataset.annotations)} annotations, {current/2**20:.1f} MiB held ' \
+        f'({current/len(dataset.annotations):.1f} bytes/annotation), {peak/2**20:.1f} MiB peak, loaded in {load_time:.2f} sec'
+    )
+    if mode == {}:
+        eager_dataset = dataset
+    del dataset
+
+# The modes above all use slotted objects. To see what the slots themselves save, the objects of the eager
+# dataset are rebuilt with the same attribute values, once in their own class and once in a plain class that keeps
+# the attributes in a per-instance __dict__, the way the classes did before they had __slots__.
+# A __dict__-bearing subclass wouldn't do, since its instances would still carry the inherited slots.
+def rebuild(obj_list: list, cls: type, result: list):
+    for i, obj in enumerate(obj_list):
+        new_obj = object.__new__(cls)
+        if hasattr(type(obj), '_index_watchers'):
+            new_obj._index_watchers = None # assigned first, like in __init__
+        for name, value in obj._get_attr_dict().items():
+            setattr(new_obj, name, value)
+        result[i] = new_obj
+
+def measure(obj_list: list, cls: type) -> int:
+    rebuilt = [None] * len(obj_list) # allocated beforehand, so that only the objects are measured
+    gc.collect()
+    tracemalloc.start()
+    rebuild(obj_list, cls, rebuilt)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rebuilt
+    return current
+
+dataset_sizes = {'slots': 0, '__dict__': 0}
+for obj_list in [eager_dataset.images, eager_dataset.annotations]: # licenses and categories are too few to matter
+    obj_list = list(obj_list)
+    cls = type(obj_list[0])
+    dict_cls = type(f'{cls.__name__}_Dict', (), {})
+    slots_size, dict_size = measure(obj_list, cls), measure(obj_list, dict_cls)
+    assert slots_size < dict_size
+    dataset_sizes['slots'] += slots_size
+    dataset_sizes['__dict__'] += dict_size
+    logger.purple(
+        f'{cls.__name__}: {slots_size/len(obj_list):.1f} bytes/object with slots, ' \
+        f'{dict_size/len(obj_list):.1f} bytes/object with __dict__ ({len(obj_list)} objects)'
+    )
+logger.purple(
+    f'images and annotations: {dataset_sizes["slots"]/2**20:.1f} MiB with slots, {dataset_sizes["__dict__"]/2**20:.1f} MiB with __dict__, ' \
+    f'saving {(dataset_sizes["__dict__"] - dataset_sizes["slots"])/2**20:.1f} MiB'
+)
+
+# The slots that hold an indexed attribute (id, image_id, category_id, ...) are properties that report writes
+# to the handlers that indexed the object (refer to track_slot_writes), so writing them costs more than writing
+# a plain slot or a __dict__ entry. Reads are not affected.
+coco_image = eager_dataset.images[0]
+rebuilt = [None]
+rebuild([coco_image], type('COCO_Image_Dict', (), {}), rebuilt)
+dict_image = rebuilt[0]
+unwatched_image = coco_image.copy()
+eager_dataset.images.get_obj_from_id(coco_image.id) # coco_image is now watched by the handler's index
+number = 1000000
+write_times = {
+    'plain slot': timeit.timeit(lambda: setattr(unwatched_image, 'file_name', 'a.png'), number=number),
+    '__dict__': timeit.timeit(lambda: setattr(dict_image, 'id', 0), number=number),
+    'tracked slot': timeit.timeit(lambda: setattr(unwatched_image, 'id', 0), number=number),
+    'tracked slot, indexed': timeit.timeit(lambda: setattr(coco_image, 'id', 0), number=number)
+}
+logger.purple(', '.join([f'{key}: {value/number*1e6:.2f} usec/write' for key, value in write_times.items()]))
+del eager_dataset
+
+# Slotted objects don't carry a per-instance __dict__.
+coco_image = COCO_Image(
+    license_id=0, file_name='a.png', coco_url='a.png', height=1, width=1, date_captured='', flickr_url=None, id=0
+)
+coco_ann = COCO_Annotation.from_dict(
+    {
+        'segmentation': [], 'num_keypoints': 0, 'area': 1, 'iscrowd': 0, 'keypoints': [],
+        'image_id': 0, 'bbox': [0, 0, 1, 1], 'category_id': 0, 'id': 0
+    },
+    lazy=True
+)
+for obj in [coco_image, coco_ann]:
+    assert not hasattr(obj, '__dict__')
+    assert obj.copy() is not obj and obj.copy().to_dict() == obj.to_dict()
+logger.green('Slot checks passed.')
@@ -0,0 +1,24 @@
+import os
+import time
+from logger import logger
+from annotation_utils.coco.structs import COCO_Dataset
+
+dataset = COCO_Dataset.load_from_path(json_path='output.json')
+
+for preserve_filenames in [True, False]:
+    result_list = []
+    for workers in [None, 4]:
+        save_dir = f'test_vis_{workers}'
+        t0 = time.time()
+        dataset.save_visualization(
+            save_dir=save_dir, preserve_filenames=preserve_filenames, overwrite=True,
+            show_details=True, workers=workers
+        )
+        logger.purple(f'workers={workers}, preserve_filenames={preserve_filenames}: {time.time()-t0:.2f} sec')
+        result_list.append({
+            filename: open(f'{save_dir}/{filename}', 'rb').read()
+            for filename in os.listdir(save_dir)
+        })
+    # The parallel mode has to produce exactly the same files.
+    assert result_list[0] == result_list[1]
+logger.green('Parallel visualization checks passed.')
@@ -0,0 +1,28 @@
+import time
+import random
+from logger import logger
+from annotation_utils.coco.structs import COCO_Dataset
+from annotation_utils.coco.util import prefetch_map
+
+# Results have to come out in order, no matter which worker finishes first.
+def slow_double(value: int) -> int:
+    time.sleep(random.random() * 0.01)
+    return 2 * value
+assert list(prefetch_map(slow_double, list(range(200)), workers=8, max_prefetch=16)) == [2 * i for i in range(200)]
+
+# Stopping early must not render the whole list.
+started = []
+def record(value: int) -> int:
+    started.append(value)
+    return value
+result_iter = prefetch_map(record, list(range(1000)), workers=4, max_prefetch=8)
+assert [next(result_iter) for i in range(3)] == [0, 1, 2]
+result_iter.close()
+assert len(started) <= 3 + 8
+logger.green('prefetch_map checks passed.')
+
+dataset = COCO_Dataset.load_from_path(json_path='output.json')
+for workers in [None, 4]:
+    t0 = time.time()
+    dataset.save_video(save_path=f'prefetch_test_{workers}.mp4', overwrite=True, show_details=True, workers=workers)
+    logger.purple(f'save_video with workers={workers}: {time.time()-t0:.2f} sec')
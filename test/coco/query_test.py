@@ -0,0 +1,34 @@
+from logger import logger
+from annotation_utils.coco.structs import COCO_Dataset, COCO_License, COCO_Image, \
+    COCO_Annotation, COCO_Category
+from common_utils.common_types.bbox import BBox
+
+dataset = COCO_Dataset.new(description='Query Test')
+dataset.licenses.append(COCO_License(url='', id=0, name='License'))
+dataset.categories.append(COCO_Category(id=0, name='person'))
+dataset.categories.append(COCO_Category(id=1, name='car'))
+for image_id in range(10):
+    dataset.images.append(
+        COCO_Image(
+            license_id=0, file_name=f'{image_id}.png', coco_url=f'img/{image_id}.png',
+            height=100, width=100 * (image_id + 1), date_captured='', flickr_url=None, id=image_id
+        )
+    )
+    for i in range(4):
+        size = 10 * (i + 1)
+        dataset.annotations.append(
+            COCO_Annotation(
+                id=len(dataset.annotations), category_id=i % 2, image_id=image_id,
+                bbox=BBox(xmin=0, ymin=0, xmax=size, ymax=size), area=size * size
+            )
+        )
+
+query = dataset.query()
+large_people = query.where(category='person', area__gt=500)
+assert large_people.count() == 10 # Only the 30x30 person in each image
+assert all([coco_ann.category_id == 0 and coco_ann.area > 500 for coco_ann in large_people.annotations()])
+assert len(query.where(image_width__gte=500).images()) == 6
+assert query.where(bbox_width__in=[10, 40]).exclude(category='car').count() == 10
+subset = large_people.where(image_id__lt=3).to_dataset()
+assert len(subset.images) == 3 and len(subset.annotations) == 3
+logger.green('Query checks passed.')
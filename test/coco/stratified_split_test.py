@@ -0,0 +1,34 @@
+import time
+import numpy as np
+from logger import logger
+from annotation_utils.coco.util import get_stratified_parts
+
+# Synthetic dataset with a few common categories and many rare ones.
+rng = np.random.RandomState(0)
+num_images, num_categories, ratio = 100000, 80, [7, 2, 1]
+ann_img_idx = np.repeat(np.arange(num_images), rng.poisson(7, num_images))
+cat_p = 1.0 / np.arange(1, num_categories + 1)**1.5
+ann_cat_idx = rng.choice(num_categories, len(ann_img_idx), p=cat_p / cat_p.sum())
+
+start = time.time()
+part_idx, priority = get_stratified_parts(
+    ann_img_idx=ann_img_idx, ann_cat_idx=ann_cat_idx,
+    num_images=num_images, num_categories=num_categories,
+    ratio=ratio, seed=0
+)
+logger.purple(f'Assigned {num_images} images in {time.time()-start:.2f}s')
+
+same_part_idx, _ = get_stratified_parts(
+    ann_img_idx=ann_img_idx, ann_cat_idx=ann_cat_idx,
+    num_images=num_images, num_categories=num_categories,
+    ratio=ratio, seed=0
+)
+assert (part_idx == same_part_idx).all()
+
+counts = np.zeros((len(ratio), num_categories))
+np.add.at(counts, (part_idx[ann_img_idx], ann_cat_idx), 1)
+fractions = np.array(ratio) / sum(ratio)
+max_deviation = np.abs(counts / counts.sum(axis=0) - fractions[:, None]).max()
+logger.purple(f'Largest deviation of a category from ratio: {max_deviation:.4f}')
+assert max_deviation < 0.01
+logger.green('Stratified split checks passed.')
@@ -0,0 +1,24 @@
+from logger import logger
+from annotation_utils.coco.structs import COCO_Dataset
+
+dataset = COCO_Dataset.load_from_path(json_path='output.json', check_paths=False, stream=True)
+assert dataset.to_dict() == COCO_Dataset.load_from_path(json_path='output.json', check_paths=False).to_dict()
+logger.purple(f'Loaded {len(dataset.images)} images and {len(dataset.annotations)} annotations.')
+
+# Annotations can also be processed one at a time without building the dataset.
+num_anns = 0
+for coco_ann in COCO_Dataset.iter_annotations_from_path(json_path='output.json'):
+    num_anns += 1
+assert num_anns == len(dataset.annotations)
+logger.green('Stream loading checks passed.')
+
+# A single value that is much larger than the chunk size should still be read in linear time.
+import json, time
+from annotation_utils.coco.util.json_stream import JSON_Stream_Reader
+large_dict = {'info': {'description': 'a' * 2**23}, 'annotations': [{'segmentation': {'counts': 'b' * 2**23}}]}
+json.dump(large_dict, open('large_value.json', 'w'))
+t0 = time.time()
+items = list(JSON_Stream_Reader('large_value.json', chunk_size=2**12))
+logger.purple(f'Read 16 MiB of values in {time.time()-t0:.4f} sec with 4 KiB chunks')
+assert items == [('info', large_dict['info']), ('annotations', large_dict['annotations'][0])]
+logger.green('Large value checks passed.')
@@ -0,0 +1,43 @@
+import os
+import json
+from logger import logger
+from common_utils.file_utils import make_dir_if_not_exists, delete_all_files_in_dir
+from annotation_utils.coco.structs import COCO_Dataset
+from annotation_utils.coco.util.json_stream import JSON_Stream_Writer
+
+dump_dir = 'writer_dump'
+make_dir_if_not_exists(dump_dir)
+delete_all_files_in_dir(dump_dir, ask_permission=False)
+
+# The output has to match json.dump.
+dataset = COCO_Dataset.load_from_path(json_path='output.json', check_paths=False)
+dataset.save_to_path(f'{dump_dir}/dataset.json')
+assert open(f'{dump_dir}/dataset.json').read() == json.dumps(dataset.to_dict(), indent=2, ensure_ascii=False)
+assert os.listdir(dump_dir) == ['dataset.json']
+
+# A save that fails halfway must leave the previous file untouched and must not leave its temporary file behind.
+saved_text = open(f'{dump_dir}/dataset.json').read()
+dataset.annotations.annotation_list.append(None) # to_dict fails on this element
+try:
+    dataset.save_to_path(f'{dump_dir}/dataset.json', overwrite=True)
+    raise AssertionError
+except AttributeError:
+    pass
+dataset.annotations.annotation_list.pop()
+assert open(f'{dump_dir}/dataset.json').read() == saved_text
+assert os.listdir(dump_dir) == ['dataset.json']
+
+# Writers that save to the same path at the same time must not write into the same temporary file.
+with JSON_Stream_Writer(f'{dump_dir}/concurrent.json') as writer0:
+    with JSON_Stream_Writer(f'{dump_dir}/concurrent.json') as writer1:
+        writer0.write_item('writer', 0)
+        writer1.write_item('writer', 1)
+    assert json.load(open(f'{dump_dir}/concurrent.json')) == {'writer': 1}
+    writer0.write_list('values', range(3))
+assert json.load(open(f'{dump_dir}/concurrent.json')) == {'writer': 0, 'values': [0, 1, 2]}
+
+# The saved file gets the same permissions as a file made with open().
+open(f'{dump_dir}/plain.json', 'w').close()
+assert os.stat(f'{dump_dir}/concurrent.json').st_mode == os.stat(f'{dump_dir}/plain.json').st_mode
+assert sorted(os.listdir(dump_dir)) == ['concurrent.json', 'dataset.json', 'plain.json']
+logger.green('Stream writer checks passed.')